@@ -4,12 +4,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import timedelta
 from app.core import security
+from app.core.auth import get_current_user
+from app.core.user_cache import user_cache
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse
 
 router = APIRouter()
 
+def overloaded_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/auth/register")
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     try:
@@ -22,7 +31,10 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
             )
         
         # Create new user
-        hashed_password = security.get_password_hash(user_data.password)
+        try:
+            hashed_password = await security.get_password_hash_async(user_data.password)
+        except security.HashingOverloaded:
+            raise overloaded_exception()
         db_user = User(
             email=user_data.email,
             hashed_password=hashed_password,
@@ -51,11 +63,22 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
         )
     
     # Verify password
-    if not security.verify_password(form_data.password, user.hashed_password):
+    try:
+        valid, new_hash = await security.verify_and_update_password(
+            form_data.password, user.hashed_password
+        )
+    except security.HashingOverloaded:
+        raise overloaded_exception()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
+
+    # Upgrade hashes made with an older work factor
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
     
     # Create access token
     access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -72,4 +95,9 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
             "email": user.email,
             "is_active": user.is_active
         }
-    }
\ No newline at end of file
+    }
+
+@router.get("/auth/principal-cache")
+async def principal_cache_stats(user = Depends(get_current_user)):
+    """Hit and miss counters of the resolved-user cache in this process."""
+    return user_cache.stats()
\ No newline at end of file
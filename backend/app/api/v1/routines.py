@@ -1,34 +1,322 @@
 # app/api/v1/routines.py
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from app.db.pagination import InvalidCursor, fetch_page
+from app.db.session import get_db
+from app.models.routine import Routine
+from app.models.run import Run, RoutineRunStats, StepRunStats
+from app.models.step_chunk import StepChunk
+from app.schemas.routine import RoutineCreate, RoutineResponse, RoutineList
+from app.schemas.run import RunResponse, RunList, RunStatsBucket, StepStats, RoutineStats
 from app.services.automation.player import AutomationService  # Changed this line
+from app.services.automation.compiler import COMPILER_VERSION, plans_equivalent
+from app.services.automation.browser_pool import browser_pool
+from app.services.automation.recording import recording_sessions
+from app.services.automation.locator_cache import locator_cache
+from app.services.automation.jobs import enqueue_playback
+from app.services.automation.lean import ResourceFilter
+from app.services.automation.profiles import profile_manager
+from app.services.automation.profile_lease import LeaseUnavailable, ProfileLease
+from app.services.automation.step_store import step_store
+from app.services.automation.progress import follow_run, run_owner
 from app.core.auth import get_current_user
+from app.core.metrics import slow_runs
+from app.core.redis import get_redis
+from app.core.config import settings
 
 router = APIRouter()
 
+async def get_routine(db: AsyncSession, routine_id: int, user_id: int) -> Routine:
+    query = select(Routine).where(Routine.id == routine_id, Routine.user_id == user_id)
+    result = await db.execute(query)
+    routine = result.scalar_one_or_none()
+    if routine is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Routine not found"
+        )
+    return routine
+
+@router.get("/routines", response_model=RoutineList)
+async def list_routines(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List the user's routines, newest first, without their steps."""
+    query = select(
+        Routine.id, Routine.user_id, Routine.name, Routine.description, Routine.lean_mode,
+        Routine.compiled_version, Routine.created_at, Routine.updated_at,
+    ).where(Routine.user_id == user.id)
+    try:
+        rows, next_cursor = await fetch_page(db, query, Routine.id, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return RoutineList(
+        items=[RoutineResponse.model_validate(row) for row in rows], next_cursor=next_cursor
+    )
+
+@router.post("/routines", response_model=RoutineResponse)
+async def create_routine(
+    routine_data: RoutineCreate,
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Store a recording together with its compiled playback plan.
+
+    Step chunks already stored for other routines are shared, not copied.
+    """
+    routine = Routine(
+        user_id=user.id,
+        name=routine_data.name,
+        description=routine_data.description,
+        lean_mode=routine_data.lean_mode,
+    )
+    await step_store.set_steps(db, routine, routine_data.steps)
+    db.add(routine)
+    await db.commit()
+    await db.refresh(routine)
+    return routine
+
 @router.post("/routines/start-recording")
 async def start_recording(user = Depends(get_current_user)):
-    # Create user-specific automation service
-    user_data_dir = f"browser_data/{user.id}"
-    automation = AutomationService(user_data_dir)
-    await automation.start_browser()
-    await automation.start_recording()
+    # The session keeps the live service until stop-recording
+    user_data_dir = f"{settings.BROWSER_DATA_DIR}/{user.id}"
+    try:
+        await recording_sessions.start(user.id, user_data_dir)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     return {"status": "recording_started"}
 
 @router.post("/routines/stop-recording")
 async def stop_recording(user = Depends(get_current_user)):
-    # Get user's automation service
-    automation = AutomationService(f"browser_data/{user.id}")
-    recorded_steps = await automation.stop_recording()
-    await automation.close()
+    # Stop the service that is actually recording for this user
+    try:
+        recorded_steps = await recording_sessions.stop(user.id)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No recording in progress"
+        )
     return {"recorded_steps": recorded_steps}
 
 @router.post("/routines/{routine_id}/play")
-async def play_routine(routine_id: int, user = Depends(get_current_user)):
-    # Get routine from database
-    routine = await get_routine(routine_id)  # TO-DO: Implement this
-    # Play back the routine
-    automation = AutomationService(f"browser_data/{user.id}")
-    await automation.start_browser()
-    await automation.playback_routine(routine.steps)
-    await automation.close()
-    return {"status": "playback_completed"}
\ No newline at end of file
+async def play_routine(
+    routine_id: int,
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Check the routine exists, then leave playback to a worker
+    await get_routine(db, routine_id, user.id)
+    run_id = await enqueue_playback(get_redis(), routine_id, user.id)
+    return {"status": "queued", "run_id": run_id}
+
+@router.get("/routines/runs/{run_id}/events")
+async def run_events(run_id: str, user = Depends(get_current_user)):
+    """Stream a playback run's step-level progress as Server-Sent Events."""
+    redis = get_redis()
+    if await run_owner(redis, run_id) != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Run not found"
+        )
+
+    async def event_stream():
+        async for event in follow_run(redis, run_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@router.post("/routines/{routine_id}/verify")
+async def verify_routine(
+    routine_id: int,
+    fast: bool = False,
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Check a routine still plays back.
+
+    `fast` locates every step's target on its page without clicking and
+    reports which steps would fall back to coordinates or fail. Either way
+    a stored plan that no longer matches the recording fails at once.
+    """
+    routine = await get_routine(db, routine_id, user.id)
+    recording = await step_store.steps(db, routine)
+    if routine.compiled_refs is not None and routine.compiled_version == COMPILER_VERSION:
+        # Check the plan as stored, which is what workers play
+        plan = await step_store.get(db, routine.compiled_refs)
+        if not plans_equivalent(recording, {'version': routine.compiled_version, 'steps': plan}):
+            return {"valid": False, "error": "Compiled plan does not match recording"}
+    else:
+        # Missing or from an older compiler: bring it up to date, as playback would
+        plan = await step_store.plan(db, routine)
+    compiled = {'version': routine.compiled_version, 'steps': plan}
+    # Release the routine's row lock and connection before the browser work
+    await db.commit()
+    user_data_dir = f"{settings.BROWSER_DATA_DIR}/{user.id}"
+    # Same lease as playback workers, so nobody else opens the profile meanwhile
+    lease = ProfileLease(get_redis(), user.id, f"api-{uuid.uuid4().hex}", settings.PROFILE_LEASE_SECONDS)
+    try:
+        async with lease.hold():
+            automation = AutomationService(user_data_dir, pool=browser_pool)
+            try:
+                await automation.start_browser()
+                return await _verify(automation, routine, plan, recording, compiled, fast)
+            finally:
+                await automation.close()
+                await browser_pool.discard(user_data_dir)
+    except LeaseUnavailable:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Browser profile is in use")
+
+async def _verify(
+    automation: AutomationService, routine: Routine, plan: list, recording: list, compiled: dict, fast: bool
+):
+    if fast:
+        return await automation.verify_structure(plan)
+
+    if not routine.lean_mode:
+        return {"valid": await automation.verify_routine(recording, compiled)}
+
+    lean = ResourceFilter(profile=routine.lean_profile)
+    valid = await automation.verify_routine(recording, compiled, resource_filter=lean)
+    result = {"valid": valid, "lean": lean.stats()}
+    if not valid:
+        # Retry with everything loaded and allow what the lean run was missing
+        observer = ResourceFilter(profile=routine.lean_profile, observe_only=True)
+        valid = await automation.verify_routine(recording, compiled, resource_filter=observer)
+        if valid:
+            routine.lean_profile = observer.learned_profile(lean.blocked)
+            result["allowlist_size"] = len(routine.lean_profile['allow'])
+        result["valid"] = valid
+    return result
+
+@router.get("/routines/browser-pool")
+async def browser_pool_stats(user = Depends(get_current_user)):
+    """Warm browser pool occupancy, hit rate and launch times."""
+    return browser_pool.stats()
+
+@router.get("/routines/profiles/usage")
+async def profile_disk_usage(user = Depends(get_current_user)):
+    """Bytes on disk per browser profile; superusers see every profile."""
+    if user.is_superuser:
+        usage = await asyncio.to_thread(profile_manager.disk_usage)
+    else:
+        usage = await asyncio.to_thread(
+            profile_manager.disk_usage, f"{settings.BROWSER_DATA_DIR}/{user.id}"
+        )
+    return {"profiles": usage, "total_bytes": sum(usage.values())}
+
+@router.get("/routines/locator-cache")
+async def locator_cache_stats(user = Depends(get_current_user)):
+    """Locator cache hits, misses and estimated time saved across workers."""
+    return await locator_cache.shared_stats()
+
+@router.get("/routines/step-store")
+async def step_store_stats(user = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """Step chunk storage and deduplication, plus this process's decoded-chunk cache."""
+    stored, referenced, chunks = (await db.execute(select(
+        func.coalesce(func.sum(StepChunk.size), 0),
+        func.coalesce(func.sum(StepChunk.size * StepChunk.ref_count), 0),
+        func.count(),
+    ))).one()
+    return {
+        "chunks": chunks,
+        "stored_bytes": stored,
+        "referenced_bytes": referenced,
+        "dedup_ratio": round(referenced / stored, 2) if stored else None,
+        "cache": step_store.stats(),
+    }
+
+@router.get("/routines/runs/slowest")
+async def slowest_runs(limit: int = 20, user = Depends(get_current_user)):
+    """Per-step timing traces of the slowest recent runs; superusers see everyone's."""
+    traces = await slow_runs(get_redis(), settings.SLOW_RUNS_KEPT)
+    if not user.is_superuser:
+        traces = [t for t in traces if t['user_id'] == user.id]
+    return {"runs": traces[:limit]}
+
+@router.get("/routines/{routine_id}/runs", response_model=RunList)
+async def routine_runs(
+    routine_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Recorded playback attempts of a routine, newest first.
+
+    History is written behind playback, so a run shows up a few seconds
+    after it ends.
+    """
+    await get_routine(db, routine_id, user.id)
+    query = select(
+        Run.id, Run.run_id, Run.attempt, Run.schedule_id, Run.worker_id, Run.status,
+        Run.started_at, Run.finished_at, Run.duration, Run.browser_startup, Run.steps_done, Run.error,
+    ).where(Run.routine_id == routine_id)
+    try:
+        rows, next_cursor = await fetch_page(db, query, Run.id, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return RunList(items=[RunResponse.model_validate(row) for row in rows], next_cursor=next_cursor)
+
+@router.get("/routines/{routine_id}/stats", response_model=RoutineStats)
+async def routine_stats(
+    routine_id: int,
+    hours: int = Query(24, ge=1, le=24 * 90),
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Success rate and duration percentiles from the hourly rollups."""
+    await get_routine(db, routine_id, user.id)
+    since = (datetime.utcnow() - timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
+    buckets = (await db.scalars(
+        select(RoutineRunStats)
+        .where(RoutineRunStats.routine_id == routine_id, RoutineRunStats.bucket >= since)
+        .order_by(RoutineRunStats.bucket)
+    )).all()
+    step_buckets = await db.scalars(
+        select(StepRunStats)
+        .where(StepRunStats.routine_id == routine_id, StepRunStats.bucket >= since)
+    )
+
+    # Percentiles do not add up across hours; approximate them from the hourly ones
+    by_step = defaultdict(list)
+    for row in step_buckets:
+        by_step[row.step_index].append(row)
+    steps = []
+    for step_index, rows in sorted(by_step.items()):
+        runs = sum(r.runs for r in rows)
+        failed = sum(r.failed for r in rows)
+        p50s = [(r.p50_seconds, r.runs) for r in rows if r.p50_seconds is not None]
+        p95s = [r.p95_seconds for r in rows if r.p95_seconds is not None]
+        steps.append(StepStats(
+            step_index=step_index,
+            step_type=rows[-1].step_type,
+            runs=runs,
+            failed=failed,
+            failure_rate=failed / runs if runs else 0.0,
+            p50_seconds=sum(p * n for p, n in p50s) / sum(n for _, n in p50s) if p50s else None,
+            p95_seconds=max(p95s) if p95s else None,
+        ))
+
+    runs = sum(b.runs for b in buckets)
+    return RoutineStats(
+        routine_id=routine_id,
+        since=since,
+        runs=runs,
+        success_rate=sum(b.succeeded for b in buckets) / runs if runs else None,
+        buckets=[RunStatsBucket.model_validate(b) for b in buckets],
+        steps=steps,
+    )
@@ -2,23 +2,257 @@
 """
 Schedule management endpoints
 filepath: backend/app/api/v1/schedules.py
+
+Bulk endpoints write each batch of up to BULK_BATCH_SIZE rows with a single
+statement and register or cancel all their timers in one Redis pipeline,
+after the rows are committed.
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import time
+
 from app.core.auth import get_current_user
-from app.schemas.schedule import ScheduleCreate, ScheduleResponse
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.pagination import InvalidCursor, fetch_page
+from app.db.session import get_db
+from app.models.routine import Routine
+from app.models.schedule import Schedule
+from app.schemas.schedule import (
+    ScheduleCreate, ScheduleResponse, ScheduleList, ScheduleBulkCreate, ScheduleBulkUpdate,
+    ScheduleBulkDeactivate, ScheduleBulkItemResult, ScheduleBulkResponse,
+)
+from app.services.scheduler.job_manager import JobManager
+from app.services.scheduler.placement import place_run
 
 router = APIRouter()
 
-@router.post("/schedules")
-async def create_schedule(schedule: ScheduleCreate):
+BULK_BATCH_SIZE = 1000
+
+
+def get_job_manager() -> JobManager:
+    return JobManager(get_redis())
+
+
+def _chunks(items: List, size: int = BULK_BATCH_SIZE) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _check_bulk_size(count: int) -> None:
+    if count > settings.SCHEDULE_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.SCHEDULE_BULK_MAX_ITEMS} items per request"
+        )
+
+
+def _placed(schedule_id: int, interval: int, now: float) -> datetime:
+    # Naive UTC, like every stored time; JobManager reads it back as UTC
+    return datetime.utcfromtimestamp(place_run(schedule_id, interval, now))
+
+
+def _error(index: int, detail: str, schedule_id: Optional[int] = None) -> ScheduleBulkItemResult:
+    return ScheduleBulkItemResult(index=index, id=schedule_id, status="error", detail=detail)
+
+
+def _summary(results: List[ScheduleBulkItemResult]) -> ScheduleBulkResponse:
+    failed = sum(1 for r in results if r.status == "error")
+    return ScheduleBulkResponse(results=results, succeeded=len(results) - failed, failed=failed)
+
+
+async def _owned_schedules(db: AsyncSession, user_id: int, ids: Iterable[int]) -> Dict[int, Schedule]:
+    owned: Dict[int, Schedule] = {}
+    for chunk in _chunks(sorted(set(ids))):
+        rows = await db.scalars(
+            select(Schedule).where(Schedule.user_id == user_id, Schedule.id.in_(chunk))
+        )
+        owned.update({s.id: s for s in rows})
+    return owned
+
+
+async def _create_schedules(
+    db: AsyncSession, jobs: JobManager, user_id: int, items: List[ScheduleCreate]
+) -> Tuple[List[ScheduleBulkItemResult], List[Schedule]]:
+    routine_ids = sorted({item.routine_id for item in items})
+    owned = set()
+    for chunk in _chunks(routine_ids):
+        owned.update(await db.scalars(
+            select(Routine.id).where(Routine.user_id == user_id, Routine.id.in_(chunk))
+        ))
+
+    results: List[Optional[ScheduleBulkItemResult]] = [None] * len(items)
+    rows: List[Tuple[int, dict]] = []
+    for index, item in enumerate(items):
+        if item.routine_id not in owned:
+            results[index] = _error(index, "Routine not found")
+        elif item.interval_seconds <= 0:
+            results[index] = _error(index, "interval_seconds must be positive")
+        else:
+            rows.append((index, {**item.model_dump(), 'user_id': user_id}))
+
+    created: List[Tuple[int, Schedule]] = []
+    now = time.time()
+    for chunk in _chunks(rows):
+        # One multi-row INSERT ... RETURNING per batch
+        schedules = (await db.scalars(
+            insert(Schedule).returning(Schedule, sort_by_parameter_order=True),
+            [values for _, values in chunk],
+        )).all()
+        placed = []
+        for (index, _), schedule in zip(chunk, schedules):
+            if schedule.is_active:
+                next_run = _placed(schedule.id, schedule.interval_seconds, now)
+                set_committed_value(schedule, 'next_run', next_run)
+                placed.append({'id': schedule.id, 'next_run': next_run})
+            created.append((index, schedule))
+        if placed:
+            await db.execute(update(Schedule), placed)
+    await db.commit()
+    await jobs.schedule_many([s for _, s in created])
+
+    for index, schedule in created:
+        results[index] = ScheduleBulkItemResult(
+            index=index, id=schedule.id, status="created", next_run=schedule.next_run
+        )
+    return results, [s for _, s in created]
+
+
+@router.post("/schedules", response_model=ScheduleResponse)
+async def create_schedule(
+    schedule: ScheduleCreate,
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    jobs: JobManager = Depends(get_job_manager),
+):
     """Create a new schedule."""
-    # TODO: Implement schedule creation
-    pass
+    results, created = await _create_schedules(db, jobs, user.id, [schedule])
+    if not created:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=results[0].detail
+        )
+    return created[0]
+
+
+@router.get("/schedules", response_model=ScheduleList)
+async def list_schedules(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """List user's schedules, newest first, one keyset page at a time."""
+    query = select(
+        Schedule.id, Schedule.routine_id, Schedule.interval_seconds, Schedule.is_active,
+        Schedule.last_run, Schedule.next_run, Schedule.created_at,
+    ).where(Schedule.user_id == user.id)
+    try:
+        rows, next_cursor = await fetch_page(db, query, Schedule.id, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return ScheduleList(
+        items=[ScheduleResponse.model_validate(row) for row in rows], next_cursor=next_cursor
+    )
+
+
+@router.post("/schedules/bulk", response_model=ScheduleBulkResponse)
+async def bulk_create_schedules(
+    payload: ScheduleBulkCreate,
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    jobs: JobManager = Depends(get_job_manager),
+):
+    """Create many schedules; each item gets its own result."""
+    _check_bulk_size(len(payload.items))
+    results, _ = await _create_schedules(db, jobs, user.id, payload.items)
+    return _summary(results)
+
+
+@router.patch("/schedules/bulk", response_model=ScheduleBulkResponse)
+async def bulk_update_schedules(
+    payload: ScheduleBulkUpdate,
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    jobs: JobManager = Depends(get_job_manager),
+):
+    """Change the interval or active flag of many schedules.
+
+    Schedules whose interval changed or that were reactivated are placed
+    afresh; deactivated ones have their timers cancelled.
+    """
+    _check_bulk_size(len(payload.items))
+    owned = await _owned_schedules(db, user.id, [item.id for item in payload.items])
+    now = time.time()
+    results: List[ScheduleBulkItemResult] = []
+    changes: Dict[int, dict] = {}
+    retimed: Dict[int, Schedule] = {}
+    cancelled: Dict[int, Schedule] = {}
+
+    for index, item in enumerate(payload.items):
+        schedule = owned.get(item.id)
+        if schedule is None:
+            results.append(_error(index, "Schedule not found", item.id))
+            continue
+        fields = item.model_dump(exclude_unset=True, exclude={'id'})
+        # An explicit 0 or null is an error, not a request to keep the interval
+        interval = fields['interval_seconds'] if 'interval_seconds' in fields else schedule.interval_seconds
+        active = fields.get('is_active', schedule.is_active)
+        if interval is None or interval <= 0:
+            results.append(_error(index, "interval_seconds must be positive", item.id))
+            continue
+
+        next_run = schedule.next_run
+        if not active:
+            next_run = None
+            cancelled[schedule.id] = schedule
+            retimed.pop(schedule.id, None)
+        elif interval != schedule.interval_seconds or not schedule.is_active:
+            next_run = _placed(schedule.id, interval, now)
+            retimed[schedule.id] = schedule
+            cancelled.pop(schedule.id, None)
+        for key, value in (('interval_seconds', interval), ('is_active', active), ('next_run', next_run)):
+            set_committed_value(schedule, key, value)
+        changes[schedule.id] = {
+            'id': schedule.id, 'interval_seconds': interval, 'is_active': active, 'next_run': next_run,
+        }
+        results.append(ScheduleBulkItemResult(
+            index=index, id=schedule.id, status="updated", next_run=next_run
+        ))
+
+    for chunk in _chunks(list(changes.values())):
+        await db.execute(update(Schedule), chunk)
+    await db.commit()
+    await jobs.schedule_many(list(retimed.values()))
+    await jobs.cancel_many(list(cancelled), user.id)
+    return _summary(results)
 
-@router.get("/schedules")
-async def list_schedules():
-    """List user's schedules."""
-    # TODO: Implement schedules listing
-    pass
 
-# TO-DO: Implement schedules endpoints
\ No newline at end of file
+@router.post("/schedules/bulk/deactivate", response_model=ScheduleBulkResponse)
+async def bulk_deactivate_schedules(
+    payload: ScheduleBulkDeactivate,
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    jobs: JobManager = Depends(get_job_manager),
+):
+    """Deactivate many schedules and cancel their timers."""
+    _check_bulk_size(len(payload.ids))
+    owned = await _owned_schedules(db, user.id, payload.ids)
+    for chunk in _chunks(sorted(owned)):
+        await db.execute(
+            update(Schedule)
+            .where(Schedule.id.in_(chunk))
+            .values(is_active=False, next_run=None)
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    await jobs.cancel_many(list(owned), user.id)
+    return _summary([
+        ScheduleBulkItemResult(index=index, id=schedule_id, status="deactivated")
+        if schedule_id in owned else _error(index, "Schedule not found", schedule_id)
+        for index, schedule_id in enumerate(payload.ids)
+    ])
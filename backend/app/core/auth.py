@@ -7,6 +7,7 @@ from sqlalchemy import select
 
 from app.core.config import settings
 from app.core.security import SECRET_KEY, ALGORITHM
+from app.core.user_cache import user_cache
 from app.db.session import get_db
 from app.models.user import User
 
@@ -29,12 +30,16 @@ async def get_current_user(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-    
+
+    # Most requests are served from the cache without touching the database
+    user = await user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise credentials_exception
+        await user_cache.put(email, user)
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import List
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Dropfarm"
@@ -6,7 +7,45 @@ class Settings(BaseSettings):
     REDIS_URL: str
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    BCRYPT_ROUNDS: int = 12
+    HASH_WORKERS: int = 4
+    HASH_MAX_PENDING: int = 64
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_REDIS: bool = False
     BROWSER_DATA_DIR: str = "browser_data"
+    BROWSER_HEADLESS: bool = False
+    BROWSER_POOL_SIZE: int = 10
+    BROWSER_POOL_IDLE_SECONDS: float = 600.0
+    BROWSER_POOL_SWEEP_SECONDS: float = 60.0
+    PROFILE_PRUNE_INTERVAL_SECONDS: int = 6 * 3600
+    PLAYBACK_FIXED_WAITS: bool = False
+    ASSET_CACHE_ENABLED: bool = True
+    ASSET_CACHE_MAX_BYTES: int = 2 * 1024 ** 3
+    LEAN_BLOCKED_RESOURCE_TYPES: List[str] = ["image", "media", "font"]
+    LEAN_BLOCKED_URL_PATTERNS: List[str] = [
+        "*google-analytics.com/*",
+        "*googletagmanager.com/*",
+        "*doubleclick.net/*",
+        "*connect.facebook.net/*",
+        "*hotjar.com/*",
+    ]
+    WORKER_CONCURRENCY: int = 2
+    PLAYBACK_PAGES_PER_USER: int = 3
+    PLAYBACK_MAX_ATTEMPTS: int = 3
+    VERIFY_MAX_PAGES: int = 4
+    VERIFY_LOCATOR_TIMEOUT: float = 3.0
+    PROFILE_LEASE_SECONDS: int = 60
+    RECORDING_MAX_SECONDS: float = 1800.0
+    METRICS_FLUSH_SECONDS: float = 10.0
+    SCHEDULE_BULK_MAX_ITEMS: int = 10000
+    SLOW_RUNS_KEPT: int = 50
+    STEP_CHUNK_CACHE_STEPS: int = 200000
+    HISTORY_BATCH_SIZE: int = 500
+    HISTORY_FLUSH_SECONDS: float = 2.0
+    HISTORY_MAX_PENDING: int = 50000
+    HISTORY_ROLLUP_SECONDS: float = 300.0
+    HISTORY_ROLLUP_LOOKBACK_HOURS: int = 2
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,236 @@
+# app/core/metrics.py
+"""
+Prometheus-format metrics shared by the API and the playback workers
+filepath: backend/app/core/metrics.py
+
+Playback happens in worker processes, so observations are not kept only in
+the process that made them. Each process accumulates histogram counts
+locally and periodically adds them to Redis hashes; gauges are snapshotted
+per process into one hash, and snapshots not refreshed for a few flush
+intervals are dropped as belonging to dead processes. GET /metrics on any API replica renders the
+merged totals.
+"""
+from redis import asyncio as aioredis
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import os
+import socket
+import time
+
+from app.core.config import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HISTOGRAM_KEY = 'metrics:histogram:{}'
+GAUGES_KEY = 'metrics:gauges'
+SLOW_RUNS_KEY = 'metrics:slow_runs'
+SLOW_RUN_TRACES_KEY = 'metrics:slow_run_traces'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """Cumulative histogram whose counts are pushed to Redis as deltas."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: one count per bucket, then +Inf, then the sum
+        self._pending: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: Optional[str]) -> None:
+        key = tuple(str(labels.get(name) or '') for name in self.labelnames)
+        row = self._pending.get(key)
+        if row is None:
+            row = self._pending[key] = [0] * (len(self.buckets) + 2)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def drain(self) -> Dict[Tuple[str, ...], List[float]]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending: Dict[Tuple[str, ...], List[float]]) -> None:
+        """Put back counts whose push failed."""
+        for key, row in pending.items():
+            current = self._pending.setdefault(key, [0] * len(row))
+            for i, value in enumerate(row):
+                current[i] += value
+
+    def render(self, stored: Dict[str, str]) -> List[str]:
+        """Exposition lines from the Redis hash of this histogram."""
+        rows: Dict[str, List[float]] = {}
+        for field, value in stored.items():
+            labels, _, slot = field.rpartition('|')
+            row = rows.setdefault(labels, [0] * (len(self.buckets) + 2))
+            row[int(slot)] = float(value)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, row in sorted(rows.items()):
+            values = json.loads(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), row[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {int(cumulative)}"
+                )
+            label_str = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{label_str} {row[-1]}")
+            lines.append(f"{self.name}_count{label_str} {int(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Histograms and gauges of one process, pushed to and rendered from Redis."""
+
+    def __init__(self, process: str, flush_interval: float = 10.0):
+        self.process = process
+        self.flush_interval = flush_interval
+        self.histograms: Dict[str, Histogram] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self.histograms[name] = histogram
+        return histogram
+
+    def gauge(self, name: str, documentation: str, collect: Callable[[], float]) -> None:
+        """Register a gauge read from `collect` at every flush."""
+        self._gauges[name] = (documentation, collect)
+
+    async def flush(self, redis: aioredis.Redis) -> None:
+        drained = {name: h.drain() for name, h in self.histograms.items()}
+        gauges = {}
+        for name, (documentation, collect) in self._gauges.items():
+            try:
+                gauges[name] = [documentation, float(collect())]
+            except Exception as e:
+                print(f"Error collecting gauge {name}: {str(e)}")
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for name, pending in drained.items():
+                    key = HISTOGRAM_KEY.format(name)
+                    for labels, row in pending.items():
+                        prefix = json.dumps(labels)
+                        for slot, value in enumerate(row[:-1]):
+                            if value:
+                                pipe.hincrby(key, f"{prefix}|{slot}", int(value))
+                        pipe.hincrbyfloat(key, f"{prefix}|{len(row) - 1}", row[-1])
+                pipe.hset(GAUGES_KEY, self.process, json.dumps({'time': time.time(), 'gauges': gauges}))
+                await pipe.execute()
+        except Exception:
+            for name, pending in drained.items():
+                self.histograms[name].restore(pending)
+            raise
+
+    async def flush_forever(self, redis: aioredis.Redis, stop: Optional[asyncio.Event] = None) -> None:
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush(redis)
+            except Exception as e:
+                print(f"Error flushing metrics: {str(e)}")
+
+    async def render(self, redis: aioredis.Redis) -> str:
+        """Merged metrics of every live process in Prometheus text format."""
+        await self.flush(redis)
+        names = sorted(self.histograms)
+        async with redis.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.hgetall(HISTOGRAM_KEY.format(name))
+            stored = await pipe.execute()
+        lines: List[str] = []
+        for name, fields in zip(names, stored):
+            lines.extend(self.histograms[name].render(fields))
+
+        snapshots, stale = {}, []
+        cutoff = time.time() - self.flush_interval * 3
+        for process, raw in (await redis.hgetall(GAUGES_KEY)).items():
+            snapshot = json.loads(raw)
+            if snapshot['time'] < cutoff:
+                stale.append(process)
+            else:
+                snapshots[process] = snapshot['gauges']
+        if stale:
+            await redis.hdel(GAUGES_KEY, *stale)
+        gauges: Dict[str, Tuple[str, List[Tuple[str, float]]]] = {}
+        for process, values in sorted(snapshots.items()):
+            for name, (documentation, value) in values.items():
+                gauges.setdefault(name, (documentation, []))[1].append((process, value))
+        for name, (documentation, samples) in sorted(gauges.items()):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for process, value in samples:
+                lines.append(f'{name}{{process="{_escape(process)}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+async def record_run_trace(redis: aioredis.Redis, trace: Dict, keep: int = 50) -> None:
+    """Keep `trace` if the run is among the `keep` slowest seen so far."""
+    run_id = trace['run_id']
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.zadd(SLOW_RUNS_KEY, {run_id: trace['duration']})
+        pipe.hset(SLOW_RUN_TRACES_KEY, run_id, json.dumps(trace))
+        pipe.zrange(SLOW_RUNS_KEY, 0, -(keep + 1))
+        _, _, evicted = await pipe.execute()
+    if evicted:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zrem(SLOW_RUNS_KEY, *evicted)
+            pipe.hdel(SLOW_RUN_TRACES_KEY, *evicted)
+            await pipe.execute()
+
+
+async def slow_runs(redis: aioredis.Redis, limit: int = 20) -> List[Dict]:
+    """Stored traces, slowest first."""
+    run_ids = await redis.zrevrange(SLOW_RUNS_KEY, 0, limit - 1)
+    if not run_ids:
+        return []
+    traces = await redis.hmget(SLOW_RUN_TRACES_KEY, run_ids)
+    return [json.loads(t) for t in traces if t is not None]
+
+
+metrics = MetricsRegistry(
+    f"{socket.gethostname()}-{os.getpid()}", flush_interval=settings.METRICS_FLUSH_SECONDS
+)
+
+STEP_SECONDS = metrics.histogram(
+    'dropfarm_playback_step_seconds', 'Duration of one playback step.', ('type', 'strategy')
+)
+RUN_SECONDS = metrics.histogram(
+    'dropfarm_playback_run_seconds', 'Duration of a whole playback run.', ('status',),
+    buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+)
+BROWSER_LAUNCH_SECONDS = metrics.histogram(
+    'dropfarm_browser_launch_seconds', 'Time to launch a persistent browser context.', ('source',),
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0),
+)
+SCHEDULER_LAG_SECONDS = metrics.histogram(
+    'dropfarm_scheduler_dispatch_lag_seconds', 'Delay between a schedule being due and dispatched.',
+)
+REQUEST_SECONDS = metrics.histogram(
+    'dropfarm_http_request_seconds', 'API request latency.', ('method', 'route', 'status')
+)
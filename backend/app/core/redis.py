@@ -0,0 +1,19 @@
+# app/core/redis.py
+from redis import asyncio as aioredis
+from typing import Optional
+from app.core.config import settings
+
+_client: Optional[aioredis.Redis] = None
+
+def get_redis() -> aioredis.Redis:
+    """Process-wide async Redis client, created on first use."""
+    global _client
+    if _client is None:
+        _client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
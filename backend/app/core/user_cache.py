@@ -0,0 +1,171 @@
+# app/core/user_cache.py
+"""
+Cache of users resolved from access tokens
+filepath: backend/app/core/user_cache.py
+"""
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Set, Tuple
+import asyncio
+import json
+import time
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.user import User
+
+REDIS_KEY = 'user:principal:{}'
+INVALIDATE_CHANNEL = 'user:invalidate'
+# Backoff between attempts to resubscribe after losing Redis
+LISTEN_RETRY_SECONDS = 1.0
+LISTEN_RETRY_MAX_SECONDS = 30.0
+
+# Never the password hash: cached principals are for authorisation only
+_FIELDS = ('id', 'email', 'is_active', 'is_superuser')
+
+
+class UserCache:
+    """TTL/LRU cache of users keyed by token subject, with an optional Redis tier.
+
+    Entries are plain column snapshots; `get` returns a fresh, transient User
+    built from them, so requests never share an ORM instance. Invalidations
+    are broadcast whether or not the Redis tier is on, since every process
+    keeps its own local tier.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0, use_redis: bool = False):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        # Broadcasts started from sync ORM hooks, kept alive until they finish
+        self._broadcasts: Set[asyncio.Task] = set()
+
+    def _to_user(self, data: Dict[str, Any]) -> User:
+        return User(**data)
+
+    async def get(self, subject: str) -> Optional[User]:
+        entry = self._entries.get(subject)
+        if entry is not None:
+            expires, data = entry
+            if expires > time.monotonic():
+                self._entries.move_to_end(subject)
+                self.hits += 1
+                return self._to_user(data)
+            del self._entries[subject]
+
+        if self.use_redis:
+            try:
+                raw = await get_redis().get(REDIS_KEY.format(subject))
+            except RedisError:
+                raw = None
+            if raw is not None:
+                data = json.loads(raw)
+                self._store_local(subject, data)
+                self.redis_hits += 1
+                return self._to_user(data)
+
+        self.misses += 1
+        return None
+
+    def _store_local(self, subject: str, data: Dict[str, Any]) -> None:
+        self._entries[subject] = (time.monotonic() + self.ttl, data)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def put(self, subject: str, user: User) -> None:
+        data = {field: getattr(user, field) for field in _FIELDS}
+        self._store_local(subject, data)
+        if self.use_redis:
+            try:
+                await get_redis().set(REDIS_KEY.format(subject), json.dumps(data), ex=int(self.ttl))
+            except RedisError:
+                pass
+
+    def invalidate_local(self, subject: str) -> None:
+        self._entries.pop(subject, None)
+
+    async def invalidate(self, subject: str) -> None:
+        """Drop a user here, in Redis, and in every other process."""
+        self.invalidate_local(subject)
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                if self.use_redis:
+                    pipe.delete(REDIS_KEY.format(subject))
+                pipe.publish(INVALIDATE_CHANNEL, subject)
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    def invalidate_soon(self, subject: str, loop: asyncio.AbstractEventLoop) -> None:
+        """Broadcast an invalidation from sync code running on `loop`."""
+        task = loop.create_task(self.invalidate(subject))
+        self._broadcasts.add(task)
+        task.add_done_callback(self._broadcasts.discard)
+
+    async def listen_for_invalidations(self) -> None:
+        """Evict users invalidated by other processes; runs until cancelled.
+
+        If the subscription drops it is re-established with backoff. Every
+        local entry is dropped on resubscribing, since invalidations sent
+        while disconnected were missed.
+        """
+        delay = LISTEN_RETRY_SECONDS
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATE_CHANNEL)
+                self._entries.clear()
+                delay = LISTEN_RETRY_SECONDS
+                async for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self.invalidate_local(message['data'])
+            except (RedisError, OSError) as e:
+                print(f"User cache lost its invalidation channel, retrying in {delay:g}s: {str(e)}")
+            finally:
+                try:
+                    await pubsub.aclose()
+                except (RedisError, OSError):
+                    pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LISTEN_RETRY_MAX_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+        }
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    use_redis=settings.USER_CACHE_REDIS,
+)
+
+
+def _user_changed(mapper, connection, target: User) -> None:
+    """Any write to a user row evicts it, including deactivation."""
+    # A changed email must also evict the entry under the old address
+    subjects = {target.email, *inspect(target).attrs.email.history.deleted}
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    for subject in subjects:
+        user_cache.invalidate_local(subject)
+        if loop is not None:
+            user_cache.invalidate_soon(subject, loop)
+
+
+event.listen(User, 'after_update', _user_changed)
+event.listen(User, 'after_delete', _user_changed)
@@ -2,4 +2,6 @@
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
 from app.models.routine import Routine  # noqa
-from app.models.schedule import Schedule  # noqa
\ No newline at end of file
+from app.models.schedule import Schedule  # noqa
+from app.models.run import Run, RunStep, RoutineRunStats, StepRunStats  # noqa
+from app.models.step_chunk import StepChunk  # noqa
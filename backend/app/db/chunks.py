@@ -0,0 +1,77 @@
+# backend/app/db/chunks.py
+"""
+Content-defined chunking of step sequences
+filepath: backend/app/db/chunks.py
+
+A sequence is cut after every step whose content hash hits a fixed
+pattern, so boundaries depend only on nearby steps: inserting or editing a
+step changes the chunk around it and leaves every other chunk, and its
+digest, as it was. Chunks with equal content have equal digests wherever
+they occur, which is what lets routines share them.
+
+Recording timestamps are split off before chunking; they differ between
+otherwise identical recordings and are kept per routine instead.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+
+import msgpack
+
+# Average, minimum and maximum steps per chunk
+CHUNK_TARGET_STEPS = 64
+CHUNK_MIN_STEPS = 16
+CHUNK_MAX_STEPS = 256
+
+VOLATILE_FIELDS = ('timestamp',)
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _canonical(value[k]) for k in sorted(value)}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def split_volatile(steps: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Optional[Any]]]:
+    """Steps without their volatile fields, in canonical key order, and their timestamps."""
+    content, timestamps = [], []
+    for step in steps:
+        content.append(_canonical({k: v for k, v in step.items() if k not in VOLATILE_FIELDS}))
+        timestamps.append(step.get('timestamp'))
+    return content, timestamps
+
+
+def join_volatile(steps: List[Dict[str, Any]], timestamps: Optional[Iterable[Optional[Any]]]) -> List[Dict[str, Any]]:
+    """Put timestamps back on steps, in place; `steps` must not be shared."""
+    for step, timestamp in zip(steps, timestamps or ()):
+        if timestamp is not None:
+            step['timestamp'] = timestamp
+    return steps
+
+
+def split_chunks(steps: List[Dict[str, Any]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """(digest, steps) per chunk; `steps` should come from split_volatile."""
+    chunks = []
+    current: List[Dict[str, Any]] = []
+    digest = hashlib.sha256()
+    for step in steps:
+        packed = msgpack.packb(step)
+        current.append(step)
+        digest.update(packed)
+        fingerprint = int.from_bytes(hashlib.sha1(packed).digest()[:4], 'big')
+        at_boundary = fingerprint % CHUNK_TARGET_STEPS == CHUNK_TARGET_STEPS - 1
+        if (at_boundary and len(current) >= CHUNK_MIN_STEPS) or len(current) >= CHUNK_MAX_STEPS:
+            chunks.append((digest.hexdigest(), current))
+            current = []
+            digest = hashlib.sha256()
+    if current:
+        chunks.append((digest.hexdigest(), current))
+    return chunks
+
+
+def sequence_digest(refs: List[str], timestamps: Optional[List[Optional[Any]]] = None) -> str:
+    """Identity of a whole sequence, timing included; copies of a recording share it."""
+    encoded = json.dumps([refs, timestamps or []], separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
@@ -0,0 +1,46 @@
+# app/db/pagination.py
+"""
+Keyset (cursor) pagination over id-ordered listings
+filepath: backend/app/db/pagination.py
+
+Pages are fetched with `WHERE id < :last_id ORDER BY id DESC LIMIT n`,
+which an index ending in id answers by seeking, so page 10 000 costs the
+same as page 1. OFFSET would read and discard every earlier row.
+"""
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Optional, Tuple
+import base64
+import json
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not produced by encode_cursor."""
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({'id': last_id}).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))['id'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+async def fetch_page(
+    db: AsyncSession, query: Select, id_column: Any, cursor: Optional[str], limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    """Rows of one page, newest first, and the cursor of the next page if any."""
+    last_id = decode_cursor(cursor)
+    if last_id is not None:
+        query = query.where(id_column < last_id)
+    rows = (await db.execute(query.order_by(id_column.desc()).limit(limit + 1))).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].id)
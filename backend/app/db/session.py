@@ -1,10 +1,16 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import metrics
 
 engine = create_async_engine(settings.DATABASE_URL)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+metrics.gauge('dropfarm_db_pool_size', 'Configured DB connection pool size.', lambda: engine.pool.size())
+metrics.gauge('dropfarm_db_pool_checked_out', 'DB connections in use.', lambda: engine.pool.checkedout())
+metrics.gauge('dropfarm_db_pool_checked_in', 'Idle DB connections in the pool.', lambda: engine.pool.checkedin())
+metrics.gauge('dropfarm_db_pool_overflow', 'DB connections open beyond the pool size.', lambda: engine.pool.overflow())
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
@@ -0,0 +1,101 @@
+# backend/app/db/types.py
+"""
+Compact column types
+filepath: backend/app/db/types.py
+"""
+from sqlalchemy.types import TypeDecorator, LargeBinary
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import struct
+
+import msgpack
+import zstandard
+
+# Header: magic, format version, step count
+STEPS_MAGIC = b'DFS'
+STEPS_FORMAT_VERSION = 1
+_HEADER = struct.Struct('>3sBI')
+
+_READ_CHUNK = 16 * 1024
+
+
+def encode_steps(steps: Iterable[Dict[str, Any]], level: int = 10) -> bytes:
+    """Encode steps as a zstd-compressed stream of msgpack objects.
+
+    Steps are packed one after another rather than as a single array, so
+    they can be decoded one at a time without materialising the list.
+    """
+    steps = list(steps)
+    packer = msgpack.Packer()
+    body = b''.join(packer.pack(step) for step in steps)
+    compressed = zstandard.ZstdCompressor(level=level).compress(body)
+    return _HEADER.pack(STEPS_MAGIC, STEPS_FORMAT_VERSION, len(steps)) + compressed
+
+
+def _read_header(data: bytes) -> int:
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != STEPS_MAGIC:
+        raise ValueError("Not an encoded step sequence")
+    if version != STEPS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported step format version {version}")
+    return count
+
+
+def iter_steps(data: bytes) -> Iterator[Dict[str, Any]]:
+    """Decode steps lazily, one at a time."""
+    _read_header(data)
+    reader = zstandard.ZstdDecompressor().stream_reader(memoryview(data)[_HEADER.size:])
+    unpacker = msgpack.Unpacker(raw=False)
+    while True:
+        chunk = reader.read(_READ_CHUNK)
+        if not chunk:
+            break
+        unpacker.feed(chunk)
+        for step in unpacker:
+            yield step
+
+
+class EncodedSteps:
+    """Read-only step sequence backed by its encoded bytes.
+
+    Iterating decodes on the fly; len() comes from the header.
+    """
+
+    __slots__ = ('data', '_count')
+
+    def __init__(self, data: bytes):
+        self.data = bytes(data)
+        self._count = _read_header(self.data)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter_steps(self.data)
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"EncodedSteps({self._count} steps, {len(self.data)} bytes)"
+
+
+class CompressedSteps(TypeDecorator):
+    """Stores a list of steps as msgpack+zstd; loads them as EncodedSteps."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Optional[bytes]:
+        if value is None:
+            return None
+        if isinstance(value, EncodedSteps):
+            return value.data
+        return encode_steps(value)
+
+    def process_result_value(self, value: Optional[bytes], dialect: Any) -> Optional[EncodedSteps]:
+        if value is None:
+            return None
+        return EncodedSteps(value)
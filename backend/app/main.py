@@ -1,8 +1,16 @@
 # app/main.py
-from fastapi import FastAPI
+import asyncio
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
 from app.api.v1 import auth, routines, schedules
+from app.services.automation.browser_pool import browser_pool
+from app.core.metrics import metrics, REQUEST_SECONDS
+from app.core.redis import get_redis, close_redis
+from app.core.user_cache import user_cache
+from app.core.security import hashing_executor
 
 app = FastAPI(title="Dropfarm API")
 
@@ -18,4 +26,54 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(routines.router, prefix="/api/v1")
 app.include_router(schedules.router, prefix="/api/v1")
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep series bounded
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status_code),
+        )
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Metrics of every API and worker process, in Prometheus text format."""
+    return PlainTextResponse(
+        await metrics.render(get_redis()), media_type="text/plain; version=0.0.4"
+    )
+
+@app.on_event("startup")
+async def start_user_cache_listener():
+    app.state.user_cache_listener = asyncio.create_task(user_cache.listen_for_invalidations())
+
+@app.on_event("startup")
+async def start_browser_pool_maintenance():
+    app.state.browser_pool_maintenance = asyncio.create_task(browser_pool.run_maintenance(
+        settings.BROWSER_POOL_SWEEP_SECONDS, settings.BROWSER_POOL_IDLE_SECONDS
+    ))
+
+@app.on_event("startup")
+async def start_metrics_flusher():
+    app.state.metrics_flusher = asyncio.create_task(metrics.flush_forever(get_redis()))
+
+@app.on_event("shutdown")
+async def shutdown_browser_pool():
+    for name in ("user_cache_listener", "metrics_flusher", "browser_pool_maintenance"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    await browser_pool.close()
+    await close_redis()
+    hashing_executor.shutdown()
+
 # TO-DO: Implement main application logic
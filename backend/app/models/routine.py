@@ -1,16 +1,28 @@
 # app/models/routine.py
-from sqlalchemy import Column, Integer, String, JSON, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, JSON, Index
+from sqlalchemy.orm import deferred
 from app.db.base_class import Base
+from app.db.types import CompressedSteps
 from datetime import datetime
 
 class Routine(Base):
     __tablename__ = "routines"
+    __table_args__ = (
+        Index("ix_routines_user_id_id", "user_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     name = Column(String)
     description = Column(String, nullable=True)
-    steps = Column(JSON)
+    # Step payloads live in shared step_chunks; see services/automation/step_store.py
+    step_refs = Column(JSON, nullable=True)
+    step_timestamps = deferred(Column(CompressedSteps, nullable=True))  # per step, packed like steps
+    steps_digest = Column(String(64), nullable=True, index=True)
+    compiled_refs = Column(JSON, nullable=True)
+    compiled_version = Column(Integer, nullable=True)
+    lean_mode = Column(Boolean, default=False)
+    lean_profile = Column(JSON, nullable=True)  # allowlist and sizes learned by verify runs
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -0,0 +1,68 @@
+# app/models/run.py
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Float, Index
+from app.db.base_class import Base
+
+class Run(Base):
+    """One playback attempt; a retried run has one row per attempt."""
+    __tablename__ = "runs"
+    __table_args__ = (
+        Index("ix_runs_routine_id_id", "routine_id", "id"),
+        Index("ix_runs_finished_at", "finished_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    run_id = Column(String(32), index=True)
+    attempt = Column(Integer, default=0)
+    routine_id = Column(Integer, ForeignKey("routines.id", ondelete="CASCADE"))
+    user_id = Column(Integer, ForeignKey("users.id"))
+    schedule_id = Column(Integer, nullable=True)
+    worker_id = Column(String, nullable=True)
+    status = Column(String)  # finished, failed or retrying
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    duration = Column(Float)
+    browser_startup = Column(Float, nullable=True)
+    steps_done = Column(Integer, default=0)
+    error = Column(String, nullable=True)
+
+class RunStep(Base):
+    __tablename__ = "run_steps"
+    __table_args__ = (
+        Index("ix_run_steps_run_id_attempt", "run_id", "attempt"),
+        Index("ix_run_steps_finished_at", "finished_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    run_id = Column(String(32))
+    attempt = Column(Integer, default=0)
+    routine_id = Column(Integer, ForeignKey("routines.id", ondelete="CASCADE"))
+    step_index = Column(Integer)
+    step_type = Column(String, nullable=True)
+    strategy = Column(String, nullable=True)
+    duration = Column(Float)
+    error = Column(String, nullable=True)
+    finished_at = Column(DateTime)
+
+class RoutineRunStats(Base):
+    """Hourly rollup of final run outcomes per routine."""
+    __tablename__ = "routine_run_stats"
+
+    routine_id = Column(Integer, ForeignKey("routines.id", ondelete="CASCADE"), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    runs = Column(Integer)
+    succeeded = Column(Integer)
+    p50_seconds = Column(Float)
+    p95_seconds = Column(Float)
+
+class StepRunStats(Base):
+    """Hourly rollup of step outcomes per routine step."""
+    __tablename__ = "step_run_stats"
+
+    routine_id = Column(Integer, ForeignKey("routines.id", ondelete="CASCADE"), primary_key=True)
+    step_index = Column(Integer, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    step_type = Column(String, nullable=True)
+    runs = Column(Integer)
+    failed = Column(Integer)
+    p50_seconds = Column(Float)
+    p95_seconds = Column(Float)
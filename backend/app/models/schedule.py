@@ -1,13 +1,18 @@
 # app/models/schedule.py
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Index
 from app.db.base_class import Base
 from datetime import datetime
 
 class Schedule(Base):
     __tablename__ = "schedules"
+    __table_args__ = (
+        Index("ix_schedules_user_id_id", "user_id", "id"),
+        Index("ix_schedules_is_active_next_run", "is_active", "next_run"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     routine_id = Column(Integer, ForeignKey("routines.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # denormalised from the routine for listings
     interval_seconds = Column(Integer)  # Simple interval in seconds
     is_active = Column(Boolean, default=True)
     last_run = Column(DateTime, nullable=True)
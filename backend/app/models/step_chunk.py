@@ -0,0 +1,16 @@
+# app/models/step_chunk.py
+from sqlalchemy import Column, Integer, String, DateTime
+from app.db.base_class import Base
+from app.db.types import CompressedSteps
+from datetime import datetime
+
+class StepChunk(Base):
+    """A run of steps stored once and referenced by digest from any number of routines."""
+    __tablename__ = "step_chunks"
+
+    digest = Column(String(64), primary_key=True)
+    steps = Column(CompressedSteps)
+    step_count = Column(Integer)
+    size = Column(Integer)  # encoded bytes
+    ref_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
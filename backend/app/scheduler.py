@@ -0,0 +1,59 @@
+# app/scheduler.py
+"""
+Schedule dispatcher process
+filepath: backend/app/scheduler.py
+
+Run one or more of these next to the API and the workers:
+
+    python -m app.scheduler
+
+Each dispatcher pops due schedules from Redis and queues a playback run for
+each one. Popping is atomic, so extra dispatchers only add availability,
+never duplicate runs. The next run time of each dispatched schedule is
+written back to Postgres in batches for listings.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+from typing import Any, Dict
+
+from app.core.metrics import metrics
+from app.core.redis import get_redis, close_redis
+from app.services.automation.jobs import enqueue_playback
+from app.services.scheduler.job_manager import JobManager
+from app.services.scheduler.next_runs import next_runs
+
+
+async def dispatch(job: Dict[str, Any]) -> None:
+    """Queue a playback run for one due schedule."""
+    await enqueue_playback(get_redis(), job['routine_id'], job['user_id'], schedule_id=job['schedule_id'])
+    next_runs.record(job['schedule_id'], job.get('next_run'))
+
+
+async def main(dispatcher_id: str) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    jobs = JobManager(get_redis())
+    print(f"Dispatcher {dispatcher_id} started")
+    metrics.process = dispatcher_id
+    flusher = asyncio.create_task(metrics.flush_forever(get_redis(), stop))
+    writer = asyncio.create_task(next_runs.flush_forever(stop))
+    try:
+        # Only take as many due runs as the fleet has browser slots for
+        await jobs.run_dispatcher(dispatch, stop, capacity=jobs.idle_slots)
+    finally:
+        stop.set()
+        await asyncio.gather(flusher, writer, return_exceptions=True)
+        await close_redis()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dropfarm schedule dispatcher")
+    parser.add_argument("--dispatcher-id", default=f"scheduler-{socket.gethostname()}-{os.getpid()}")
+    args = parser.parse_args()
+    asyncio.run(main(args.dispatcher_id))
@@ -0,0 +1,26 @@
+# app/schemas/routine.py
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+class RoutineBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+    lean_mode: bool = False
+
+class RoutineCreate(RoutineBase):
+    steps: List[Dict[str, Any]]
+
+class RoutineResponse(RoutineBase):
+    id: int
+    user_id: int
+    compiled_version: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class RoutineList(BaseModel):
+    items: List[RoutineResponse]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,52 @@
+# app/schemas/run.py
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, List
+
+class RunResponse(BaseModel):
+    id: int
+    run_id: str
+    attempt: int
+    schedule_id: Optional[int] = None
+    worker_id: Optional[str] = None
+    status: str
+    started_at: datetime
+    finished_at: datetime
+    duration: float
+    browser_startup: Optional[float] = None
+    steps_done: int
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class RunList(BaseModel):
+    items: List[RunResponse]
+    next_cursor: Optional[str] = None
+
+class RunStatsBucket(BaseModel):
+    bucket: datetime
+    runs: int
+    succeeded: int
+    p50_seconds: Optional[float] = None
+    p95_seconds: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+class StepStats(BaseModel):
+    step_index: int
+    step_type: Optional[str] = None
+    runs: int
+    failed: int
+    failure_rate: float
+    p50_seconds: Optional[float] = None  # run-weighted mean of hourly medians
+    p95_seconds: Optional[float] = None  # worst hourly p95
+
+class RoutineStats(BaseModel):
+    routine_id: int
+    since: datetime
+    runs: int
+    success_rate: Optional[float] = None
+    buckets: List[RunStatsBucket]
+    steps: List[StepStats]
@@ -1,7 +1,7 @@
 # app/schemas/schedule.py
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class ScheduleBase(BaseModel):
     routine_id: int
@@ -25,4 +25,32 @@ class ScheduleResponse(ScheduleBase):
         from_attributes = True
 
 class ScheduleInDB(ScheduleResponse):
-    pass
\ No newline at end of file
+    pass
+
+class ScheduleList(BaseModel):
+    items: List[ScheduleResponse]
+    next_cursor: Optional[str] = None
+
+class ScheduleBulkUpdateItem(ScheduleUpdate):
+    id: int
+
+class ScheduleBulkCreate(BaseModel):
+    items: List[ScheduleCreate]
+
+class ScheduleBulkUpdate(BaseModel):
+    items: List[ScheduleBulkUpdateItem]
+
+class ScheduleBulkDeactivate(BaseModel):
+    ids: List[int]
+
+class ScheduleBulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str
+    detail: Optional[str] = None
+    next_run: Optional[datetime] = None
+
+class ScheduleBulkResponse(BaseModel):
+    results: List[ScheduleBulkItemResult]
+    succeeded: int
+    failed: int
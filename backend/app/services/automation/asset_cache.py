@@ -0,0 +1,305 @@
+# app/services/automation/asset_cache.py
+"""
+Shared content-addressed cache of static assets across browser profiles
+filepath: backend/app/services/automation/asset_cache.py
+"""
+from playwright.async_api import Page, Route, Request, Error as PlaywrightError
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from app.core.config import settings
+
+CACHEABLE_TYPES = {'script', 'stylesheet', 'font', 'image'}
+
+# Response headers replayed on a cache hit; everything else is dropped
+_KEPT_HEADERS = ('content-type', 'cache-control', 'etag', 'last-modified', 'expires', 'access-control-allow-origin')
+
+# max-age only: s-maxage is for CDNs, and this cache is private to the host
+_MAX_AGE = re.compile(r'(?<![\w-])max-age=(\d+)')
+
+# Request headers a shared response may vary on. Entries are keyed by URL
+# alone, so only headers whose value never changes what is served qualify;
+# Origin and Accept do (CORS grants, image formats)
+_SAFE_VARY = {'accept-encoding'}
+
+# Requests carrying these may get a response meant for one user only
+_CREDENTIAL_HEADERS = ('cookie', 'authorization')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fresh_until REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals
+    SELECT 0, COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries);
+"""
+
+
+def freshness(headers: Dict[str, str], now: float) -> Optional[float]:
+    """Absolute expiry of a response, 0 if it must be revalidated, None if uncacheable."""
+    cache_control = headers.get('cache-control', '').lower()
+    if 'no-store' in cache_control or 'private' in cache_control:
+        return None
+    if 'set-cookie' in headers:
+        return None
+    vary = {token.strip().lower() for token in headers.get('vary', '').split(',')} - {''}
+    if not vary <= _SAFE_VARY:
+        return None
+    # A CORS grant to one origin must not be replayed to another
+    if headers.get('access-control-allow-origin', '*').strip() != '*':
+        return None
+    has_validator = 'etag' in headers or 'last-modified' in headers
+    if 'no-cache' in cache_control:
+        return 0.0 if has_validator else None
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return now + int(match.group(1))
+    if 'expires' in headers:
+        try:
+            return parsedate_to_datetime(headers['expires']).timestamp()
+        except (TypeError, ValueError):
+            return 0.0 if has_validator else None
+    return 0.0 if has_validator else None
+
+
+class AssetCache:
+    """Serves cacheable static responses to every profile from one store.
+
+    Bodies are stored once per content hash under `root/blobs`; a SQLite
+    index maps URLs to a body, its validators and its freshness, and is
+    shared by every process on the host. Only responses that are safe to
+    share are stored: no Set-Cookie, no `private`/`no-store`, no Vary
+    beyond Accept-Encoding, no CORS grant to a single origin, and never
+    the answer to a request that carried cookies or credentials. Cookies
+    and sessions stay in each user's own profile.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 2 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.join(self.root, 'blobs'), exist_ok=True)
+            self._db = sqlite3.connect(
+                os.path.join(self.root, 'index.sqlite3'), check_same_thread=False, timeout=30
+            )
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'blobs', digest[:2], digest)
+
+    # Blocking helpers, run via asyncio.to_thread
+
+    def _lookup(self, url: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        with self._lock:
+            row = self._conn().execute(
+                'SELECT digest, headers, etag, last_modified, fresh_until FROM entries WHERE url = ?',
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn().execute('UPDATE entries SET last_access = ? WHERE url = ?', (time.time(), url))
+            self._conn().commit()
+        digest, headers, etag, last_modified, fresh_until = row
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        entry = {
+            'headers': json.loads(headers),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh_until': fresh_until,
+        }
+        return entry, body
+
+    def _store(self, url: str, headers: Dict[str, str], body: bytes, fresh_until: float) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, path)
+        kept = {k: v for k, v in headers.items() if k in _KEPT_HEADERS}
+        with self._lock:
+            db = self._conn()
+            # Other processes share the index; keep the total consistent with it
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                replaced = db.execute('SELECT digest, size FROM entries WHERE url = ?', (url,)).fetchone()
+                added = 0 if self._blob_used(db, digest) else len(body)
+                db.execute(
+                    'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (url, digest, len(body), json.dumps(kept), headers.get('etag'),
+                     headers.get('last-modified'), fresh_until, time.time())
+                )
+                if replaced is not None and replaced[0] != digest:
+                    added -= self._drop_blob_if_unused(db, *replaced)
+                db.execute('UPDATE totals SET bytes = bytes + ?', (added,))
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+        self._evict()
+
+    def _refresh(self, url: str, fresh_until: float) -> None:
+        with self._lock:
+            self._conn().execute(
+                'UPDATE entries SET fresh_until = ?, last_access = ? WHERE url = ?',
+                (fresh_until, time.time(), url)
+            )
+            self._conn().commit()
+
+    @staticmethod
+    def _blob_used(db: sqlite3.Connection, digest: str) -> bool:
+        return db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (digest,)).fetchone() is not None
+
+    def _drop_blob_if_unused(self, db: sqlite3.Connection, digest: str, size: int) -> int:
+        """Bytes freed by removing a body no entry points at any more, else 0."""
+        if self._blob_used(db, digest):
+            return 0
+        try:
+            os.remove(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
+        return size
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the store fits max_bytes.
+
+        Sizes are counted per distinct body, since entries share blobs; the
+        running total lives in the index, so checking it is a single row read.
+        """
+        with self._lock:
+            db = self._conn()
+            total = db.execute('SELECT bytes FROM totals').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                total = db.execute('SELECT bytes FROM totals').fetchone()[0]
+                freed = 0
+                for url, digest, size in db.execute(
+                    'SELECT url, digest, size FROM entries ORDER BY last_access'
+                ).fetchall():
+                    if total - freed <= self.max_bytes * 0.9:
+                        break
+                    db.execute('DELETE FROM entries WHERE url = ?', (url,))
+                    freed += self._drop_blob_if_unused(db, digest, size)
+                db.execute('UPDATE totals SET bytes = bytes - ?', (freed,))
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+
+    # Route handler
+
+    def _cacheable(self, request: Request) -> bool:
+        return (
+            request.method == 'GET'
+            and request.resource_type in CACHEABLE_TYPES
+            and request.url.startswith(('http://', 'https://'))
+            and 'range' not in request.headers
+        )
+
+    async def _handle(self, route: Route, request: Request) -> None:
+        if not self._cacheable(request):
+            await route.fallback()
+            return
+        url = request.url
+        try:
+            cached = await asyncio.to_thread(self._lookup, url)
+            now = time.time()
+
+            if cached is not None and cached[0]['fresh_until'] > now:
+                entry, body = cached
+                self.hits += 1
+                self.bytes_served += len(body)
+                await route.fulfill(status=200, headers=entry['headers'], body=body)
+                return
+
+            headers = dict(request.headers)
+            if cached is not None:
+                entry, _ = cached
+                if entry['etag']:
+                    headers['if-none-match'] = entry['etag']
+                if entry['last_modified']:
+                    headers['if-modified-since'] = entry['last_modified']
+
+            response = await route.fetch(headers=headers)
+            if response.status == 304 and cached is not None:
+                entry, body = cached
+                self.revalidated += 1
+                self.bytes_served += len(body)
+                fresh_until = freshness(response.headers, now)
+                await asyncio.to_thread(self._refresh, url, fresh_until or 0.0)
+                await route.fulfill(status=200, headers=entry['headers'], body=body)
+                return
+
+            self.misses += 1
+            body = await response.body()
+            fresh_until = None
+            if response.status == 200:
+                sent = await request.all_headers()
+                if not any(name in sent for name in _CREDENTIAL_HEADERS):
+                    fresh_until = freshness(response.headers, now)
+            if fresh_until is not None:
+                await asyncio.to_thread(self._store, url, response.headers, body, fresh_until)
+            await route.fulfill(response=response, body=body)
+        except PlaywrightError:
+            # Let the browser load it itself; fails quietly if the page closed
+            try:
+                await route.fallback()
+            except PlaywrightError:
+                pass
+
+    async def install(self, page: Page) -> None:
+        await page.route('**/*', self._handle)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.revalidated) / lookups if lookups else 0.0,
+            'bytes_served': self.bytes_served,
+        }
+
+
+asset_cache = AssetCache(
+    os.path.join(settings.BROWSER_DATA_DIR, '_asset_cache'),
+    max_bytes=settings.ASSET_CACHE_MAX_BYTES,
+)
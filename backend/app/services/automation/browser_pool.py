@@ -0,0 +1,263 @@
+# app/services/automation/browser_pool.py
+"""
+Process-wide pool of warm persistent browser contexts
+filepath: backend/app/services/automation/browser_pool.py
+"""
+from playwright.async_api import async_playwright, Playwright, BrowserContext
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Any, Optional
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.metrics import metrics, BROWSER_LAUNCH_SECONDS
+
+
+class _PooledContext:
+    """A persistent context plus its borrow bookkeeping."""
+
+    def __init__(self, context: BrowserContext, launch_time: float):
+        self.context = context
+        self.launch_time = launch_time
+        self.borrowers = 0
+        self.last_used = time.monotonic()
+        self.closed = False
+        # Fires when the context is closed or its Chromium crashes
+        context.on('close', lambda _: setattr(self, 'closed', True))
+
+    def alive(self) -> bool:
+        if self.closed:
+            return False
+        browser = self.context.browser
+        return browser is None or browser.is_connected()
+
+
+class BrowserPool:
+    """Keeps one Playwright driver alive and a capped set of per-user contexts.
+
+    Chromium only allows one process per user-data-dir, so each profile maps
+    to exactly one context which may be borrowed by several callers at once.
+    When the pool is full, the least recently used idle context is closed to
+    make room; if every context is busy, borrowers wait for one to free up.
+    Contexts whose Chromium has gone away are dropped instead of handed out.
+    """
+
+    def __init__(
+        self,
+        max_contexts: int = 10,
+        headless: bool = False,
+        viewport: Optional[Dict[str, int]] = None,
+    ):
+        self.max_contexts = max_contexts
+        self.headless = headless
+        self.viewport = viewport or {'width': 1280, 'height': 720}
+        self._playwright: Optional[Playwright] = None
+        self._contexts: "OrderedDict[str, _PooledContext]" = OrderedDict()
+        self._launching: Dict[str, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+        self._freed = asyncio.Condition(self._lock)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._launches = 0
+        self._launch_seconds = 0.0
+
+    async def _driver(self) -> Playwright:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return self._playwright
+
+    async def _launch(self, user_data_dir: str) -> _PooledContext:
+        playwright = await self._driver()
+        started = time.perf_counter()
+        context = await playwright.chromium.launch_persistent_context(
+            user_data_dir=user_data_dir,
+            headless=self.headless,
+            viewport=self.viewport,
+        )
+        elapsed = time.perf_counter() - started
+        BROWSER_LAUNCH_SECONDS.observe(elapsed, source='pool')
+        self._launches += 1
+        self._launch_seconds += elapsed
+        return _PooledContext(context, elapsed)
+
+    def _idle_victim(self) -> Optional[str]:
+        """Least recently used context nobody is borrowing."""
+        for key, entry in self._contexts.items():
+            if entry.borrowers == 0:
+                return key
+        return None
+
+    async def acquire(self, user_data_dir: str) -> BrowserContext:
+        """Borrow the warm context for a profile, launching it if needed."""
+        while True:
+            async with self._lock:
+                entry = self._contexts.get(user_data_dir)
+                if entry is not None and not entry.alive():
+                    # Crashed or closed under us; whoever still borrows it will fail on their own
+                    self._contexts.pop(user_data_dir)
+                    self._evictions += 1
+                    self._freed.notify_all()
+                    entry = None
+                if entry is not None:
+                    entry.borrowers += 1
+                    entry.last_used = time.monotonic()
+                    self._contexts.move_to_end(user_data_dir)
+                    self._hits += 1
+                    return entry.context
+
+                pending = self._launching.get(user_data_dir)
+                if pending is None:
+                    victim = None
+                    if len(self._contexts) + len(self._launching) >= self.max_contexts:
+                        victim_key = self._idle_victim()
+                        if victim_key is None:
+                            await self._freed.wait()
+                            continue
+                        victim = self._contexts.pop(victim_key)
+                        self._evictions += 1
+                    pending = asyncio.get_running_loop().create_future()
+                    self._launching[user_data_dir] = pending
+                    self._misses += 1
+                    break
+
+            # Another caller is already launching this profile
+            try:
+                await asyncio.shield(pending)
+            except Exception:
+                pass
+
+        try:
+            if victim is not None:
+                await self._close_quietly(victim)
+            entry = await self._launch(user_data_dir)
+        except Exception as e:
+            async with self._lock:
+                self._launching.pop(user_data_dir, None)
+                pending.set_exception(e)
+                pending.exception()  # mark retrieved for waiters that gave up
+                self._freed.notify_all()
+            raise
+
+        async with self._lock:
+            self._launching.pop(user_data_dir, None)
+            entry.borrowers = 1
+            self._contexts[user_data_dir] = entry
+            pending.set_result(None)
+        return entry.context
+
+    async def release(self, user_data_dir: str) -> None:
+        """Return a borrowed context; it stays warm until evicted."""
+        async with self._lock:
+            entry = self._contexts.get(user_data_dir)
+            if entry is None:
+                return
+            entry.borrowers = max(0, entry.borrowers - 1)
+            entry.last_used = time.monotonic()
+            if entry.borrowers == 0:
+                self._freed.notify_all()
+
+    @asynccontextmanager
+    async def borrow(self, user_data_dir: str) -> AsyncIterator[BrowserContext]:
+        context = await self.acquire(user_data_dir)
+        try:
+            yield context
+        finally:
+            await self.release(user_data_dir)
+
+    async def discard(self, user_data_dir: str) -> bool:
+        """Close a profile's context now, unless someone is still borrowing it.
+
+        For handing a profile over to another process, which cannot open it
+        while this one has it open. Returns True once it is closed.
+        """
+        async with self._lock:
+            entry = self._contexts.get(user_data_dir)
+            if entry is not None and entry.borrowers:
+                return False
+            if entry is not None:
+                self._contexts.pop(user_data_dir)
+                self._freed.notify_all()
+        if entry is not None:
+            await self._close_quietly(entry)
+        return True
+
+    async def evict_idle(self, max_idle_seconds: float) -> int:
+        """Close contexts idle for longer than max_idle_seconds, and dead ones."""
+        now = time.monotonic()
+        async with self._lock:
+            stale = [
+                key for key, entry in self._contexts.items()
+                if not entry.alive()
+                or (entry.borrowers == 0 and now - entry.last_used > max_idle_seconds)
+            ]
+            victims = [self._contexts.pop(key) for key in stale]
+            self._evictions += len(victims)
+            if victims:
+                self._freed.notify_all()
+        for entry in victims:
+            await self._close_quietly(entry)
+        return len(victims)
+
+    async def run_maintenance(
+        self, interval: float, max_idle_seconds: float, stop: Optional[asyncio.Event] = None
+    ) -> None:
+        """Call evict_idle every `interval` seconds until `stop` is set."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                evicted = await self.evict_idle(max_idle_seconds)
+                if evicted:
+                    print(f"Browser pool closed {evicted} idle or dead contexts")
+            except Exception as e:
+                print(f"Error evicting browser contexts: {str(e)}")
+
+    async def _close_quietly(self, entry: _PooledContext) -> None:
+        try:
+            await entry.context.close()
+        except Exception as e:
+            # Already gone with its browser
+            print(f"Error closing browser context: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            'contexts': len(self._contexts),
+            'in_use': sum(1 for e in self._contexts.values() if e.borrowers),
+            'max_contexts': self.max_contexts,
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / lookups if lookups else 0.0,
+            'evictions': self._evictions,
+            'launches': self._launches,
+            'avg_launch_seconds': self._launch_seconds / self._launches if self._launches else 0.0,
+        }
+
+    async def close(self) -> None:
+        """Close every context and stop the shared driver."""
+        async with self._lock:
+            entries = list(self._contexts.values())
+            self._contexts.clear()
+        for entry in entries:
+            await self._close_quietly(entry)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+browser_pool = BrowserPool(
+    max_contexts=settings.BROWSER_POOL_SIZE,
+    headless=settings.BROWSER_HEADLESS,
+)
+
+metrics.gauge('dropfarm_browser_pool_contexts', 'Warm browser contexts open.',
+              lambda: browser_pool.stats()['contexts'])
+metrics.gauge('dropfarm_browser_pool_in_use', 'Warm browser contexts currently borrowed.',
+              lambda: browser_pool.stats()['in_use'])
+metrics.gauge('dropfarm_browser_pool_capacity', 'Maximum warm browser contexts.',
+              lambda: browser_pool.max_contexts)
@@ -0,0 +1,86 @@
+# app/services/automation/capture.py
+"""
+In-page event capture used while recording
+filepath: backend/app/services/automation/capture.py
+"""
+from datetime import datetime, timezone
+from playwright.async_api import Page, Response
+
+BINDING_NAME = '__dropfarmRecord'
+
+# Installed into every document of the recording page. Clicks are described
+# and buffered inside the page and handed to Python in batches through a
+# single binding call, instead of one round trip per click.
+CAPTURE_SCRIPT = """
+(() => {
+    if (window.__dropfarmCapture) return;
+    const BATCH_SIZE = 50;
+    const FLUSH_MS = 500;
+    let buffer = [];
+    let timer = null;
+
+    function describe(el) {
+        if (!(el instanceof Element)) return {};
+        const className = typeof el.className === 'string' ? el.className : '';
+        return {
+            id: el.id || '',
+            className: className.trim(),
+            innerText: (el.innerText || '').trim().slice(0, 200),
+            tag: el.tagName.toLowerCase()
+        };
+    }
+
+    function drain() {
+        clearTimeout(timer);
+        timer = null;
+        const batch = buffer;
+        buffer = [];
+        return batch;
+    }
+
+    function flush() {
+        const batch = drain();
+        if (batch.length && window.%(binding)s) {
+            window.%(binding)s(batch);
+        }
+    }
+
+    document.addEventListener('click', event => {
+        buffer.push({
+            type: 'click',
+            timestamp: new Date().toISOString(),
+            x: event.clientX,
+            y: event.clientY,
+            element: describe(event.target),
+            url: location.href
+        });
+        if (buffer.length >= BATCH_SIZE) {
+            flush();
+        } else if (timer === null) {
+            timer = setTimeout(flush, FLUSH_MS);
+        }
+    }, true);
+
+    // The binding message is sent synchronously, so it survives the unload
+    window.addEventListener('pagehide', flush);
+    window.__dropfarmCapture = { flush, drain };
+})();
+""" % {'binding': BINDING_NAME}
+
+# Returns clicks still buffered in the page when recording stops
+DRAIN_SCRIPT = "() => window.__dropfarmCapture ? window.__dropfarmCapture.drain() : []"
+
+
+def is_document_navigation(page: Page, response: Response) -> bool:
+    """True only for main-frame document navigations, not subresources."""
+    request = response.request
+    return (
+        request.resource_type == 'document'
+        and request.is_navigation_request()
+        and response.frame == page.main_frame
+    )
+
+
+def capture_timestamp() -> str:
+    """Now, formatted like the page's Date.toISOString() so the two sort together."""
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
@@ -0,0 +1,112 @@
+# app/services/automation/checkpoints.py
+"""
+Per-step playback checkpoints for resuming failed runs
+filepath: backend/app/services/automation/checkpoints.py
+"""
+from playwright.async_api import Page, Error as PlaywrightError
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from typing import Dict, Any, List, Optional
+import asyncio
+import hashlib
+import json
+import time
+
+from app.services.automation.progress import RUN_TTL_SECONDS
+
+CHECKPOINT_KEY = 'run:{}:checkpoints'
+MAX_CHECKPOINTS = 1000
+
+# What identifies a page state: its path, title and the ids of its controls.
+# Counters, ads and timestamps are deliberately left out.
+_FINGERPRINT_JS = """
+() => {
+    const ids = Array.from(
+        document.querySelectorAll('a[id], button[id], input[id], select[id], textarea[id], [role=button][id]'),
+        el => el.id
+    ).sort().slice(0, 200);
+    return [location.pathname, document.title, ids.join(',')].join('|');
+}
+"""
+
+
+async def page_fingerprint(page: Page) -> str:
+    raw = await page.evaluate(_FINGERPRINT_JS)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class CheckpointLog:
+    """Steps of one run that completed, with where the page was after each.
+
+    `plan_key` identifies the playback plan; checkpoints written against a
+    different plan (the routine was edited or recompiled) are ignored.
+    """
+
+    def __init__(self, redis: aioredis.Redis, run_id: str, plan_key: str):
+        self.redis = redis
+        self.key = CHECKPOINT_KEY.format(run_id)
+        self.plan_key = plan_key
+
+    async def record(self, index: int, page: Page) -> None:
+        """Checkpoint a completed step; a missed checkpoint only costs a longer retry."""
+        try:
+            checkpoint = json.dumps({
+                'index': index,
+                'url': page.url,
+                'fingerprint': await page_fingerprint(page),
+                'plan': self.plan_key,
+                'time': time.time(),
+            })
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.rpush(self.key, checkpoint)
+                pipe.ltrim(self.key, -MAX_CHECKPOINTS, -1)
+                pipe.expire(self.key, RUN_TTL_SECONDS)
+                await pipe.execute()
+        except (PlaywrightError, RedisError) as e:
+            print(f"Could not checkpoint step {index}: {str(e)}")
+
+    async def load(self) -> List[Dict[str, Any]]:
+        checkpoints = [json.loads(raw) for raw in await self.redis.lrange(self.key, 0, -1)]
+        return [c for c in checkpoints if c['plan'] == self.plan_key]
+
+    async def clear(self) -> None:
+        await self.redis.delete(self.key)
+
+    async def resume_point(self, page: Page, probes: int = 3, settle_timeout: float = 2.0) -> int:
+        """Index of the first step still to run, 0 if nothing can be skipped.
+
+        Starting from the newest, up to `probes` checkpointed URLs are
+        reopened; the latest checkpoint on that URL whose fingerprint the
+        page matches again is where the run picks up.
+        """
+        checkpoints = await self.load()
+        urls: List[str] = []
+        for checkpoint in reversed(checkpoints):
+            if checkpoint['url'] not in urls:
+                urls.append(checkpoint['url'])
+        for url in urls[:probes]:
+            wanted = {
+                c['fingerprint']: c['index'] for c in checkpoints if c['url'] == url
+            }
+            fingerprint = await self._settled_fingerprint(page, url, wanted, settle_timeout)
+            if fingerprint in wanted:
+                return wanted[fingerprint] + 1
+        return 0
+
+    async def _settled_fingerprint(
+        self, page: Page, url: str, wanted: Dict[str, int], timeout: float
+    ) -> Optional[str]:
+        """Open url and poll its fingerprint until it matches or time runs out."""
+        try:
+            await page.goto(url, wait_until='domcontentloaded')
+        except PlaywrightError:
+            return None
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fingerprint = await page_fingerprint(page)
+            except PlaywrightError:
+                fingerprint = None
+            if fingerprint in wanted or time.monotonic() >= deadline:
+                return fingerprint
+            await asyncio.sleep(0.2)
@@ -0,0 +1,144 @@
+# app/services/automation/compiler.py
+"""
+Compiles raw recordings into optimized playback plans
+filepath: backend/app/services/automation/compiler.py
+"""
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import re
+
+from app.services.automation.steps import class_selector, id_selector, step_hash
+
+COMPILER_VERSION = 2
+
+# Clicks on the same target closer together than this are one click
+DUPLICATE_CLICK_SECONDS = 0.3
+# Navigations closer together than this with no click between are redirects
+REDIRECT_SECONDS = 2.0
+# Recorded gaps above this are the user thinking, not the page loading
+MAX_WAIT_HINT = 10.0
+
+_BACKGROUND_TAGS = {'html', 'body'}
+
+
+def _timestamp(step: Dict[str, Any]) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(str(step['timestamp']).replace('Z', '+00:00')).timestamp()
+    except (KeyError, ValueError):
+        return None
+
+
+def best_locator(step: Dict[str, Any]) -> Dict[str, Any]:
+    """Pick the most reliable selector a click step offers."""
+    element = step.get('element') or {}
+    text = (element.get('innerText') or '').strip()
+    selector = id_selector(element)
+    if selector:
+        return {'strategy': 'id', 'selector': selector}
+    if text and len(text) <= 80 and '\n' not in text:
+        return {'strategy': 'text', 'selector': f"text={text}"}
+    selector = class_selector(element)
+    if selector:
+        return {'strategy': 'class', 'selector': selector}
+    return {'strategy': 'coords', 'selector': None}
+
+
+def _is_noop_click(step: Dict[str, Any]) -> bool:
+    """Clicks on the page background with nothing to identify them."""
+    element = step.get('element') or {}
+    return (
+        element.get('tag') in _BACKGROUND_TAGS
+        and not id_selector(element)
+        and not class_selector(element)
+        and not (element.get('innerText') or '').strip()
+    )
+
+
+def _canonical_steps(raw_steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop redundant steps, keeping the first of each duplicate group."""
+    result: List[Dict[str, Any]] = []
+    current_url: Optional[str] = None
+
+    for step in raw_steps:
+        kind = step.get('type')
+        previous = result[-1] if result else None
+
+        if kind == 'navigation':
+            if step.get('url') == current_url:
+                continue
+            # Redirect chains collapse into their final URL
+            if previous is not None and previous.get('type') == 'navigation':
+                gap = _gap(previous, step)
+                if gap is not None and gap <= REDIRECT_SECONDS:
+                    result[-1] = step
+                    current_url = step.get('url')
+                    continue
+            current_url = step.get('url')
+            result.append(step)
+
+        elif kind == 'click':
+            if _is_noop_click(step):
+                continue
+            if previous is not None and previous.get('type') == 'click':
+                gap = _gap(previous, step)
+                if (gap is not None and gap <= DUPLICATE_CLICK_SECONDS
+                        and step_hash({**previous, 'x': None, 'y': None})
+                        == step_hash({**step, 'x': None, 'y': None})):
+                    continue
+            result.append(step)
+
+        else:
+            result.append(step)
+
+    return result
+
+
+def _gap(first: Dict[str, Any], second: Dict[str, Any]) -> Optional[float]:
+    a, b = _timestamp(first), _timestamp(second)
+    if a is None or b is None:
+        return None
+    return max(0.0, b - a)
+
+
+def compile_routine(raw_steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn a raw recording into a shorter, annotated playback plan.
+
+    Each click gets a precomputed `locator`; each step gets a `wait_hint`
+    from the recorded gap to the next step, which the WaitEngine uses as
+    its timeout until real timings for that step are known.
+    """
+    steps = []
+    canonical = _canonical_steps(raw_steps)
+    for index, step in enumerate(canonical):
+        compiled = {k: v for k, v in step.items() if k != 'timestamp'}
+        compiled['source_hash'] = step_hash(step)
+        if step.get('type') == 'click':
+            compiled['locator'] = best_locator(step)
+        if index + 1 < len(canonical):
+            gap = _gap(step, canonical[index + 1])
+            if gap is not None:
+                compiled['wait_hint'] = round(min(gap, MAX_WAIT_HINT), 2)
+        steps.append(compiled)
+    return {'version': COMPILER_VERSION, 'steps': steps}
+
+
+def _signature(steps: List[Dict[str, Any]]) -> List[Any]:
+    return [
+        ('navigation', s.get('url')) if s.get('type') == 'navigation' else (s.get('type'), step_hash(s))
+        for s in steps
+    ]
+
+
+def plans_equivalent(raw_steps: List[Dict[str, Any]], compiled: Dict[str, Any]) -> bool:
+    """Check a stored plan still performs the same actions as its recording.
+
+    The plan must come from the current compiler version, perform the same
+    action sequence as a fresh compile, and only contain recorded steps.
+    """
+    if not compiled or compiled.get('version') != COMPILER_VERSION:
+        return False
+    plan_steps = compiled.get('steps') or []
+    if _signature(plan_steps) != _signature(compile_routine(raw_steps)['steps']):
+        return False
+    recorded = {step_hash(s) for s in raw_steps}
+    return all(s.get('source_hash') in recorded for s in plan_steps)
@@ -0,0 +1,32 @@
+# app/services/automation/jobs.py
+"""
+Redis queue of playback jobs consumed by app.worker
+filepath: backend/app/services/automation/jobs.py
+"""
+from redis import asyncio as aioredis
+from typing import Dict, Any
+import json
+import time
+import uuid
+
+from app.services.automation.progress import register_run
+
+QUEUE_KEY = 'playback:queue'
+PROCESSING_KEY = 'playback:processing:{}'
+# Workers that may own a processing list, so survivors can reclaim a dead one's
+PROCESSING_OWNERS_KEY = 'playback:processing_owners'
+
+
+async def enqueue_playback(redis: aioredis.Redis, routine_id: int, user_id: int, **extra: Any) -> str:
+    """Queue a routine for playback by a worker and return its run ID."""
+    run_id = uuid.uuid4().hex
+    job: Dict[str, Any] = {
+        'run_id': run_id,
+        'routine_id': routine_id,
+        'user_id': user_id,
+        'enqueued_at': time.time(),
+        **extra,
+    }
+    await register_run(redis, run_id, user_id)
+    await redis.lpush(QUEUE_KEY, json.dumps(job))
+    return run_id
@@ -0,0 +1,124 @@
+# app/services/automation/lean.py
+"""
+Resource-blocking lean playback mode
+filepath: backend/app/services/automation/lean.py
+"""
+from playwright.async_api import Page, Route, Request
+from typing import Dict, Any, Iterable, List, Optional, Set
+import fnmatch
+
+from app.core.config import settings
+
+# Rough transfer sizes for blocked requests whose real size was never seen
+ESTIMATED_BYTES = {
+    'image': 40_000,
+    'media': 500_000,
+    'font': 30_000,
+    'stylesheet': 20_000,
+    'script': 50_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+}
+_DEFAULT_ESTIMATE = 10_000
+
+# Resource types that can change what the DOM does, and so can be worth allowing
+FUNCTIONAL_TYPES = {'script', 'xhr', 'fetch', 'stylesheet'}
+
+
+def _url_key(url: str) -> str:
+    """URL without query string, so cache-busting parameters still match."""
+    return url.split('?', 1)[0].split('#', 1)[0]
+
+
+class ResourceFilter:
+    """Blocks configurable resource types and URL patterns on a page.
+
+    `profile` is what earlier verify runs learned for a routine: an `allow`
+    list of URLs that must load and the observed `sizes` of blockable ones.
+    With `observe_only`, nothing is blocked; blockable requests are just
+    recorded, which is how a learning run sees what a page really loads.
+    """
+
+    def __init__(
+        self,
+        blocked_types: Optional[Iterable[str]] = None,
+        blocked_patterns: Optional[Iterable[str]] = None,
+        profile: Optional[Dict[str, Any]] = None,
+        observe_only: bool = False,
+    ):
+        self.blocked_types: Set[str] = set(
+            settings.LEAN_BLOCKED_RESOURCE_TYPES if blocked_types is None else blocked_types
+        )
+        self.blocked_patterns: List[str] = list(
+            settings.LEAN_BLOCKED_URL_PATTERNS if blocked_patterns is None else blocked_patterns
+        )
+        profile = profile or {}
+        self.allow: Set[str] = set(profile.get('allow', []))
+        self.sizes: Dict[str, int] = dict(profile.get('sizes', {}))
+        self.observe_only = observe_only
+        self.blocked: Dict[str, str] = {}
+        self.observed: Dict[str, str] = {}
+        self._page: Optional[Page] = None
+
+    def is_blockable(self, request: Request) -> bool:
+        key = _url_key(request.url)
+        if key in self.allow or request.is_navigation_request():
+            return False
+        if request.resource_type in self.blocked_types:
+            return True
+        return any(fnmatch.fnmatch(request.url, pattern) for pattern in self.blocked_patterns)
+
+    async def _handle(self, route: Route, request: Request) -> None:
+        # fallback() rather than continue_() so other handlers, such as the
+        # shared asset cache, still see requests that are not blocked
+        if not self.is_blockable(request):
+            await route.fallback()
+            return
+        key = _url_key(request.url)
+        if self.observe_only:
+            self.observed[key] = request.resource_type
+            await route.fallback()
+        else:
+            self.blocked[key] = request.resource_type
+            await route.abort('blockedbyclient')
+
+    def _record_size(self, response) -> None:
+        key = _url_key(response.url)
+        if key in self.observed:
+            length = response.headers.get('content-length')
+            if length and length.isdigit():
+                self.sizes[key] = int(length)
+
+    async def install(self, page: Page) -> None:
+        self._page = page
+        await page.route('**/*', self._handle)
+        if self.observe_only:
+            page.on('response', self._record_size)
+
+    async def remove(self) -> None:
+        if self._page is None:
+            return
+        if not self._page.is_closed():
+            await self._page.unroute('**/*', self._handle)
+            if self.observe_only:
+                self._page.remove_listener('response', self._record_size)
+        self._page = None
+
+    def stats(self) -> Dict[str, Any]:
+        saved = sum(
+            self.sizes.get(key, ESTIMATED_BYTES.get(kind, _DEFAULT_ESTIMATE))
+            for key, kind in self.blocked.items()
+        )
+        return {'requests_blocked': len(self.blocked), 'bytes_saved': saved}
+
+    def learned_profile(self, failed_blocked: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Profile to store after a successful observe-only run.
+
+        Functional resources that a failed lean run had blocked, and that
+        this successful run loaded, go on the allowlist.
+        """
+        allow = set(self.allow)
+        for key, kind in (failed_blocked or {}).items():
+            if kind in FUNCTIONAL_TYPES and key in self.observed:
+                allow.add(key)
+        return {'allow': sorted(allow), 'sizes': self.sizes}
@@ -0,0 +1,166 @@
+# app/services/automation/locator_cache.py
+"""
+Shared cache of which locator strategy works for each playback step
+filepath: backend/app/services/automation/locator_cache.py
+"""
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import time
+
+from app.core.redis import get_redis
+from app.services.automation.steps import step_hash
+
+STRATEGY_ID = 'id'
+STRATEGY_TEXT = 'text'
+STRATEGY_CLASS = 'class'
+STRATEGY_COORDS = 'coords'
+
+# Tried in this order when nothing is known about a step
+DEFAULT_STRATEGIES = [STRATEGY_ID, STRATEGY_TEXT, STRATEGY_CLASS]
+
+STATS_KEY = 'locator:stats'
+
+
+class LocatorPlan:
+    def __init__(self, key: str, strategies: List[str], ordered: List[str], preferred: Optional[str], saved: float):
+        self.key = key
+        self.strategies = strategies
+        self.ordered = ordered
+        self.preferred = preferred
+        self.saved = saved
+
+
+class LocatorCache:
+    """Remembers the last working strategy per (routine, step) in Redis.
+
+    Strategies that failed are negatively cached for `negative_ttl` seconds
+    so they are skipped outright instead of burning their timeout again.
+    If Redis is unreachable the cache keeps working from process memory.
+    """
+
+    def __init__(
+        self,
+        redis: Optional[aioredis.Redis] = None,
+        ttl: int = 7 * 24 * 3600,
+        negative_ttl: int = 3600,
+        strategy_timeout: float = 5.0,
+        max_local: int = 10000,
+    ):
+        self._redis = redis
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.strategy_timeout = strategy_timeout
+        self.max_local = max_local
+        # Fallback for when Redis is down; bounded, least recently written first out
+        self._local: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = get_redis()
+        return self._redis
+
+    def _key(self, routine_id: Any, step: Dict[str, Any]) -> str:
+        return f"locator:{routine_id if routine_id is not None else '-'}:{step_hash(step)}"
+
+    def _local_get(self, key: str) -> Optional[str]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires < time.time():
+            del self._local[key]
+            return None
+        return value
+
+    async def _get_many(self, keys: List[str]) -> List[Optional[str]]:
+        try:
+            return await self.redis.mget(keys)
+        except RedisError:
+            return [self._local_get(k) for k in keys]
+
+    async def _set(self, key: str, value: str, ttl: int) -> None:
+        self._local[key] = (value, time.time() + ttl)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local:
+            self._local.popitem(last=False)
+        try:
+            await self.redis.set(key, value, ex=ttl)
+        except RedisError:
+            pass
+
+    async def plan(self, routine_id: Any, step: Dict[str, Any], strategies: List[str]) -> "LocatorPlan":
+        """Order the applicable strategies for a step.
+
+        The cached winner goes first and negatively cached strategies are
+        dropped; skipping them counts towards time saved.
+        """
+        key = self._key(routine_id, step)
+        values = await self._get_many([key] + [f"{key}:neg:{s}" for s in strategies])
+        preferred, negatives = values[0], values[1:]
+
+        ordered = [s for s, neg in zip(strategies, negatives) if not neg]
+        saved = (len(strategies) - len(ordered)) * self.strategy_timeout
+        if preferred in ordered:
+            ordered.remove(preferred)
+            ordered.insert(0, preferred)
+        return LocatorPlan(key, strategies, ordered, preferred, saved)
+
+    async def record(self, plan: "LocatorPlan", winner: str, failed: List[str]) -> None:
+        """Store the outcome of resolving a step."""
+        hit = plan.preferred is not None and plan.preferred == winner
+        saved = plan.saved
+        if hit:
+            self.hits += 1
+            # Strategies ahead of the winner that would have been tried were
+            # not; negatively cached ones are already counted in plan.saved
+            if winner in plan.strategies:
+                ahead = plan.strategies[:plan.strategies.index(winner)]
+                saved += sum(1 for s in ahead if s in plan.ordered) * self.strategy_timeout
+        else:
+            self.misses += 1
+        self.time_saved += saved
+
+        for strategy in failed:
+            await self._set(f"{plan.key}:neg:{strategy}", '1', self.negative_ttl)
+        if not hit:
+            await self._set(plan.key, winner, self.ttl)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hincrby(STATS_KEY, 'hits' if hit else 'misses', 1)
+                pipe.hincrbyfloat(STATS_KEY, 'time_saved_seconds', saved)
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    async def shared_stats(self) -> Dict[str, Any]:
+        """Counters summed over every worker sharing this Redis."""
+        try:
+            raw = await self.redis.hgetall(STATS_KEY)
+        except RedisError:
+            return self.stats()
+        hits = int(raw.get('hits', 0))
+        misses = int(raw.get('misses', 0))
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'time_saved_seconds': float(raw.get('time_saved_seconds', 0.0)),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'time_saved_seconds': self.time_saved,
+        }
+
+
+locator_cache = LocatorCache()
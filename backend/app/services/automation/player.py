@@ -1,154 +1,447 @@
 # app/services/automation/player.py
-from playwright.async_api import async_playwright, Browser, Page
-from typing import List, Dict, Any, Optional
+from playwright.async_api import async_playwright, BrowserContext, Page, Playwright, Error as PlaywrightError
+from typing import Awaitable, Callable, Iterable, List, Dict, Any, Optional
 import json
 import os
 import asyncio
-from datetime import datetime
+import time
+
+from app.core.config import settings
+from app.core.metrics import BROWSER_LAUNCH_SECONDS, STEP_SECONDS
+from app.services.automation.asset_cache import asset_cache
+from app.services.automation.browser_pool import BrowserPool
+from app.services.automation.checkpoints import CheckpointLog
+from app.services.automation.compiler import plans_equivalent
+from app.services.automation.capture import (
+    BINDING_NAME, CAPTURE_SCRIPT, DRAIN_SCRIPT, capture_timestamp, is_document_navigation
+)
+from app.services.automation.lean import ResourceFilter
+from app.services.automation.profiles import profile_manager
+from app.services.automation.locator_cache import (
+    LocatorCache, locator_cache, DEFAULT_STRATEGIES, STRATEGY_ID, STRATEGY_TEXT, STRATEGY_CLASS, STRATEGY_COORDS
+)
+from app.services.automation.steps import class_selector, id_selector, lookahead, step_key
+from app.services.automation.waits import WaitEngine
+
+# Whether a real element, not just the page background, is at viewport (x, y)
+_ELEMENT_AT_POINT_JS = """
+([x, y]) => {
+    const el = document.elementFromPoint(x, y);
+    return !!el && el !== document.body && el !== document.documentElement;
+}
+"""
 
 class AutomationService:
-    def __init__(self, user_data_dir: str):
+    def __init__(self, user_data_dir: str, pool: Optional[BrowserPool] = None):
         self.user_data_dir = user_data_dir
+        self.pool = pool
         self.recording: List[Dict[str, Any]] = []
         self.is_recording = False
-        self._browser: Optional[Browser] = None
+        self._sink: Optional[Any] = None
+        self._held_navigations: List[Dict[str, Any]] = []
+        self._listeners: List[Any] = []
+        self._capture_installed = False
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[BrowserContext] = None
         self._page: Optional[Page] = None
+        self.waits = WaitEngine()
+        self.locators: LocatorCache = locator_cache
 
     async def start_browser(self) -> None:
-        """Start browser with persistent context for Telegram session."""
-        playwright = await async_playwright().start()
-        self._browser = await playwright.chromium.launch_persistent_context(
-            user_data_dir=self.user_data_dir,
-            headless=False,  # Set to True for production headless mode
-            viewport={'width': 1280, 'height': 720}
-        )
+        """Start browser with persistent context for Telegram session.
+
+        With a pool the warm context for this profile is borrowed instead of
+        launching a new Chromium; only a fresh page is opened on it.
+        New users get a profile cloned from the pre-warmed template.
+        """
+        await profile_manager.ensure(self.user_data_dir)
+        if self.pool is not None:
+            self._browser = await self.pool.acquire(self.user_data_dir)
+        else:
+            self._playwright = await async_playwright().start()
+            started = time.perf_counter()
+            self._browser = await self._playwright.chromium.launch_persistent_context(
+                user_data_dir=self.user_data_dir,
+                headless=settings.BROWSER_HEADLESS,
+                viewport={'width': 1280, 'height': 720}
+            )
+            BROWSER_LAUNCH_SECONDS.observe(time.perf_counter() - started, source='direct')
         self._page = await self._browser.new_page()
+        if settings.ASSET_CACHE_ENABLED:
+            await asset_cache.install(self._page)
+
+    def _record(self, event: Dict[str, Any]) -> None:
+        """Send a captured event to the sink, or keep it in self.recording."""
+        if self._sink is not None:
+            self._sink.append(event)
+        else:
+            self.recording.append(event)
+
+    def _release_navigations(self, before: Optional[str] = None) -> None:
+        """Record held navigations that happened before `before`, or all of them."""
+        while self._held_navigations and (
+            before is None or self._held_navigations[0]['timestamp'] <= before
+        ):
+            self._record(self._held_navigations.pop(0))
+
+    async def start_recording(self, sink: Optional[Any] = None) -> None:
+        """Start recording user interactions.
 
-    async def start_recording(self) -> None:
-        """Start recording user interactions."""
+        `sink` is any object with an `append(event)` method, such as a
+        RecordingStream; without one, events accumulate in self.recording.
+        """
         if not self._page:
             raise RuntimeError("Browser not started")
         
         self.recording = []
+        self._sink = sink
+        self._held_navigations = []
         self.is_recording = True
         
-        # Setup event listeners
-        async def handle_click(event):
+        # Clicks are captured and batched inside the page
+        def handle_batch(source, batch):
             if not self.is_recording:
                 return
-            
-            element = await self._page.evaluate("""
-                (element) => {
-                    return {
-                        selector: element.id || element.className,
-                        innerText: element.innerText,
-                        tag: element.tagName.toLowerCase()
-                    }
-                }
-            """, event)
-            
-            self.recording.append({
-                'type': 'click',
-                'timestamp': datetime.now().isoformat(),
-                'x': event['x'],
-                'y': event['y'],
-                'element': element,
-                'url': self._page.url
-            })
+            for event in batch:
+                self._release_navigations(before=event['timestamp'])
+                self._record(event)
 
-        async def handle_navigation(response):
-            if not self.is_recording:
+        # A click that navigates is still buffered in the page when the new
+        # document's response arrives, so navigations are held back until
+        # the clicks before them have been handed over
+        def handle_navigation(response):
+            if not self.is_recording or not is_document_navigation(self._page, response):
                 return
             
-            self.recording.append({
+            self._held_navigations.append({
                 'type': 'navigation',
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': capture_timestamp(),
                 'url': response.url,
                 'status': response.status
             })
 
         # Register event listeners
-        await self._page.evaluate("""
-            window.addEventListener('click', event => {
-                window.__recordClick(event);
-            });
-        """)
+        if not self._capture_installed:
+            await self._page.expose_binding(BINDING_NAME, handle_batch)
+            await self._page.add_init_script(CAPTURE_SCRIPT)
+            self._capture_installed = True
+        await self._page.evaluate(CAPTURE_SCRIPT)
         
-        self._page.on('click', handle_click)
-        self._page.on('response', handle_navigation)
+        self._listeners = [('response', handle_navigation)]
+        for event, handler in self._listeners:
+            self._page.on(event, handler)
 
     async def stop_recording(self) -> List[Dict[str, Any]]:
         """Stop recording and return the recorded steps."""
+        if self._page and self.is_recording:
+            try:
+                for event in await self._page.evaluate(DRAIN_SCRIPT):
+                    self._release_navigations(before=event['timestamp'])
+                    self._record(event)
+            except Exception as e:
+                print(f"Could not drain captured clicks: {str(e)}")
+        self._release_navigations()
         self.is_recording = False
+        if self._page:
+            for event, handler in self._listeners:
+                self._page.remove_listener(event, handler)
+        self._listeners = []
+        self._sink = None
         return self.recording
 
-    async def verify_routine(self, routine: List[Dict[str, Any]]) -> bool:
-        """Verify a recorded routine can be played back."""
+    async def verify_routine(
+        self,
+        routine: List[Dict[str, Any]],
+        compiled: Optional[Dict[str, Any]] = None,
+        resource_filter: Optional[ResourceFilter] = None,
+        fast: bool = False,
+    ) -> bool:
+        """Verify a recorded routine can be played back.
+
+        With a compiled plan, the plan must be equivalent to the recording
+        and is what gets played back. `fast` only checks that every step's
+        page loads and its target can be located; see verify_structure.
+        """
+        if compiled is not None:
+            if not plans_equivalent(routine, compiled):
+                print("Verification failed: compiled plan does not match recording")
+                return False
+            routine = compiled['steps']
+        if fast:
+            report = await self.verify_structure(routine)
+            if not report['valid']:
+                print(f"Verification failed: steps {report['failed']} cannot be located")
+            return report['valid']
         try:
-            await self.playback_routine(routine, verify_mode=True)
+            await self.playback_routine(routine, verify_mode=True, resource_filter=resource_filter)
             return True
         except Exception as e:
             print(f"Verification failed: {str(e)}")
             return False
 
-    async def playback_routine(self, routine: List[Dict[str, Any]], verify_mode: bool = False) -> None:
-        """Play back a recorded routine."""
+    async def resume_point(self, checkpoints: CheckpointLog) -> int:
+        """First step a retry needs to run, restoring the page to match."""
+        if not self._page:
+            raise RuntimeError("Browser not started")
+        return await checkpoints.resume_point(self._page)
+
+    async def verify_structure(
+        self,
+        routine: Iterable[Dict[str, Any]],
+        max_pages: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Check each step's target can be located, without clicking anything.
+
+        Every distinct URL in the routine is opened once, on up to
+        `max_pages` pages of the context at a time, and all clicks recorded
+        on it are located there concurrently. Each step is reported as `ok`
+        (with the strategy that found it), `coords` (only its recorded
+        coordinates hit an element) or `failed`. Targets that only appear
+        after earlier clicks on the same page report as `coords` or `failed`.
+        """
+        if not self._browser:
+            raise RuntimeError("Browser not started")
+        max_pages = max_pages or settings.VERIFY_MAX_PAGES
+        timeout = timeout or settings.VERIFY_LOCATOR_TIMEOUT
+
+        by_url: Dict[str, List[Any]] = {}
+        for index, step in enumerate(routine):
+            if step.get('url'):
+                by_url.setdefault(step['url'], []).append((index, step))
+
+        slots = asyncio.Semaphore(max_pages)
+
+        async def check(url, steps):
+            async with slots:
+                return await self._check_page(url, steps, timeout)
+
+        pages = await asyncio.gather(*(check(url, steps) for url, steps in by_url.items()))
+        results = sorted((r for page in pages for r in page), key=lambda r: r['index'])
+        failed = [r['index'] for r in results if r['status'] == 'failed']
+        return {
+            'valid': not failed,
+            'pages': len(by_url),
+            'coords': [r['index'] for r in results if r['status'] == 'coords'],
+            'failed': failed,
+            'steps': results,
+        }
+
+    async def _check_page(self, url: str, steps: List[Any], timeout: float) -> List[Dict[str, Any]]:
+        page = await self._browser.new_page()
+        try:
+            if settings.ASSET_CACHE_ENABLED:
+                await asset_cache.install(page)
+            try:
+                await page.goto(url, wait_until='domcontentloaded')
+            except PlaywrightError as e:
+                return [
+                    {'index': i, 'type': s.get('type'), 'status': 'failed', 'strategy': None, 'error': str(e)}
+                    for i, s in steps
+                ]
+            return list(await asyncio.gather(
+                *(self._locate(page, index, step, timeout) for index, step in steps)
+            ))
+        finally:
+            await page.close()
+
+    async def _locate(self, page: Page, index: int, step: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        result = {'index': index, 'type': step.get('type'), 'status': 'ok', 'strategy': None, 'error': None}
+        if step.get('type') != 'click':
+            return result
+        # Race every strategy, then take the most preferred one that matched
+        strategies = self._strategies_for(step)
+        found = await asyncio.gather(*(
+            page.wait_for_selector(self._selector_for(step, s), state='attached', timeout=timeout * 1000)
+            for s in strategies
+        ), return_exceptions=True)
+        for strategy, element in zip(strategies, found):
+            if element is not None and not isinstance(element, BaseException):
+                result['strategy'] = strategy
+                return result
+        try:
+            hit = await page.evaluate(_ELEMENT_AT_POINT_JS, [step.get('x', 0), step.get('y', 0)])
+        except PlaywrightError as e:
+            hit, result['error'] = False, str(e)
+        result['status'] = 'coords' if hit else 'failed'
+        result['strategy'] = STRATEGY_COORDS if hit else None
+        return result
+
+    def _selector_for(self, step: Dict[str, Any], strategy: str) -> Optional[str]:
+        element_info = step.get('element') or {}
+        if strategy == STRATEGY_ID:
+            return id_selector(element_info)
+        if strategy == STRATEGY_CLASS:
+            return class_selector(element_info)
+        if strategy == STRATEGY_TEXT and element_info.get('innerText'):
+            return f"text={element_info['innerText']}"
+        return None
+
+    def _strategies_for(self, step: Dict[str, Any]) -> List[str]:
+        strategies = [s for s in DEFAULT_STRATEGIES if self._selector_for(step, s)]
+        # Compiled plans carry the best strategy; try it before the defaults
+        compiled_strategy = (step.get('locator') or {}).get('strategy')
+        if compiled_strategy in strategies:
+            strategies.remove(compiled_strategy)
+            strategies.insert(0, compiled_strategy)
+        return strategies
+
+    async def _find_element(self, step: Dict[str, Any], routine_id: Optional[Any] = None):
+        """Find a click target, trying the strategy that last worked first.
+
+        Returns the element and the strategy that found it; the element is
+        None when only coordinates are left.
+        """
+        strategies = self._strategies_for(step)
+        plan = await self.locators.plan(routine_id, step, strategies)
+        failed = []
+        for strategy in plan.ordered:
+            try:
+                element = await self._page.wait_for_selector(
+                    self._selector_for(step, strategy),
+                    timeout=self.locators.strategy_timeout * 1000
+                )
+            except Exception:
+                element = None
+            if element:
+                await self.locators.record(plan, strategy, failed)
+                return element, strategy
+            failed.append(strategy)
+        await self.locators.record(plan, STRATEGY_COORDS, failed)
+        return None, STRATEGY_COORDS
+
+    async def playback_routine(
+        self,
+        routine: Iterable[Dict[str, Any]],
+        verify_mode: bool = False,
+        routine_id: Optional[Any] = None,
+        fixed_waits: Optional[bool] = None,
+        on_step: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        resource_filter: Optional[ResourceFilter] = None,
+        checkpoints: Optional[CheckpointLog] = None,
+        start_at: int = 0,
+    ) -> None:
+        """Play back a recorded routine.
+
+        By default each step waits only for the condition the WaitEngine
+        picks for it. `fixed_waits` (or settings.PLAYBACK_FIXED_WAITS)
+        restores the old networkidle-plus-one-second behaviour.
+
+        `routine_id` scopes the locator and wait timings learned per step;
+        routines sharing a plan can pass a common key (see plan_scope).
+
+        `on_step` is awaited after every step with its index, type, locator
+        strategy, recorded URL, duration and error, if any.
+
+        Steps are consumed one at a time, so encoded routines are decoded as
+        playback goes rather than up front.
+
+        A `resource_filter` is installed on the page for the duration of the
+        run, e.g. to block images and trackers in lean mode.
+
+        With `checkpoints`, each successful step is checkpointed and the
+        first failing step raises, so a retry can resume from `start_at`
+        (see resume_point) instead of step 0. Steps before `start_at` are
+        skipped.
+        """
         if not self._page:
             raise RuntimeError("Browser not started")
+        if fixed_waits is None:
+            fixed_waits = settings.PLAYBACK_FIXED_WAITS
 
-        for step in routine:
+        if resource_filter is not None:
+            await resource_filter.install(self._page)
+            try:
+                await self.playback_routine(
+                    routine, verify_mode, routine_id, fixed_waits, on_step,
+                    checkpoints=checkpoints, start_at=start_at,
+                )
+            finally:
+                await resource_filter.remove()
+            return
+
+        total = len(routine) if hasattr(routine, '__len__') else None
+        for index, step, next_step in lookahead(routine):
+            if index < start_at:
+                continue
+            started = time.perf_counter()
+            strategy = None
+            error = None
             try:
                 if step['type'] == 'click':
-                    # Wait for navigation or network idle if this is a critical click
-                    await self._page.wait_for_load_state('networkidle')
-                    
-                    # Try to find element by multiple strategies
-                    element = None
-                    if 'element' in step:
-                        try:
-                            # Try by ID
-                            if step['element'].get('selector'):
-                                element = await self._page.wait_for_selector(
-                                    f"#{step['element']['selector']}", 
-                                    timeout=5000
-                                )
-                            # Try by text content
-                            if not element and step['element'].get('innerText'):
-                                element = await self._page.wait_for_selector(
-                                    f"text={step['element']['innerText']}", 
-                                    timeout=5000
-                                )
-                        except:
-                            pass
-
-                    # Fallback to coordinates if element not found
-                    if element:
-                        await element.click()
+                    if fixed_waits:
+                        # Wait for navigation or network idle if this is a critical click
+                        await self._page.wait_for_load_state('networkidle')
+
+                    element, strategy = await self._find_element(step, routine_id)
+
+                    async def click():
+                        # Fallback to coordinates if element not found
+                        if element:
+                            await element.click()
+                        else:
+                            await self._page.mouse.click(step['x'], step['y'])
+
+                    if fixed_waits:
+                        await click()
+                        await asyncio.sleep(1)
                     else:
-                        await self._page.mouse.click(step['x'], step['y'])
-                    
-                    # Add wait time after click (configurable)
-                    await asyncio.sleep(1)
+                        plan = self.waits.plan(step, next_step, step_key(routine_id, step))
+                        await self.waits.run(self._page, plan, click)
 
                 elif step['type'] == 'navigation':
-                    await self._page.wait_for_load_state('networkidle')
+                    if fixed_waits:
+                        await self._page.wait_for_load_state('networkidle')
                     
                     # If URL doesn't match, try to navigate
                     if self._page.url != step['url']:
-                        await self._page.goto(step['url'])
+                        if fixed_waits:
+                            await self._page.goto(step['url'])
+                        else:
+                            await self._page.goto(step['url'], wait_until='domcontentloaded')
 
                 # Handle special cases like waiting for video
                 if 'wait_time' in step:
                     await asyncio.sleep(step['wait_time'])
 
+                if checkpoints is not None:
+                    await checkpoints.record(index, self._page)
+
             except Exception as e:
-                if verify_mode:
+                error = str(e)
+                if verify_mode or checkpoints is not None:
                     raise
                 print(f"Error during playback: {str(e)}")
+            finally:
+                duration = time.perf_counter() - started
+                STEP_SECONDS.observe(duration, type=step.get('type'), strategy=strategy)
+                if on_step is not None:
+                    await on_step({
+                        'index': index,
+                        'total': total,
+                        'type': step.get('type'),
+                        'strategy': strategy,
+                        'url': step.get('url'),
+                        'duration': duration,
+                        'error': error,
+                    })
 
     async def close(self) -> None:
-        """Close the browser and cleanup."""
-        if self._browser:
+        """Close the browser and cleanup.
+
+        Pooled contexts are only handed back to the pool, not closed.
+        """
+        if not self._browser:
+            return
+        if self.pool is not None:
+            if self._page and not self._page.is_closed():
+                await self._page.close()
+            await self.pool.release(self.user_data_dir)
+        else:
             await self._browser.close()
-            self._browser = None
-            self._page = None
\ No newline at end of file
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+        self._browser = None
+        self._page = None
+        self._capture_installed = False
\ No newline at end of file
@@ -0,0 +1,84 @@
+# app/services/automation/profile_lease.py
+"""
+Renewable Redis leases on user browser profiles
+filepath: backend/app/services/automation/profile_lease.py
+"""
+from redis import asyncio as aioredis
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+import asyncio
+
+LEASE_KEY = 'lease:profile:{}'
+
+# Only the holder may extend or drop its lease
+_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseUnavailable(Exception):
+    """Another worker holds the profile."""
+
+
+class ProfileLease:
+    """Exclusive, expiring claim on one user's browser_data directory.
+
+    Chromium cannot open the same user-data-dir twice, so a worker must hold
+    this lease for as long as it has the profile open. The lease expires on
+    its own if the worker dies.
+    """
+
+    def __init__(self, redis: aioredis.Redis, user_id: int, owner: str, ttl: int = 60):
+        self.redis = redis
+        self.key = LEASE_KEY.format(user_id)
+        self.owner = owner
+        self.ttl = ttl
+        self._renew = redis.register_script(_RENEW_LUA)
+        self._release = redis.register_script(_RELEASE_LUA)
+
+    async def acquire(self) -> bool:
+        return bool(await self.redis.set(self.key, self.owner, nx=True, ex=self.ttl))
+
+    async def renew(self) -> bool:
+        return bool(await self._renew(keys=[self.key], args=[self.owner, self.ttl * 1000]))
+
+    async def release(self) -> None:
+        await self._release(keys=[self.key], args=[self.owner])
+
+    def start_renewing(self, on_lost: Callable[[], None]) -> asyncio.Task:
+        """Renew in the background; call `on_lost` if the lease slips away."""
+        async def keep_alive():
+            while True:
+                await asyncio.sleep(self.ttl / 3)
+                if not await self.renew():
+                    print(f"Lost profile lease {self.key}")
+                    on_lost()
+                    return
+
+        return asyncio.create_task(keep_alive())
+
+    @asynccontextmanager
+    async def hold(self) -> AsyncIterator["ProfileLease"]:
+        """Hold the lease, renewing it in the background.
+
+        If a renewal finds the lease lost, the task using the profile is
+        cancelled rather than carrying on alongside another holder.
+        """
+        if not await self.acquire():
+            raise LeaseUnavailable(self.key)
+        renewer = self.start_renewing(asyncio.current_task().cancel)
+        try:
+            yield self
+        finally:
+            renewer.cancel()
+            await self.release()
@@ -0,0 +1,223 @@
+# app/services/automation/profiles.py
+"""
+Provisioning, pruning and disk accounting of user browser profiles
+filepath: backend/app/services/automation/profiles.py
+"""
+from playwright.async_api import async_playwright
+from typing import Dict, Optional
+import asyncio
+import fcntl
+import os
+import shutil
+import socket
+import time
+
+from app.core.config import settings
+
+TEMPLATE_NAME = '_template'
+
+# Linux ioctl that makes dst share src's extents copy-on-write (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+# Regenerable caches Chromium keeps inside a profile
+CACHE_DIRS = (
+    'Default/Cache',
+    'Default/Code Cache',
+    'Default/GPUCache',
+    'Default/DawnCache',
+    'Default/Service Worker/CacheStorage',
+    'Default/Service Worker/ScriptCache',
+    'GrShaderCache',
+    'GraphiteDawnCache',
+    'ShaderCache',
+)
+
+# Present in a user-data-dir while a Chromium process has it open; a
+# symlink to "<hostname>-<pid>" of that process, left behind if it crashes
+LOCK_FILE = 'SingletonLock'
+
+# Held, under the profiles root, by whichever process is provisioning
+PROVISION_LOCK = '.provision.lock'
+
+
+def _clone_file(src: str, dst: str) -> bool:
+    """Copy one file, as a reflink when the filesystem allows it.
+
+    Hardlinks are deliberately not used: Chromium rewrites its SQLite and
+    LevelDB files in place, which would corrupt the template and every
+    other profile sharing the inode. Returns True if the file was reflinked.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            reflinked = True
+        except OSError:
+            shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+            reflinked = False
+    shutil.copystat(src, dst)
+    return reflinked
+
+
+def dir_size(path: str) -> int:
+    """Bytes allocated on disk under path."""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_blocks * 512
+            except FileNotFoundError:
+                pass
+    return total
+
+
+class ProfileManager:
+    """Creates user profiles from a pre-warmed template and keeps them lean.
+
+    A fresh Chromium profile costs a full first-run initialisation; cloning
+    the template skips it. Cache directories are pruned periodically from
+    profiles that are not open.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.template_dir = os.path.join(root, TEMPLATE_NAME)
+        self.reflinked_files = 0
+        self.copied_files = 0
+        self._lock = asyncio.Lock()
+
+    def is_in_use(self, user_data_dir: str) -> bool:
+        """Whether a live Chromium has the profile open.
+
+        A lock left by a crashed process on this host does not count. Locks
+        that cannot be read, or that belong to another host sharing the
+        directory, are assumed live.
+        """
+        try:
+            owner = os.readlink(os.path.join(user_data_dir, LOCK_FILE))
+        except FileNotFoundError:
+            return False
+        except OSError:
+            return os.path.lexists(os.path.join(user_data_dir, LOCK_FILE))
+        host, _, pid = owner.rpartition('-')
+        if host != socket.gethostname() or not pid.isdigit():
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    async def build_template(self) -> str:
+        """Launch Chromium once on an empty dir and keep the result as template."""
+        staging = f"{self.template_dir}.building"
+        shutil.rmtree(staging, ignore_errors=True)
+        async with async_playwright() as playwright:
+            context = await playwright.chromium.launch_persistent_context(
+                user_data_dir=staging, headless=True
+            )
+            page = await context.new_page()
+            await page.goto('about:blank')
+            await context.close()
+        self._prune(staging)
+        shutil.rmtree(self.template_dir, ignore_errors=True)
+        os.replace(staging, self.template_dir)
+        return self.template_dir
+
+    def _clone_template(self, user_data_dir: str) -> None:
+        staging = f"{user_data_dir}.provisioning"
+        shutil.rmtree(staging, ignore_errors=True)
+        for root, dirs, files in os.walk(self.template_dir):
+            target = os.path.join(staging, os.path.relpath(root, self.template_dir))
+            os.makedirs(target, exist_ok=True)
+            for name in files:
+                if name == LOCK_FILE:
+                    continue
+                if _clone_file(os.path.join(root, name), os.path.join(target, name)):
+                    self.reflinked_files += 1
+                else:
+                    self.copied_files += 1
+        os.replace(staging, user_data_dir)
+
+    def _lock_provisioning(self) -> int:
+        """Block until this host's provisioning lock is ours; returns its fd."""
+        os.makedirs(self.root, exist_ok=True)
+        fd = os.open(os.path.join(self.root, PROVISION_LOCK), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    async def ensure(self, user_data_dir: str) -> str:
+        """Make sure a profile exists, cloning the template for new users.
+
+        Provisioning is serialised across every process on the host by a
+        file lock, so the template is built once and no two processes
+        stage the same profile.
+        """
+        if os.path.isdir(user_data_dir):
+            return user_data_dir
+        async with self._lock:
+            fd = await asyncio.to_thread(self._lock_provisioning)
+            try:
+                if os.path.isdir(user_data_dir):
+                    return user_data_dir
+                if not os.path.isdir(self.template_dir):
+                    await self.build_template()
+                await asyncio.to_thread(self._clone_template, user_data_dir)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+        return user_data_dir
+
+    def _prune(self, user_data_dir: str) -> int:
+        freed = 0
+        for relative in CACHE_DIRS:
+            path = os.path.join(user_data_dir, relative)
+            if os.path.isdir(path):
+                freed += dir_size(path)
+                shutil.rmtree(path, ignore_errors=True)
+        return freed
+
+    def profiles(self) -> Dict[str, str]:
+        if not os.path.isdir(self.root):
+            return {}
+        return {
+            entry.name: entry.path
+            for entry in os.scandir(self.root)
+            if entry.is_dir() and entry.name.isdigit()
+        }
+
+    def prune_caches(self) -> Dict[str, int]:
+        """Drop cache directories from every profile that is not open."""
+        freed = {}
+        for name, path in self.profiles().items():
+            if not self.is_in_use(path):
+                freed[name] = self._prune(path)
+        return freed
+
+    def disk_usage(self, user_data_dir: Optional[str] = None) -> Dict[str, int]:
+        if user_data_dir is not None:
+            return {os.path.basename(user_data_dir): dir_size(user_data_dir)}
+        return {name: dir_size(path) for name, path in self.profiles().items()}
+
+    async def run_maintenance(self, interval: float, stop: Optional[asyncio.Event] = None) -> None:
+        """Prune caches every `interval` seconds until `stop` is set."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            started = time.perf_counter()
+            freed = await asyncio.to_thread(self.prune_caches)
+            print(
+                f"Pruned {sum(freed.values()) / 1024 ** 2:.1f} MB from {len(freed)} profiles "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+profile_manager = ProfileManager(settings.BROWSER_DATA_DIR)
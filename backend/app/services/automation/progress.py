@@ -0,0 +1,101 @@
+# app/services/automation/progress.py
+"""
+Per-step playback progress over Redis pub/sub
+filepath: backend/app/services/automation/progress.py
+"""
+from redis import asyncio as aioredis
+from typing import AsyncIterator, Dict, Any, Optional
+import json
+import time
+
+CHANNEL_KEY = 'run:{}:events'
+LOG_KEY = 'run:{}:log'
+OWNER_KEY = 'run:{}:owner'
+
+# Runs and their event logs are kept around this long for late viewers
+RUN_TTL_SECONDS = 24 * 3600
+MAX_LOGGED_EVENTS = 1000
+
+TERMINAL_EVENTS = {'finished', 'failed'}
+
+
+async def register_run(redis: aioredis.Redis, run_id: str, user_id: int) -> None:
+    await redis.set(OWNER_KEY.format(run_id), user_id, ex=RUN_TTL_SECONDS)
+
+
+async def run_owner(redis: aioredis.Redis, run_id: str) -> Optional[int]:
+    owner = await redis.get(OWNER_KEY.format(run_id))
+    return int(owner) if owner is not None else None
+
+
+class ProgressPublisher:
+    """Publishes a run's events and keeps a short replay log of them.
+
+    Any API replica can stream a run: viewers subscribe to the channel and
+    replay the log, so joining late does not miss earlier steps.
+    """
+
+    def __init__(self, redis: aioredis.Redis, run_id: str, seq: int = 0):
+        self.redis = redis
+        self.run_id = run_id
+        # Retries of a run continue its sequence so viewers do not drop their events
+        self._seq = seq
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    async def publish(self, event: str, **data: Any) -> None:
+        self._seq += 1
+        payload = json.dumps({
+            'run_id': self.run_id,
+            'seq': self._seq,
+            'event': event,
+            'time': time.time(),
+            **data,
+        })
+        log_key = LOG_KEY.format(self.run_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(log_key, payload)
+            pipe.ltrim(log_key, -MAX_LOGGED_EVENTS, -1)
+            pipe.expire(log_key, RUN_TTL_SECONDS)
+            pipe.publish(CHANNEL_KEY.format(self.run_id), payload)
+            await pipe.execute()
+
+    async def step(self, progress: Dict[str, Any]) -> None:
+        """Callback for AutomationService.playback_routine."""
+        await self.publish('step', **progress)
+
+
+async def follow_run(redis: aioredis.Redis, run_id: str, timeout: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """Yield a run's events from the start until it finishes.
+
+    Yields None whenever `timeout` passes without an event, so callers can
+    send keep-alives.
+    """
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(CHANNEL_KEY.format(run_id))
+    try:
+        # Subscribe first, then replay, so nothing falls in between
+        last_seq = 0
+        for raw in await redis.lrange(LOG_KEY.format(run_id), 0, -1):
+            event = json.loads(raw)
+            last_seq = event['seq']
+            yield event
+            if event['event'] in TERMINAL_EVENTS:
+                return
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+            if message is None:
+                yield None
+                continue
+            event = json.loads(message['data'])
+            if event['seq'] <= last_seq:
+                continue
+            last_seq = event['seq']
+            yield event
+            if event['event'] in TERMINAL_EVENTS:
+                return
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.close()
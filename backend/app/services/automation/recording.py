@@ -0,0 +1,212 @@
+# app/services/automation/recording.py
+"""
+Live recording sessions and their streamed event capture
+filepath: backend/app/services/automation/recording.py
+"""
+from typing import Dict, Any, List, Iterator, Optional, Set
+import asyncio
+import json
+import os
+import socket
+import time
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.automation.browser_pool import BrowserPool, browser_pool
+from app.services.automation.player import AutomationService
+from app.services.automation.profile_lease import ProfileLease
+
+
+class RecordingStream:
+    """Append-only JSON-lines stream with a small in-memory batch buffer.
+
+    Events are held in memory only until `batch_size` of them have piled up
+    or `flush_interval` seconds have passed, then written to disk in one go,
+    so a recording of any length uses constant memory.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, flush_interval: float = 2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def append(self, event: Dict[str, Any]) -> None:
+        self._buffer.append(event)
+        self.count += 1
+        if (len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def extend(self, events: List[Dict[str, Any]]) -> None:
+        for event in events:
+            self.append(event)
+
+    def flush(self) -> None:
+        if self._buffer and not self._file.closed:
+            self._file.write("".join(json.dumps(e) + "\n" for e in self._buffer))
+            self._file.flush()
+        self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        if not self._file.closed:
+            self._file.close()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Stream recorded events back from disk one at a time."""
+        self.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class RecordingSession:
+    def __init__(
+        self, user_id: int, service: AutomationService, stream: RecordingStream, lease: ProfileLease
+    ):
+        self.user_id = user_id
+        self.service = service
+        self.stream = stream
+        self.lease = lease
+        self.started_at = time.time()
+        self.renewer: Optional[asyncio.Task] = None
+        self.expiry: Optional[asyncio.Task] = None
+
+
+class RecordingSessionManager:
+    """Keeps the live AutomationService of every user that is recording.
+
+    The service that started a recording is the one that stops it, so the
+    browser is never relaunched just to read back the captured events.
+    A recording holds the user's profile lease, like a playback worker does,
+    until it stops and the profile is closed again. A recording whose lease
+    slips away, or that runs past max_seconds without being stopped, is
+    ended and its events discarded, so it never keeps a profile open that
+    someone else may be using.
+    """
+
+    def __init__(
+        self,
+        pool: Optional[BrowserPool] = None,
+        batch_size: int = 100,
+        owner: Optional[str] = None,
+        max_seconds: float = 1800.0,
+    ):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.owner = owner or f"api-{socket.gethostname()}-{os.getpid()}"
+        self.max_seconds = max_seconds
+        self._sessions: Dict[int, RecordingSession] = {}
+        self._abandoning: Set[asyncio.Task] = set()
+        self._starting: Set[int] = set()
+        self._lock = asyncio.Lock()
+
+    def _stream_path(self, user_id: int) -> str:
+        return os.path.join(settings.BROWSER_DATA_DIR, "recordings", f"{user_id}.jsonl")
+
+    def get(self, user_id: int) -> Optional[RecordingSession]:
+        return self._sessions.get(user_id)
+
+    async def start(self, user_id: int, user_data_dir: str) -> RecordingSession:
+        # Only the slot is reserved under the lock: launching may wait for a
+        # free pool slot, which a concurrent stop() needs the lock to release
+        async with self._lock:
+            if user_id in self._sessions or user_id in self._starting:
+                raise RuntimeError("Recording already in progress")
+            self._starting.add(user_id)
+        try:
+            lease = ProfileLease(get_redis(), user_id, self.owner, settings.PROFILE_LEASE_SECONDS)
+            if not await lease.acquire():
+                raise RuntimeError("Browser profile is in use")
+            stream = None
+            service = AutomationService(user_data_dir, pool=self.pool)
+            try:
+                stream = RecordingStream(self._stream_path(user_id), batch_size=self.batch_size)
+                await service.start_browser()
+                await service.start_recording(sink=stream)
+            except Exception:
+                if stream is not None:
+                    stream.close()
+                    self._remove_stream(stream.path)
+                await self._close(service, lease)
+                raise
+            session = RecordingSession(user_id, service, stream, lease)
+            session.renewer = lease.start_renewing(
+                lambda: self._abandon_soon(session, "profile lease lost")
+            )
+            session.expiry = asyncio.create_task(self._expire(session))
+            async with self._lock:
+                self._sessions[user_id] = session
+            return session
+        finally:
+            self._starting.discard(user_id)
+
+    async def stop(self, user_id: int) -> List[Dict[str, Any]]:
+        """Stop the user's recording and return every captured event."""
+        async with self._lock:
+            session = self._sessions.pop(user_id, None)
+        if session is None:
+            raise KeyError(user_id)
+        await self._end(session)
+        try:
+            return list(session.stream)
+        finally:
+            self._remove_stream(session.stream.path)
+
+    async def _end(self, session: RecordingSession) -> None:
+        for task in (session.renewer, session.expiry):
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+        try:
+            await session.service.stop_recording()
+        finally:
+            session.stream.close()
+            await self._close(session.service, session.lease)
+
+    async def _expire(self, session: RecordingSession) -> None:
+        await asyncio.sleep(self.max_seconds)
+        await self._abandon(session, f"not stopped within {self.max_seconds:.0f}s")
+
+    def _abandon_soon(self, session: RecordingSession, reason: str) -> None:
+        task = asyncio.create_task(self._abandon(session, reason))
+        self._abandoning.add(task)
+        task.add_done_callback(self._abandoning.discard)
+
+    async def _abandon(self, session: RecordingSession, reason: str) -> None:
+        """End a recording nobody is going to stop, unless it already ended."""
+        async with self._lock:
+            if self._sessions.get(session.user_id) is not session:
+                return
+            del self._sessions[session.user_id]
+        print(f"Ending recording of user {session.user_id}: {reason}")
+        try:
+            await self._end(session)
+        except Exception as e:
+            print(f"Error ending recording of user {session.user_id}: {str(e)}")
+        finally:
+            self._remove_stream(session.stream.path)
+
+    async def _close(self, service: AutomationService, lease: ProfileLease) -> None:
+        """Close the profile, then let other processes have it."""
+        try:
+            await service.close()
+            if self.pool is not None:
+                await self.pool.discard(service.user_data_dir)
+        finally:
+            await lease.release()
+
+    @staticmethod
+    def _remove_stream(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+recording_sessions = RecordingSessionManager(pool=browser_pool, max_seconds=settings.RECORDING_MAX_SECONDS)
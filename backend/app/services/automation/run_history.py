@@ -0,0 +1,227 @@
+# app/services/automation/run_history.py
+"""
+Write-behind history of playback runs and their steps
+filepath: backend/app/services/automation/run_history.py
+
+Workers only append finished runs to an in-memory buffer; a background
+task writes the buffer to Postgres with one multi-row INSERT per table
+whenever HISTORY_BATCH_SIZE rows are waiting or HISTORY_FLUSH_SECONDS have
+passed, so playback never waits on a history transaction. Rows that fail
+to write are kept for the next flush, up to HISTORY_MAX_PENDING, after
+which the oldest are dropped.
+
+A second task periodically recomputes hourly rollups (success rate and
+p50/p95 duration per routine and per step) for recent hours, so dashboards
+read a few aggregate rows instead of scanning raw history.
+"""
+from redis import asyncio as aioredis
+from sqlalchemy import bindparam, func, insert, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.session import AsyncSessionLocal
+from app.models.run import Run, RunStep, RoutineRunStats, StepRunStats
+from app.models.schedule import Schedule
+
+ROLLUP_LOCK_KEY = 'history:rollup:lock'
+
+# Retried attempts are not outcomes; only the last attempt of a run counts
+FINAL_STATUSES = ('finished', 'failed')
+
+_schedules = Schedule.__table__
+_TOUCH_SCHEDULE = (
+    update(_schedules)
+    .where(_schedules.c.id == bindparam('b_id'))
+    .where(or_(_schedules.c.last_run.is_(None), _schedules.c.last_run < bindparam('b_last_run')))
+    .values(last_run=bindparam('b_last_run'))
+)
+
+
+class RunHistory:
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        max_pending: int = 50000,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._runs: List[Dict[str, Any]] = []
+        self._steps: List[Dict[str, Any]] = []
+        self._last_runs: Dict[int, datetime] = {}
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+    def pending(self) -> int:
+        return len(self._runs) + len(self._steps)
+
+    def record(self, run: Dict[str, Any], steps: List[Dict[str, Any]]) -> None:
+        """Queue one attempt of a run and its step outcomes; never blocks."""
+        self._runs.append(run)
+        self._steps.extend(
+            {'run_id': run['run_id'], 'attempt': run['attempt'], 'routine_id': run['routine_id'], **step}
+            for step in steps
+        )
+        if run.get('schedule_id') is not None and run['status'] in FINAL_STATUSES:
+            previous = self._last_runs.get(run['schedule_id'])
+            if previous is None or previous < run['started_at']:
+                self._last_runs[run['schedule_id']] = run['started_at']
+        self._trim()
+        if self.pending() >= self.batch_size:
+            self._wake.set()
+
+    def _trim(self) -> None:
+        excess = self.pending() - self.max_pending
+        if excess <= 0:
+            return
+        # Drop step detail before whole runs
+        dropped_steps = min(excess, len(self._steps))
+        del self._steps[:dropped_steps]
+        dropped_runs = min(excess - dropped_steps, len(self._runs))
+        del self._runs[:dropped_runs]
+        self.dropped += dropped_steps + dropped_runs
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written."""
+        async with self._flush_lock:
+            runs, self._runs = self._runs, []
+            steps, self._steps = self._steps, []
+            last_runs, self._last_runs = self._last_runs, {}
+            if not runs and not steps and not last_runs:
+                return 0
+            try:
+                async with self.session_factory() as db:
+                    for start in range(0, len(runs), self.batch_size):
+                        await db.execute(insert(Run), runs[start:start + self.batch_size])
+                    for start in range(0, len(steps), self.batch_size):
+                        await db.execute(insert(RunStep), steps[start:start + self.batch_size])
+                    if last_runs:
+                        await db.execute(_TOUCH_SCHEDULE, [
+                            {'b_id': schedule_id, 'b_last_run': when}
+                            for schedule_id, when in last_runs.items()
+                        ])
+                    await db.commit()
+            except Exception:
+                # Keep the rows, oldest first, for the next attempt
+                self._runs[:0] = runs
+                self._steps[:0] = steps
+                for schedule_id, when in last_runs.items():
+                    if self._last_runs.get(schedule_id, when) <= when:
+                        self._last_runs[schedule_id] = when
+                self._trim()
+                raise
+            return len(runs) + len(steps)
+
+    async def flush_forever(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Flush on every full batch or flush interval; flushes once more on stop."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing run history: {str(e)}")
+                await asyncio.sleep(self.flush_interval)
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"Error flushing run history on shutdown, {self.pending()} rows lost: {str(e)}")
+
+    async def rollup(self, since: datetime) -> None:
+        """Recompute the hourly rollups of every bucket from `since`'s hour on."""
+        since = since.replace(minute=0, second=0, microsecond=0)
+        bucket = _hour(Run.finished_at).label('bucket')
+        routine_rows = (
+            select(
+                Run.routine_id,
+                bucket,
+                func.count().label('runs'),
+                func.count().filter(Run.status == 'finished').label('succeeded'),
+                func.percentile_cont(0.5).within_group(Run.duration).label('p50_seconds'),
+                func.percentile_cont(0.95).within_group(Run.duration).label('p95_seconds'),
+            )
+            .where(Run.finished_at >= since, Run.status.in_(FINAL_STATUSES))
+            .group_by(Run.routine_id, bucket)
+        )
+        step_bucket = _hour(RunStep.finished_at).label('bucket')
+        step_rows = (
+            select(
+                RunStep.routine_id,
+                RunStep.step_index,
+                step_bucket,
+                func.max(RunStep.step_type).label('step_type'),
+                func.count().label('runs'),
+                func.count().filter(RunStep.error.is_not(None)).label('failed'),
+                func.percentile_cont(0.5).within_group(RunStep.duration).label('p50_seconds'),
+                func.percentile_cont(0.95).within_group(RunStep.duration).label('p95_seconds'),
+            )
+            .where(RunStep.finished_at >= since)
+            .group_by(RunStep.routine_id, RunStep.step_index, step_bucket)
+        )
+        async with self.session_factory() as db:
+            await db.execute(_upsert(RoutineRunStats, routine_rows, ['routine_id', 'bucket']))
+            await db.execute(_upsert(StepRunStats, step_rows, ['routine_id', 'step_index', 'bucket']))
+            await db.commit()
+
+    async def rollup_forever(
+        self,
+        redis: aioredis.Redis,
+        stop: Optional[asyncio.Event] = None,
+        interval: float = 300.0,
+        lookback: timedelta = timedelta(hours=2),
+    ) -> None:
+        """Refresh recent rollups every `interval`; one process fleet-wide does it per period.
+
+        The lookback covers rows that were still buffered when their hour
+        was last rolled up.
+        """
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                if await redis.set(ROLLUP_LOCK_KEY, metrics.process, nx=True, ex=max(1, int(interval))):
+                    await self.rollup(datetime.utcnow() - lookback)
+            except Exception as e:
+                print(f"Error rolling up run history: {str(e)}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _hour(column: Any) -> Any:
+    # A literal rather than a bind parameter, so GROUP BY matches the select list
+    return func.date_trunc(literal_column("'hour'"), column)
+
+
+def _upsert(model: Any, rows: Any, keys: List[str]) -> Any:
+    columns = [c.name for c in rows.selected_columns]
+    stmt = pg_insert(model).from_select(columns, rows)
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={name: stmt.excluded[name] for name in columns if name not in keys},
+    )
+
+
+run_history = RunHistory(
+    batch_size=settings.HISTORY_BATCH_SIZE,
+    flush_interval=settings.HISTORY_FLUSH_SECONDS,
+    max_pending=settings.HISTORY_MAX_PENDING,
+)
+
+metrics.gauge('dropfarm_run_history_pending', 'Run history rows waiting to be written.',
+              run_history.pending)
+metrics.gauge('dropfarm_run_history_dropped', 'Run history rows dropped because the buffer was full.',
+              lambda: run_history.dropped)
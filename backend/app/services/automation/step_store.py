@@ -0,0 +1,283 @@
+# app/services/automation/step_store.py
+"""
+Content-addressed storage of routine steps
+filepath: backend/app/services/automation/step_store.py
+
+Recordings and compiled plans are stored as chunks in step_chunks (see
+app/db/chunks.py); a routine only keeps the list of its chunks' digests.
+Chunks are immutable and reference counted, so replacing a routine's steps
+is copy-on-write: chunks the old and new sequence share are left alone,
+new ones are written once however many routines use them, and chunks
+nobody references any more are deleted in the same transaction. The
+routine's row is locked while its refs change, and every chunk it gains is
+upserted, so a concurrent writer can neither count the same old refs twice
+nor delete a chunk this one is about to reference.
+
+Decoded chunks are kept in a process-wide LRU keyed by digest. A digest
+always names the same content, so entries never go stale. Plans are handed
+to playback as ChunkedSteps: uncached chunks are fetched still encoded and
+decoded one step at a time as playback reaches them, so the first step
+runs without decoding the whole plan.
+
+Routines whose recordings are identical, timing included, also share their
+compiled plan: a stale plan is copied from such a routine before falling
+back to compiling. playback_routine is given plan_scope(routine), so
+locator and wait learnings carry over between routines with the same plan.
+"""
+from collections import Counter, OrderedDict
+from sqlalchemy import bindparam, delete, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.chunks import join_volatile, sequence_digest, split_chunks, split_volatile
+from app.db.types import EncodedSteps, encode_steps
+from app.models.routine import Routine
+from app.models.step_chunk import StepChunk
+from app.services.automation.compiler import compile_routine, COMPILER_VERSION
+
+_chunks = StepChunk.__table__
+_ADD_REFS = (
+    update(_chunks)
+    .where(_chunks.c.digest == bindparam('b_digest'))
+    .values(ref_count=_chunks.c.ref_count + bindparam('b_delta'))
+)
+
+# A chunk as cached (decoded) or as read from the database (still encoded)
+_Source = Union[Tuple[Dict[str, Any], ...], EncodedSteps]
+
+
+class ChunkedSteps:
+    """The steps of a chunk list, decoded lazily as they are iterated.
+
+    len() is known up front from the cache and the chunk headers. Each chunk
+    decoded on the way is put in the store's cache once fully read.
+    """
+
+    __slots__ = ('_store', '_refs', '_sources', '_count')
+
+    def __init__(self, store: "StepStore", refs: List[str], sources: Dict[str, _Source]):
+        self._store = store
+        self._refs = refs
+        self._sources = sources
+        self._count = sum(len(sources[digest]) for digest in refs)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for digest in self._refs:
+            source = self._sources[digest]
+            if isinstance(source, EncodedSteps):
+                decoded = []
+                for step in source:
+                    decoded.append(step)
+                    yield dict(step)
+                self._sources[digest] = self._store._cache_put(digest, decoded)
+            else:
+                # Shallow copies, so callers cannot change what other routines see
+                yield from (dict(step) for step in source)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"ChunkedSteps({self._count} steps in {len(self._refs)} chunks)"
+
+
+
+class StepStore:
+    def __init__(self, cache_steps: int = 200000):
+        self.cache_steps = cache_steps
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], ...]]" = OrderedDict()
+        self._cached_steps = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _cache_get(self, digest: str) -> Optional[Tuple[Dict[str, Any], ...]]:
+        chunk = self._cache.get(digest)
+        if chunk is not None:
+            self._cache.move_to_end(digest)
+        return chunk
+
+    def _cache_put(self, digest: str, steps: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], ...]:
+        chunk = tuple(steps)
+        if digest not in self._cache:
+            self._cached_steps += len(chunk)
+        self._cache[digest] = chunk
+        self._cache.move_to_end(digest)
+        while self._cached_steps > self.cache_steps and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_steps -= len(evicted)
+        return chunk
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'chunks': len(self._cache),
+            'steps': self._cached_steps,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    async def _sources(self, db: AsyncSession, digests) -> Dict[str, _Source]:
+        """Chunks by digest, cached ones decoded; uncached ones are read but not decoded."""
+        found: Dict[str, _Source] = {}
+        missing = []
+        for digest in dict.fromkeys(digests):
+            chunk = self._cache_get(digest)
+            if chunk is None:
+                missing.append(digest)
+            else:
+                found[digest] = chunk
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            rows = await db.execute(
+                select(StepChunk.digest, StepChunk.steps).where(StepChunk.digest.in_(missing))
+            )
+            for digest, steps in rows:
+                found[digest] = steps
+        return found
+
+    async def _chunks(self, db: AsyncSession, digests) -> Dict[str, Tuple[Dict[str, Any], ...]]:
+        """Decoded chunks by digest; only uncached ones are read."""
+        return {
+            digest: self._cache_put(digest, source.to_list()) if isinstance(source, EncodedSteps) else source
+            for digest, source in (await self._sources(db, digests)).items()
+        }
+
+    async def stream(self, db: AsyncSession, refs: List[str]) -> ChunkedSteps:
+        """The steps of a chunk list, read now and decoded as they are iterated."""
+        sources = await self._sources(db, refs)
+        for digest in refs:
+            if digest not in sources:
+                raise LookupError(f"Step chunk {digest} is missing")
+        return ChunkedSteps(self, refs, sources)
+
+    async def get(self, db: AsyncSession, refs: List[str]) -> List[Dict[str, Any]]:
+        """The steps of a chunk list, decoded; only uncached chunks are read."""
+        return (await self.stream(db, refs)).to_list()
+
+    async def put(
+        self, db: AsyncSession, steps: List[Dict[str, Any]], previous: Optional[List[str]] = None
+    ) -> List[str]:
+        """Store canonical steps (see split_volatile) in place of `previous`; returns the new refs."""
+        chunks = split_chunks(steps)
+        refs = [digest for digest, _ in chunks]
+        await self._adjust_refs(db, Counter(refs), Counter(previous or []), dict(chunks))
+        for digest, chunk in chunks:
+            self._cache_put(digest, chunk)
+        return refs
+
+    async def _adjust_refs(
+        self,
+        db: AsyncSession,
+        added: Counter,
+        removed: Counter,
+        contents: Dict[str, Any],
+    ) -> None:
+        delta = Counter(added)
+        delta.subtract(removed)
+        # Sorted, so concurrent writers lock shared chunks in the same order
+        changed = sorted(digest for digest, n in delta.items() if n)
+        if not changed:
+            return
+        gained = [d for d in changed if delta[d] > 0]
+        if gained:
+            unknown = [d for d in gained if d not in contents]
+            if unknown:
+                contents = {**contents, **await self._chunks(db, unknown)}
+            rows = []
+            for digest in gained:
+                if digest not in contents:
+                    raise LookupError(f"Step chunk {digest} is missing")
+                data = encode_steps(list(contents[digest]))
+                rows.append({
+                    'digest': digest,
+                    'steps': EncodedSteps(data),
+                    'step_count': len(contents[digest]),
+                    'size': len(data),
+                    'ref_count': delta[digest],
+                })
+            stmt = pg_insert(StepChunk)
+            # Recreates the chunk if another writer just dropped its last reference
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=['digest'],
+                set_={'ref_count': StepChunk.ref_count + stmt.excluded.ref_count},
+            ), rows)
+        lost = [d for d in changed if delta[d] < 0]
+        if lost:
+            await db.execute(_ADD_REFS, [{'b_digest': d, 'b_delta': delta[d]} for d in lost])
+            await db.execute(
+                delete(StepChunk).where(StepChunk.digest.in_(lost), StepChunk.ref_count <= 0)
+            )
+
+    async def _lock(self, db: AsyncSession, routine: Routine, *attributes: str) -> None:
+        """Lock a stored routine's row and reload the refs about to be replaced."""
+        if inspect(routine).persistent:
+            await db.refresh(routine, attribute_names=list(attributes), with_for_update=True)
+
+    async def set_steps(self, db: AsyncSession, routine: Routine, steps: List[Dict[str, Any]]) -> None:
+        """Replace a routine's recording and compile its plan; unchanged chunks stay shared."""
+        content, timestamps = split_volatile(steps)
+        await self._lock(db, routine, 'step_refs')
+        routine.step_refs = await self.put(db, content, routine.step_refs)
+        routine.step_timestamps = timestamps if any(t is not None for t in timestamps) else None
+        routine.steps_digest = sequence_digest(routine.step_refs, routine.step_timestamps)
+        await self.set_plan(db, routine, compile_routine(steps))
+
+    async def set_plan(self, db: AsyncSession, routine: Routine, compiled: Dict[str, Any]) -> None:
+        content, _ = split_volatile(compiled['steps'])
+        await self._lock(db, routine, 'compiled_refs', 'compiled_version')
+        routine.compiled_refs = await self.put(db, content, routine.compiled_refs)
+        routine.compiled_version = compiled['version']
+
+    async def steps(self, db: AsyncSession, routine: Routine) -> List[Dict[str, Any]]:
+        """A routine's raw recording."""
+        if 'step_timestamps' in inspect(routine).unloaded:
+            await db.refresh(routine, attribute_names=['step_timestamps'])
+        return join_volatile(await self.get(db, routine.step_refs or []), routine.step_timestamps)
+
+    async def plan(self, db: AsyncSession, routine: Routine) -> ChunkedSteps:
+        """A routine's compiled steps, bringing plans from older compilers up to date."""
+        if routine.compiled_refs is None or routine.compiled_version != COMPILER_VERSION:
+            await self._lock(db, routine, 'compiled_refs', 'compiled_version')
+        if routine.compiled_refs is None or routine.compiled_version != COMPILER_VERSION:
+            shared = None
+            if routine.steps_digest:
+                shared = await db.scalar(
+                    select(Routine.compiled_refs)
+                    .where(
+                        Routine.steps_digest == routine.steps_digest,
+                        Routine.compiled_version == COMPILER_VERSION,
+                        Routine.compiled_refs.is_not(None),
+                        Routine.id != routine.id,
+                    )
+                    .limit(1)
+                )
+            if shared is not None:
+                # Its chunks are upserted too, in case that routine is replacing them right now
+                await self._adjust_refs(db, Counter(shared), Counter(routine.compiled_refs or []), {})
+                routine.compiled_refs = shared
+                routine.compiled_version = COMPILER_VERSION
+            else:
+                await self.set_plan(db, routine, compile_routine(await self.steps(db, routine)))
+        return await self.stream(db, routine.compiled_refs)
+
+
+def plan_scope(routine: Routine) -> str:
+    """Key for state learned while playing a plan, shared by routines with the same plan."""
+    return f"plan:{sequence_digest(routine.compiled_refs or [])[:16]}"
+
+
+step_store = StepStore(cache_steps=settings.STEP_CHUNK_CACHE_STEPS)
+
+metrics.gauge('dropfarm_step_chunk_cache_steps', 'Decoded steps held in the step chunk cache.',
+              lambda: step_store._cached_steps)
@@ -0,0 +1,90 @@
+# app/services/automation/steps.py
+"""
+Helpers for recorded routine steps
+filepath: backend/app/services/automation/steps.py
+"""
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+import hashlib
+import json
+import re
+
+# Fields that identify what a step does; timestamps and statuses are ignored
+_IDENTITY_FIELDS = ('type', 'url', 'x', 'y')
+
+
+def step_hash(step: Dict[str, Any]) -> str:
+    """Stable short hash of a step, independent of when it was recorded."""
+    identity = {k: step.get(k) for k in _IDENTITY_FIELDS}
+    element = step.get('element') or {}
+    identity['element'] = {
+        'selector': element.get('selector'),
+        'innerText': element.get('innerText'),
+        'tag': element.get('tag'),
+    }
+    # Only in recordings made since ids and classes are captured apart;
+    # left out otherwise so older steps keep their hash
+    for field in ('id', 'className'):
+        if field in element:
+            identity['element'][field] = element[field]
+    encoded = json.dumps(identity, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+_CSS_IDENT = re.compile(r'^[A-Za-z_][\w-]*$')
+
+
+def _css_string(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _id_selector(value: str) -> str:
+    return f"#{value}" if _CSS_IDENT.match(value) else f"[id={_css_string(value)}]"
+
+
+def _class_selector(value: str) -> str:
+    return ''.join(
+        f".{token}" if _CSS_IDENT.match(token) else f"[class~={_css_string(token)}]"
+        for token in value.split()
+    )
+
+
+def _legacy_selector(element: Dict[str, Any]) -> str:
+    # Recordings made before ids and classes were captured apart have one
+    # `selector` field holding the id, or else the class attribute
+    if 'id' in element or 'className' in element:
+        return ''
+    return (element.get('selector') or '').strip()
+
+
+def id_selector(element: Dict[str, Any]) -> Optional[str]:
+    """CSS selector for a recorded element's id, if it had one."""
+    element = element or {}
+    element_id = (element.get('id') or '').strip()
+    if not element_id:
+        legacy = _legacy_selector(element)
+        element_id = legacy if len(legacy.split()) == 1 else ''
+    return _id_selector(element_id) if element_id else None
+
+
+def class_selector(element: Dict[str, Any]) -> Optional[str]:
+    """CSS selector for a recorded element's classes; rarely unique, so tried after text."""
+    element = element or {}
+    class_name = (element.get('className') or '').strip() or _legacy_selector(element)
+    return _class_selector(class_name) if class_name else None
+
+
+def step_key(routine_id: Any, step: Dict[str, Any]) -> str:
+    """Key for per-step state shared across runs of a routine."""
+    return f"{routine_id if routine_id is not None else '-'}:{step_hash(step)}"
+
+
+def lookahead(steps: Iterable[Dict[str, Any]]) -> Iterator[Tuple[int, Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """Yield (index, step, next_step) while consuming `steps` only once."""
+    iterator = iter(steps)
+    current = next(iterator, None)
+    index = 0
+    while current is not None:
+        following = next(iterator, None)
+        yield index, current, following
+        current = following
+        index += 1
@@ -0,0 +1,166 @@
+# app/services/automation/waits.py
+"""
+Adaptive, event-driven waits for routine playback
+filepath: backend/app/services/automation/waits.py
+"""
+from playwright.async_api import Page, Error as PlaywrightError
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Any, Optional
+import time
+
+WAIT_NONE = 'none'
+WAIT_ACTIONABLE = 'actionable'
+WAIT_URL_CHANGE = 'url_change'
+WAIT_RESPONSE = 'response'
+WAIT_DOM_QUIET = 'dom_quiet'
+
+# Resolves once the DOM has seen no mutations for quietMs, or after maxMs
+_DOM_QUIET_JS = """
+([quietMs, maxMs]) => new Promise(resolve => {
+    let timer = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(done, quietMs);
+    });
+    function done() {
+        observer.disconnect();
+        resolve(true);
+    }
+    observer.observe(document, {
+        subtree: true, childList: true, attributes: true, characterData: true
+    });
+    timer = setTimeout(done, quietMs);
+    setTimeout(done, maxMs);
+})
+"""
+
+
+class StepTimings:
+    """Recent settle durations per step, used to cap waits on later runs."""
+
+    def __init__(self, window: int = 20, margin: float = 2.0, floor: float = 0.5):
+        self.window = window
+        self.margin = margin
+        self.floor = floor
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def cap(self, key: str, default: float, hint: Optional[float] = None) -> float:
+        """Timeout for a step: a margin over its p95, never above default.
+
+        Without history, a compiled `hint` (recorded gap) is used instead.
+        """
+        samples = self._samples.get(key)
+        if not samples:
+            if hint is not None:
+                return min(default, max(self.floor, hint * self.margin))
+            return default
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return min(default, max(self.floor, p95 * self.margin))
+
+
+class WaitPlan:
+    def __init__(self, kind: str, timeout: float, target: Optional[str] = None, key: Optional[str] = None):
+        self.kind = kind
+        self.timeout = timeout
+        self.target = target
+        self.key = key
+
+    def __repr__(self) -> str:
+        return f"WaitPlan({self.kind!r}, timeout={self.timeout:.2f}, target={self.target!r})"
+
+
+class WaitEngine:
+    """Chooses what to wait for after each step and waits only that long.
+
+    A click followed by a navigation to another URL waits for the URL to
+    change; a click followed by another click waits for the next element to
+    become actionable; a step carrying a `wait_for_response` URL fragment
+    waits for that response; anything else waits for DOM mutations to settle.
+    """
+
+    def __init__(
+        self,
+        timings: Optional[StepTimings] = None,
+        default_timeout: float = 10.0,
+        quiet_ms: int = 300,
+    ):
+        self.timings = timings if timings is not None else step_timings
+        self.default_timeout = default_timeout
+        self.quiet_ms = quiet_ms
+
+    def plan(self, step: Dict[str, Any], next_step: Optional[Dict[str, Any]], key: Optional[str] = None) -> WaitPlan:
+        hint = step.get('wait_hint')
+        timeout = self.timings.cap(key, self.default_timeout, hint) if key else self.default_timeout
+
+        if step.get('wait_for_response'):
+            return WaitPlan(WAIT_RESPONSE, timeout, step['wait_for_response'], key)
+        if step.get('type') != 'click':
+            return WaitPlan(WAIT_NONE, timeout, key=key)
+        if next_step is None:
+            return WaitPlan(WAIT_DOM_QUIET, timeout, key=key)
+        if next_step.get('type') == 'navigation' and next_step.get('url') != step.get('url'):
+            return WaitPlan(WAIT_URL_CHANGE, timeout, next_step.get('url'), key)
+        if next_step.get('type') == 'click':
+            locator = next_step.get('locator') or {}
+            if locator.get('selector'):
+                return WaitPlan(WAIT_ACTIONABLE, timeout, locator['selector'], key)
+        # Without a compiled selector there is nothing reliable to wait on; a
+        # guessed one that matches nothing would wait out the whole cap
+        return WaitPlan(WAIT_DOM_QUIET, timeout, key=key)
+
+    async def run(self, page: Page, plan: WaitPlan, action: Callable[[], Awaitable[Any]]) -> float:
+        """Perform `action` and wait for the planned condition.
+
+        Waits are best effort: a condition that does not occur within the
+        timeout is not an error, playback simply moves on. Returns the time
+        spent settling after the action.
+        """
+        if plan.kind == WAIT_RESPONSE:
+            started = time.perf_counter()
+            acted = False
+            try:
+                async with page.expect_response(
+                    lambda r: plan.target in r.url, timeout=plan.timeout * 1000
+                ):
+                    await action()
+                    acted = True
+                    started = time.perf_counter()
+            except PlaywrightError:
+                # Only the wait is best effort; a failed action is the step failing
+                if not acted:
+                    raise
+            return self._observe(plan, time.perf_counter() - started)
+
+        url_before = page.url
+        await action()
+        started = time.perf_counter()
+        try:
+            if plan.kind == WAIT_URL_CHANGE:
+                await page.wait_for_url(lambda url: url != url_before, timeout=plan.timeout * 1000)
+                await page.wait_for_load_state('domcontentloaded', timeout=plan.timeout * 1000)
+            elif plan.kind == WAIT_ACTIONABLE:
+                await page.wait_for_selector(plan.target, state='visible', timeout=plan.timeout * 1000)
+            elif plan.kind == WAIT_DOM_QUIET:
+                await self._dom_quiet(page, plan.timeout)
+        except PlaywrightError:
+            pass
+        return self._observe(plan, time.perf_counter() - started)
+
+    async def _dom_quiet(self, page: Page, timeout: float) -> None:
+        try:
+            await page.evaluate(_DOM_QUIET_JS, [self.quiet_ms, int(timeout * 1000)])
+        except PlaywrightError:
+            # The click navigated away and destroyed the execution context
+            await page.wait_for_load_state('domcontentloaded', timeout=timeout * 1000)
+
+    def _observe(self, plan: WaitPlan, elapsed: float) -> float:
+        if plan.key and plan.kind != WAIT_NONE:
+            self.timings.record(plan.key, elapsed)
+        return elapsed
+
+
+step_timings = StepTimings()
@@ -2,28 +2,281 @@
 """
 Schedule manager for automation routines
 filepath: backend/app/services/scheduler/job_manager.py
+
+Due times live in one Redis sorted set scored by epoch seconds, so adding,
+cancelling and popping schedules are all O(log n). Popping due jobs and
+requeueing their next run happen in a single Lua script, so two dispatchers
+can never fire the same run twice. The same script admits runs against the
+fleet's idle browser slots, counting runs already queued or being handed
+to the queue by any dispatcher, so dispatchers cannot jointly overfill it.
 """
-from redis import Redis
-from typing import List
+from redis import asyncio as aioredis
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timezone
+import asyncio
+import json
+import time
+
+from ...core.metrics import SCHEDULER_LAG_SECONDS
 from ...models.schedule import Schedule
+from ..automation.jobs import QUEUE_KEY
+from .placement import place_run, fleet_capacity
+
+DUE_KEY = 'scheduler:due'
+JOBS_KEY = 'scheduler:jobs'
+USER_KEY = 'scheduler:user:{}'
+# Runs popped but not yet on the playback queue, scored by when they were popped
+ADMITTED_KEY = 'scheduler:admitted'
+# Admissions older than this are from a dispatcher that died mid-batch
+ADMISSION_TTL_SECONDS = 30
+
+# KEYS[1] due zset, KEYS[2] jobs hash, KEYS[3] playback queue, KEYS[4]
+# admitted zset; ARGV[1] now, ARGV[2] batch size, ARGV[3] how many to take,
+# ARGV[4] idle browser slots in the fleet (-1 for no limit), ARGV[5]
+# admission TTL. With a slot count, `limit` is first cut to the slots not
+# already claimed by queued or admitted runs, and each job taken is added
+# to the admitted set as "id:scheduled_at" until the dispatcher has queued
+# it. Of the `batch size` longest-due jobs, the `limit` most urgent
+# (lateness as a share of their interval) are returned as
+# [id, scheduled_at, next_run, meta, ...] and moved to their next slot
+# (next_run is '' for one-shot jobs, which are removed), skipping slots
+# that were missed entirely rather than firing them in a burst. The rest
+# stay due, one entry per schedule, until capacity frees up.
+_POP_DUE_LUA = """
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[3])
+local slots = tonumber(ARGV[4])
+if slots >= 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[4], '-inf', now - tonumber(ARGV[5]))
+    local claimed = redis.call('LLEN', KEYS[3]) + redis.call('ZCARD', KEYS[4])
+    limit = math.min(limit, slots - claimed)
+end
+if limit <= 0 then
+    return {}
+end
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, tonumber(ARGV[2]))
+local candidates = {}
+for i = 1, #due, 2 do
+    local id = due[i]
+    local scheduled = tonumber(due[i + 1])
+    local meta = redis.call('HGET', KEYS[2], id)
+    if meta then
+        local interval = tonumber(cjson.decode(meta)['interval_seconds']) or 0
+        local urgency = 1e18
+        if interval > 0 then
+            urgency = (now - scheduled) / interval
+        end
+        table.insert(candidates, {id, scheduled, meta, interval, urgency})
+    else
+        redis.call('ZREM', KEYS[1], id)
+    end
+end
+table.sort(candidates, function(a, b) return a[5] > b[5] end)
+local result = {}
+for i = 1, math.min(limit, #candidates) do
+    local id, scheduled, meta, interval = unpack(candidates[i])
+    local next_run = ''
+    if interval > 0 then
+        next_run = scheduled + interval
+        if next_run <= now then
+            next_run = scheduled + interval * (math.floor((now - scheduled) / interval) + 1)
+        end
+        redis.call('ZADD', KEYS[1], next_run, id)
+    else
+        redis.call('ZREM', KEYS[1], id)
+    end
+    if slots >= 0 then
+        redis.call('ZADD', KEYS[4], now, id .. ':' .. tostring(scheduled))
+    end
+    table.insert(result, id)
+    table.insert(result, tostring(scheduled))
+    table.insert(result, tostring(next_run))
+    table.insert(result, meta)
+end
+return result
+"""
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    """Epoch seconds of a stored time; naive datetimes are UTC, like every stored time."""
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
 
 class JobManager:
-    def __init__(self, redis_client: Redis):
+    def __init__(self, redis_client: aioredis.Redis):
         self.redis = redis_client
+        self._pop_due = self.redis.register_script(_POP_DUE_LUA)
 
     async def schedule_routine(self, schedule: Schedule) -> bool:
-        """Create a new scheduled job."""
-        # TODO: Implement job scheduling
-        pass
+        """Create a new scheduled job, or reschedule an existing one.
+
+        Without an explicit next_run, the first run is placed on the
+        schedule's phase within its interval (see placement.place_run).
+        """
+        return bool(await self.schedule_many([schedule]))
+
+    async def schedule_many(self, schedules: List[Schedule]) -> Dict[int, float]:
+        """Register timers for many schedules in one pipeline.
+
+        Inactive or interval-less schedules are skipped. Returns the first
+        run time given to each schedule that was registered. Every schedule
+        must carry its owner's user_id, which playback runs as.
+        """
+        now = time.time()
+        first_runs: Dict[int, float] = {}
+        metas: Dict[int, str] = {}
+        by_user: Dict[int, List[int]] = {}
+        for schedule in schedules:
+            if not schedule.is_active or not schedule.interval_seconds:
+                continue
+            if schedule.user_id is None:
+                raise ValueError(f"Schedule {schedule.id} has no user_id")
+            if schedule.next_run:
+                first_runs[schedule.id] = _epoch(schedule.next_run)
+            else:
+                first_runs[schedule.id] = place_run(schedule.id, schedule.interval_seconds, now)
+            metas[schedule.id] = json.dumps({
+                'schedule_id': schedule.id,
+                'routine_id': schedule.routine_id,
+                'interval_seconds': schedule.interval_seconds,
+                'user_id': schedule.user_id,
+            })
+            by_user.setdefault(schedule.user_id, []).append(schedule.id)
+        if not first_runs:
+            return first_runs
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(JOBS_KEY, mapping=metas)
+            pipe.zadd(DUE_KEY, first_runs)
+            for user_id, ids in by_user.items():
+                pipe.sadd(USER_KEY.format(user_id), *ids)
+            await pipe.execute()
+        return first_runs
 
     async def cancel_schedule(self, schedule_id: int) -> bool:
         """Cancel an existing scheduled job."""
-        # TODO: Implement job cancellation
-        pass
+        meta = await self.redis.hget(JOBS_KEY, schedule_id)
+        if meta is None:
+            return False
+        user_id = json.loads(meta).get('user_id')
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(DUE_KEY, schedule_id)
+            pipe.hdel(JOBS_KEY, schedule_id)
+            if user_id is not None:
+                pipe.srem(USER_KEY.format(user_id), schedule_id)
+            await pipe.execute()
+        return True
+
+    async def cancel_many(self, schedule_ids: List[int], user_id: Optional[int] = None) -> None:
+        """Cancel many scheduled jobs of one user in one pipeline."""
+        if not schedule_ids:
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(DUE_KEY, *schedule_ids)
+            pipe.hdel(JOBS_KEY, *schedule_ids)
+            if user_id is not None:
+                pipe.srem(USER_KEY.format(user_id), *schedule_ids)
+            await pipe.execute()
 
     async def list_active_jobs(self, user_id: int) -> List[Dict]:
         """List all active jobs for a user."""
-        # TODO: Implement active jobs listing
-        pass
+        ids = list(await self.redis.smembers(USER_KEY.format(user_id)))
+        if not ids:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hmget(JOBS_KEY, ids)
+            pipe.zmscore(DUE_KEY, ids)
+            metas, scores = await pipe.execute()
+        jobs = []
+        for meta, score in zip(metas, scores):
+            if meta is None or score is None:
+                continue
+            job = json.loads(meta)
+            job['next_run'] = datetime.utcfromtimestamp(float(score))
+            jobs.append(job)
+        return sorted(jobs, key=lambda j: j['next_run'])
+
+    async def pop_due(
+        self,
+        now: Optional[float] = None,
+        batch_size: int = 500,
+        limit: Optional[int] = None,
+        slots: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Atomically take due jobs and requeue their next run.
+
+        Up to `limit` of the `batch_size` longest-due jobs are taken, most
+        overdue relative to their interval first. Each job carries the
+        `next_run` it was requeued at (None once a one-shot job is done).
+
+        With `slots` (idle browser slots in the fleet), no more jobs are
+        taken than slots left once queued and admitted runs are counted.
+        Each job taken then holds an `admission` until passed to
+        release_admissions, which must follow queueing it.
+        """
+        now = time.time() if now is None else now
+        limit = batch_size if limit is None else limit
+        raw = await self._pop_due(
+            keys=[DUE_KEY, JOBS_KEY, QUEUE_KEY, ADMITTED_KEY],
+            args=[now, batch_size, limit, -1 if slots is None else slots, ADMISSION_TTL_SECONDS],
+        )
+        jobs = []
+        for i in range(0, len(raw), 4):
+            job = json.loads(raw[i + 3])
+            if slots is not None:
+                job['admission'] = f"{raw[i]}:{raw[i + 1]}"
+            job['scheduled_at'] = float(raw[i + 1])
+            job['next_run'] = float(raw[i + 2]) if raw[i + 2] else None
+            job['lag'] = max(0.0, now - job['scheduled_at'])
+            SCHEDULER_LAG_SECONDS.observe(job['lag'])
+            jobs.append(job)
+        return jobs
+
+    async def release_admissions(self, jobs: List[Dict[str, Any]]) -> None:
+        """Stop counting jobs against the fleet's slots once they are queued."""
+        admissions = [job['admission'] for job in jobs if 'admission' in job]
+        if admissions:
+            await self.redis.zrem(ADMITTED_KEY, *admissions)
+
+    async def idle_slots(self) -> int:
+        """Browser slots not running a job across the fleet; pass as run_dispatcher's capacity."""
+        fleet = await fleet_capacity(self.redis, QUEUE_KEY)
+        return max(0, fleet['slots'] - fleet['busy'])
+
+    async def run_dispatcher(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[None]],
+        stop: Optional[asyncio.Event] = None,
+        batch_size: int = 500,
+        poll_interval: float = 0.2,
+        capacity: Optional[Callable[[], Awaitable[int]]] = None,
+    ) -> None:
+        """Hand due jobs to `handler` until `stop` is set.
 
-# TO-DO: Implement job manager
+        Full batches are drained back to back; the loop only sleeps once
+        nothing more is due. With `capacity`, it returns the fleet's idle
+        browser slots (see idle_slots) and pop_due admits only as many jobs
+        as are left once runs already queued, or being queued by any
+        dispatcher, are counted; jobs beyond that stay due and are taken
+        most-overdue first once slots free up.
+        """
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            slots = await capacity() if capacity is not None else None
+            jobs = await self.pop_due(batch_size=batch_size, slots=slots)
+            try:
+                for job in jobs:
+                    try:
+                        await handler(job)
+                    except Exception as e:
+                        print(f"Error dispatching schedule {job.get('schedule_id')}: {str(e)}")
+            finally:
+                await self.release_admissions(jobs)
+            if len(jobs) < batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
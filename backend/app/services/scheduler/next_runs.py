@@ -0,0 +1,82 @@
+# app/services/scheduler/next_runs.py
+"""
+Write-behind of schedule run times from the dispatcher to Postgres
+filepath: backend/app/services/scheduler/next_runs.py
+
+Redis owns the timers; the schedules table only mirrors them for listings.
+The dispatcher records the slot each popped schedule was requeued at and a
+background task writes them with one executemany UPDATE per flush, so a
+dispatch never waits on a transaction. An UPDATE never moves next_run
+backwards, so a slow flush cannot undo a newer one.
+"""
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Callable, Dict, Optional
+from datetime import datetime
+import asyncio
+
+from app.db.session import AsyncSessionLocal
+from app.models.schedule import Schedule
+
+_schedules = Schedule.__table__
+_ADVANCE = (
+    update(_schedules)
+    .where(_schedules.c.id == bindparam('b_id'))
+    .where(_schedules.c.is_active.is_(True))
+    .where(or_(_schedules.c.next_run.is_(None), _schedules.c.next_run < bindparam('b_next_run')))
+    .values(next_run=bindparam('b_next_run'))
+)
+
+
+class NextRunWriter:
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        flush_interval: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, datetime] = {}
+        self._flush_lock = asyncio.Lock()
+
+    def record(self, schedule_id: int, next_run: Optional[float]) -> None:
+        """Remember the slot a schedule was requeued at; one-shot jobs have none."""
+        if next_run is None:
+            return
+        when = datetime.utcfromtimestamp(next_run)
+        if self._pending.get(schedule_id, when) <= when:
+            self._pending[schedule_id] = when
+
+    async def flush(self) -> int:
+        """Write every recorded run time; returns the number of schedules written."""
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(_ADVANCE, [
+                        {'b_id': schedule_id, 'b_next_run': when} for schedule_id, when in pending.items()
+                    ])
+                    await db.commit()
+            except Exception:
+                for schedule_id, when in pending.items():
+                    if self._pending.get(schedule_id, when) <= when:
+                        self._pending[schedule_id] = when
+                raise
+            return len(pending)
+
+    async def flush_forever(self, stop: asyncio.Event) -> None:
+        """Flush every flush interval; flushes once more on stop."""
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error writing schedule run times: {str(e)}")
+
+
+next_runs = NextRunWriter()
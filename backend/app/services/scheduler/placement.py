@@ -0,0 +1,89 @@
+# app/services/scheduler/placement.py
+"""
+Load-smoothing placement of schedule runs and fleet capacity for admission
+filepath: backend/app/services/scheduler/placement.py
+
+Schedules created together with the same interval would otherwise fire
+together forever. Each schedule instead runs at a fixed phase within its
+interval, derived from its id, so any population of schedules sharing an
+interval is spread evenly over it.
+"""
+from redis import asyncio as aioredis
+from typing import Dict, Any
+import hashlib
+import json
+import math
+import time
+
+# Fractional part of the golden ratio; multiples of it mod 1 are as evenly
+# spread as a sequence can be, however many ids there are
+_GOLDEN = (math.sqrt(5) - 1) / 2
+
+# Live workers scored by their last heartbeat, and each one's latest report
+WORKERS_KEY = 'fleet:workers'
+WORKER_REPORTS_KEY = 'fleet:worker_reports'
+WORKER_TTL_SECONDS = 15
+
+
+def phase_offset(schedule_id: int, interval: float) -> float:
+    """Seconds into each interval at which a schedule runs."""
+    return ((schedule_id * _GOLDEN) % 1.0) * interval
+
+
+def jitter(schedule_id: int, max_jitter: float) -> float:
+    """Small fixed per-schedule offset, so close phases do not share a second."""
+    digest = hashlib.sha1(str(schedule_id).encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') / 2 ** 32 * max_jitter
+
+
+def place_run(schedule_id: int, interval: float, not_before: float, max_jitter: float = 60.0) -> float:
+    """First run at or after `not_before` that falls on the schedule's phase.
+
+    Phases are anchored to the epoch, so a schedule keeps its slot across
+    restarts and re-registration, and later runs stay `interval` apart.
+    """
+    if interval <= 0:
+        return not_before
+    offset = (phase_offset(schedule_id, interval) + jitter(schedule_id, min(max_jitter, interval))) % interval
+    cycles = math.ceil((not_before - offset) / interval)
+    return cycles * interval + offset
+
+
+async def report_capacity(redis: aioredis.Redis, worker_id: str, slots: int, busy: int) -> None:
+    """Heartbeat of a worker's browser slots; lapses if the worker dies."""
+    now = time.time()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zadd(WORKERS_KEY, {worker_id: now})
+        pipe.hset(WORKER_REPORTS_KEY, worker_id, json.dumps({'slots': slots, 'busy': busy, 'time': now}))
+        await pipe.execute()
+
+
+async def fleet_capacity(redis: aioredis.Redis, queue_key: str) -> Dict[str, Any]:
+    """Free browser slots across live workers, less jobs already queued.
+
+    Workers whose last heartbeat is older than WORKER_TTL_SECONDS are
+    pruned on the way, so the cost follows the number of live workers.
+    """
+    cutoff = time.time() - WORKER_TTL_SECONDS
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zrangebyscore(WORKERS_KEY, '-inf', f"({cutoff}")
+        pipe.zremrangebyscore(WORKERS_KEY, '-inf', f"({cutoff}")
+        pipe.zrangebyscore(WORKERS_KEY, cutoff, '+inf')
+        pipe.llen(queue_key)
+        stale, _, live, queued = await pipe.execute()
+    async with redis.pipeline(transaction=False) as pipe:
+        if stale:
+            pipe.hdel(WORKER_REPORTS_KEY, *stale)
+        if live:
+            pipe.hmget(WORKER_REPORTS_KEY, live)
+        results = await pipe.execute()
+    reports = [json.loads(raw) for raw in (results[-1] if live else []) if raw is not None]
+    slots = sum(r['slots'] for r in reports)
+    busy = sum(r['busy'] for r in reports)
+    return {
+        'workers': len(reports),
+        'slots': slots,
+        'busy': busy,
+        'queued': queued,
+        'free': max(0, slots - busy - queued),
+    }
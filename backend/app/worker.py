@@ -0,0 +1,401 @@
+# app/worker.py
+"""
+Playback worker process
+filepath: backend/app/worker.py
+
+Run one or more of these next to the API:
+
+    python -m app.worker --worker-id node1-a
+
+Each worker pulls jobs from the Redis playback queue and runs at most
+WORKER_CONCURRENCY of them at a time, holding a lease on the user's
+browser profile for as long as a job has it open. Up to
+PLAYBACK_PAGES_PER_USER routines of the same user run side by side, each
+on its own page of that user's pooled persistent context.
+
+Jobs are moved into a per-worker processing list while they run. A worker
+requeues its own list on start, and every heartbeat requeues the lists of
+workers whose heartbeat has lapsed, so jobs of a crashed worker are not
+lost even if it never comes back under the same --worker-id. Jobs cut
+short because the worker lost its lease on their profile are requeued to
+resume from their last checkpoint.
+"""
+from redis import asyncio as aioredis
+from typing import Dict, Any, List, Optional, Set
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+
+from app.core.config import settings
+from app.core.metrics import metrics, record_run_trace, RUN_SECONDS
+from app.core.redis import get_redis, close_redis
+from app.db.session import AsyncSessionLocal
+from app.models.routine import Routine
+from app.services.automation.browser_pool import BrowserPool, browser_pool
+from app.services.automation.checkpoints import CheckpointLog
+from app.services.automation.lean import ResourceFilter
+from app.services.automation.jobs import QUEUE_KEY, PROCESSING_KEY, PROCESSING_OWNERS_KEY
+from app.services.automation.player import AutomationService
+from app.services.automation.profiles import profile_manager
+from app.services.automation.progress import ProgressPublisher
+from app.services.automation.run_history import run_history
+from app.services.automation.step_store import step_store, plan_scope
+from app.services.scheduler.placement import WORKERS_KEY, WORKER_TTL_SECONDS, report_capacity
+from app.services.automation.profile_lease import ProfileLease
+
+# How long to back off before requeueing a job whose profile is busy
+LEASE_RETRY_SECONDS = 1.0
+
+
+class _ProfileSession:
+    """One lease on a user's profile, shared by every job using it here.
+
+    Jobs for the same user run on separate pages of the same persistent
+    context, so the lease is held while any of them is running.
+    """
+
+    def __init__(self, lease: ProfileLease):
+        self.lease = lease
+        self.tasks: Set[asyncio.Task] = set()
+        self.ready = asyncio.Event()
+        self.acquired = False
+        self.renewer: Optional[asyncio.Task] = None
+        self.lost = False
+        # Runs whose outcome is already decided, so a late cancel must not requeue them
+        self.settled: Set[str] = set()
+
+    def lose(self) -> None:
+        """The lease lapsed: stop every job, which requeues itself."""
+        self.lost = True
+        for task in self.tasks:
+            task.cancel()
+
+
+class PlaybackWorker:
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        worker_id: str,
+        concurrency: int = 2,
+        pool: Optional[BrowserPool] = None,
+        pages_per_user: int = 3,
+    ):
+        self.redis = redis
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.pool = pool
+        self.pages_per_user = pages_per_user
+        self._sessions: Dict[int, _ProfileSession] = {}
+        self.processing_key = PROCESSING_KEY.format(worker_id)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def heartbeat(self, stop: asyncio.Event, interval: float = 5.0) -> None:
+        """Report free browser slots, which the scheduler admits runs against."""
+        while not stop.is_set():
+            try:
+                await report_capacity(self.redis, self.worker_id, self.concurrency, len(self._tasks))
+                await self.redis.sadd(PROCESSING_OWNERS_KEY, self.worker_id)
+                reclaimed = await self.reclaim_orphans()
+                if reclaimed:
+                    print(f"Worker {self.worker_id} requeued {reclaimed} jobs of dead workers")
+            except Exception as e:
+                print(f"Error reporting capacity: {str(e)}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _requeue(self, processing_key: str) -> int:
+        # Oldest jobs end up at the consuming end of the queue
+        requeued = 0
+        while await self.redis.lmove(processing_key, QUEUE_KEY, 'LEFT', 'RIGHT'):
+            requeued += 1
+        return requeued
+
+    async def recover(self) -> int:
+        """Requeue jobs a previous run of this worker left unfinished."""
+        return await self._requeue(self.processing_key)
+
+    async def reclaim_orphans(self) -> int:
+        """Requeue jobs held by workers whose heartbeat has lapsed."""
+        cutoff = time.time() - WORKER_TTL_SECONDS
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.smembers(PROCESSING_OWNERS_KEY)
+            pipe.zrangebyscore(WORKERS_KEY, cutoff, '+inf')
+            owners, live = await pipe.execute()
+        reclaimed = 0
+        for owner in set(owners) - set(live) - {self.worker_id}:
+            reclaimed += await self._requeue(PROCESSING_KEY.format(owner))
+            await self.redis.srem(PROCESSING_OWNERS_KEY, owner)
+        return reclaimed
+
+    async def run(self, stop: asyncio.Event) -> None:
+        # Be seen alive before owning a processing list, so no one reclaims it
+        await report_capacity(self.redis, self.worker_id, self.concurrency, 0)
+        await self.redis.sadd(PROCESSING_OWNERS_KEY, self.worker_id)
+        recovered = await self.recover()
+        if recovered:
+            print(f"Worker {self.worker_id} requeued {recovered} unfinished jobs")
+        while not stop.is_set():
+            await self._slots.acquire()
+            raw = await self.redis.blmove(QUEUE_KEY, self.processing_key, 1, 'RIGHT', 'LEFT')
+            if raw is None:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._handle(raw))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _enter_profile(self, user_id: int) -> Optional[_ProfileSession]:
+        """Join this worker's session on a user's profile, opening it if needed.
+
+        Returns None if another worker holds the profile or this user already
+        has pages_per_user routines running here.
+        """
+        session = self._sessions.get(user_id)
+        if session is None:
+            session = _ProfileSession(
+                ProfileLease(self.redis, user_id, self.worker_id, settings.PROFILE_LEASE_SECONDS)
+            )
+            self._sessions[user_id] = session
+            try:
+                session.acquired = await session.lease.acquire()
+                if session.acquired:
+                    session.renewer = session.lease.start_renewing(session.lose)
+            finally:
+                # Jobs waiting on this session must wake up even if Redis failed
+                if not session.acquired:
+                    self._sessions.pop(user_id, None)
+                session.ready.set()
+        else:
+            await session.ready.wait()
+        if not session.acquired or len(session.tasks) >= self.pages_per_user:
+            return None
+        session.tasks.add(asyncio.current_task())
+        return session
+
+    async def _leave_profile(self, user_id: int, session: _ProfileSession) -> None:
+        session.tasks.discard(asyncio.current_task())
+        if session.tasks or self._sessions.get(user_id) is not session:
+            return
+        del self._sessions[user_id]
+        session.renewer.cancel()
+        try:
+            # Whoever takes the lease next must be able to open the profile
+            if self.pool is not None:
+                await self.pool.discard(os.path.join(settings.BROWSER_DATA_DIR, str(user_id)))
+        finally:
+            await session.lease.release()
+
+    async def _handle(self, raw: str) -> None:
+        session = None
+        try:
+            job = json.loads(raw)
+            session = await self._enter_profile(job['user_id'])
+            if session is None:
+                # Profile busy elsewhere or at its page cap; go to the back of the line
+                await asyncio.sleep(LEASE_RETRY_SECONDS)
+                await self.redis.lpush(QUEUE_KEY, raw)
+                return
+            try:
+                await self.play(job, session)
+            finally:
+                await self._leave_profile(job['user_id'], session)
+        except asyncio.CancelledError:
+            # Only a lost lease cancels a job; anything else is shutdown
+            if session is not None and session.lost and job['run_id'] not in session.settled:
+                await self.redis.lpush(QUEUE_KEY, raw)
+            raise
+        except Exception as e:
+            print(f"Playback job failed: {str(e)}")
+        finally:
+            await self.redis.lrem(self.processing_key, 1, raw)
+            self._slots.release()
+
+    async def play(self, job: Dict[str, Any], session: Optional[_ProfileSession] = None) -> None:
+        """Run one job; a failed attempt is requeued to resume from its last checkpoint.
+
+        So is an attempt cancelled because `session` lost its profile lease.
+        """
+        attempt = job.get('attempt', 0)
+        progress = ProgressPublisher(self.redis, job['run_id'], seq=job.get('seq', 0))
+        async with AsyncSessionLocal() as db:
+            routine = await db.get(Routine, job['routine_id'])
+            if routine is None or routine.user_id != job['user_id']:
+                await progress.publish('failed', error="Routine not found")
+                return
+            steps = await step_store.plan(db, routine)
+            scope = plan_scope(routine)
+            resource_filter = ResourceFilter(profile=routine.lean_profile) if routine.lean_mode else None
+            checkpoints = CheckpointLog(self.redis, job['run_id'], scope)
+            await db.commit()
+
+        await progress.publish('started', worker_id=self.worker_id, total=len(steps), attempt=attempt)
+        automation = AutomationService(
+            os.path.join(settings.BROWSER_DATA_DIR, str(job['user_id'])), pool=self.pool
+        )
+        timings: List[Dict[str, Any]] = []
+        step_rows: List[Dict[str, Any]] = []
+
+        async def on_step(event: Dict[str, Any]) -> None:
+            timings.append({k: event[k] for k in ('index', 'type', 'strategy', 'url', 'duration', 'error')})
+            step_rows.append({
+                'step_index': event['index'],
+                'step_type': event['type'],
+                'strategy': event['strategy'],
+                'duration': event['duration'],
+                'error': event['error'],
+                'finished_at': datetime.utcnow(),
+            })
+            await progress.step(event)
+
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        startup = None
+        outcome = 'failed'
+        error = None
+        try:
+            await automation.start_browser()
+            startup = time.perf_counter() - started
+            start_at = await automation.resume_point(checkpoints) if attempt else 0
+            if start_at:
+                await progress.publish('resumed', start_at=start_at)
+            await automation.playback_routine(
+                steps,
+                routine_id=scope,
+                on_step=on_step,
+                resource_filter=resource_filter,
+                checkpoints=checkpoints,
+                start_at=start_at,
+            )
+            outcome = 'finished'
+            if session is not None:
+                session.settled.add(job['run_id'])
+        except asyncio.CancelledError:
+            if session is None or not session.lost:
+                raise
+            outcome = 'retrying'
+            error = "Profile lease lost"
+            session.settled.add(job['run_id'])
+            await progress.publish('retrying', attempt=attempt, error=error)
+            await self.redis.lpush(
+                QUEUE_KEY, json.dumps({**job, 'attempt': attempt + 1, 'seq': progress.seq})
+            )
+            raise
+        except Exception as e:
+            error = str(e)
+            if attempt + 1 < settings.PLAYBACK_MAX_ATTEMPTS:
+                outcome = 'retrying'
+                await progress.publish('retrying', attempt=attempt, error=str(e))
+                await self.redis.lpush(
+                    QUEUE_KEY, json.dumps({**job, 'attempt': attempt + 1, 'seq': progress.seq})
+                )
+                return
+            await progress.publish('failed', error=str(e))
+            await checkpoints.clear()
+            raise
+        finally:
+            await automation.close()
+            duration = time.perf_counter() - started
+            RUN_SECONDS.observe(duration, status=outcome)
+            await self._record_trace(job, outcome, duration, startup, timings)
+            run_history.record({
+                'run_id': job['run_id'],
+                'attempt': attempt,
+                'routine_id': job['routine_id'],
+                'user_id': job['user_id'],
+                'schedule_id': job.get('schedule_id'),
+                'worker_id': self.worker_id,
+                'status': outcome,
+                'started_at': started_at,
+                'finished_at': datetime.utcnow(),
+                'duration': duration,
+                'browser_startup': startup,
+                'steps_done': len(step_rows),
+                'error': error,
+            }, step_rows)
+        await checkpoints.clear()
+        await progress.publish(
+            'finished', lean=resource_filter.stats() if resource_filter else None
+        )
+
+    async def _record_trace(
+        self,
+        job: Dict[str, Any],
+        outcome: str,
+        duration: float,
+        startup: Optional[float],
+        timings: List[Dict[str, Any]],
+    ) -> None:
+        try:
+            await record_run_trace(self.redis, {
+                'run_id': job['run_id'],
+                'routine_id': job['routine_id'],
+                'user_id': job['user_id'],
+                'worker_id': self.worker_id,
+                'status': outcome,
+                'finished_at': time.time(),
+                'duration': duration,
+                'browser_startup': startup,
+                'steps': timings,
+            }, keep=settings.SLOW_RUNS_KEPT)
+        except Exception as e:
+            print(f"Error recording run trace: {str(e)}")
+
+
+async def main(worker_id: str, concurrency: int) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = PlaybackWorker(
+        get_redis(), worker_id, concurrency,
+        pool=browser_pool, pages_per_user=settings.PLAYBACK_PAGES_PER_USER,
+    )
+    print(f"Worker {worker_id} started with concurrency {concurrency}")
+    metrics.process = worker_id
+    metrics.gauge('dropfarm_worker_jobs_running', 'Playback jobs running on a worker.',
+                  lambda: len(worker._tasks))
+    maintenance = asyncio.create_task(
+        profile_manager.run_maintenance(settings.PROFILE_PRUNE_INTERVAL_SECONDS, stop)
+    )
+    flusher = asyncio.create_task(metrics.flush_forever(get_redis(), stop))
+    heartbeat = asyncio.create_task(worker.heartbeat(stop))
+    pool_maintenance = asyncio.create_task(browser_pool.run_maintenance(
+        settings.BROWSER_POOL_SWEEP_SECONDS, settings.BROWSER_POOL_IDLE_SECONDS, stop
+    ))
+    # Stopped only once running jobs have finished and recorded their history
+    history_stop = asyncio.Event()
+    history = asyncio.create_task(run_history.flush_forever(history_stop))
+    rollups = asyncio.create_task(run_history.rollup_forever(
+        get_redis(), stop, settings.HISTORY_ROLLUP_SECONDS,
+        timedelta(hours=settings.HISTORY_ROLLUP_LOOKBACK_HOURS),
+    ))
+    try:
+        await worker.run(stop)
+    finally:
+        maintenance.cancel()
+        heartbeat.cancel()
+        pool_maintenance.cancel()
+        rollups.cancel()
+        history_stop.set()
+        await asyncio.gather(flusher, history, return_exceptions=True)
+        await browser_pool.close()
+        await close_redis()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dropfarm playback worker")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY)
+    args = parser.parse_args()
+    asyncio.run(main(args.worker_id, args.concurrency))
@@ -0,0 +1,126 @@
+# backend/benchmarks/bulk_schedules.py
+"""
+Latency of creating, retiming and deactivating schedules in bulk vs one at a time
+filepath: backend/benchmarks/bulk_schedules.py
+
+Creates the app's tables in a scratch schema of the Postgres database in
+DATABASE_URL and drives the schedule endpoints directly, without HTTP:
+`--items` schedules through each bulk endpoint, and `--single` through
+POST /schedules one by one, as clients did before the bulk endpoints.
+Timers go to BENCH_REDIS_URL, a Redis database this benchmark flushes
+(default redis://localhost:6379/15). The scratch schema is dropped
+afterwards. Run from backend/ with:
+
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bulk_schedules --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from redis import asyncio as aioredis  # noqa: E402
+from sqlalchemy import insert, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.api.v1 import schedules as api  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db.base import Base, Routine, User  # noqa: E402
+from app.schemas.schedule import (  # noqa: E402
+    ScheduleBulkCreate, ScheduleBulkDeactivate, ScheduleBulkUpdate, ScheduleCreate,
+)
+from app.services.scheduler.job_manager import DUE_KEY, JobManager  # noqa: E402
+
+SCHEMA = 'bench_bulk'
+BENCH_REDIS_URL = os.environ.get("BENCH_REDIS_URL", "redis://localhost:6379/15")
+ROUTINES = 100
+
+
+async def timed(coro) -> float:
+    started = time.perf_counter()
+    await coro
+    return time.perf_counter() - started
+
+
+async def main(items: int, single: int) -> list:
+    engine = create_async_engine(
+        settings.DATABASE_URL, connect_args={'server_settings': {'search_path': SCHEMA}}
+    )
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    redis = aioredis.from_url(BENCH_REDIS_URL, decode_responses=True)
+    jobs = JobManager(redis)
+    user = SimpleNamespace(id=1)
+    results = []
+    try:
+        await redis.flushdb()
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(User), [{'id': 1, 'email': 'bench@example.com', 'hashed_password': ''}])
+            await conn.execute(insert(Routine), [
+                {'id': i, 'user_id': 1, 'name': f"routine {i}"} for i in range(1, ROUTINES + 1)
+            ])
+
+        def create_items(count: int):
+            return [ScheduleCreate(routine_id=i % ROUTINES + 1, interval_seconds=3600) for i in range(count)]
+
+        async with session_factory() as db:
+            elapsed = await timed(api.bulk_create_schedules(
+                ScheduleBulkCreate(items=create_items(items)), user, db, jobs
+            ))
+        results.append({'operation': 'create', 'mode': 'bulk', 'items': items, 'seconds': elapsed})
+
+        async with session_factory() as db:
+            async def one_by_one():
+                for item in create_items(single):
+                    await api.create_schedule(item, user, db, jobs)
+            elapsed = await timed(one_by_one())
+        results.append({'operation': 'create', 'mode': 'single', 'items': single, 'seconds': elapsed})
+
+        ids = [int(i) for i in await redis.zrange(DUE_KEY, 0, items - 1)]
+        async with session_factory() as db:
+            elapsed = await timed(api.bulk_update_schedules(
+                ScheduleBulkUpdate(items=[{'id': i, 'interval_seconds': 1800} for i in ids]), user, db, jobs
+            ))
+        results.append({'operation': 'update', 'mode': 'bulk', 'items': len(ids), 'seconds': elapsed})
+
+        async with session_factory() as db:
+            elapsed = await timed(api.bulk_deactivate_schedules(
+                ScheduleBulkDeactivate(ids=ids), user, db, jobs
+            ))
+        results.append({'operation': 'deactivate', 'mode': 'bulk', 'items': len(ids), 'seconds': elapsed})
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+        await redis.flushdb()
+        await redis.aclose()
+    for r in results:
+        r['seconds'] = round(r['seconds'], 3)
+        r['per_item_ms'] = round(r['seconds'] / r['items'] * 1000, 3) if r['items'] else None
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--single", type=int, default=1000)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+    results = asyncio.run(main(args.items, args.single))
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        for r in results:
+            print(
+                f"{r['operation']:>10} {r['mode']:>6} x{r['items']:>6}: {r['seconds']}s "
+                f"({r['per_item_ms']} ms per item)"
+            )
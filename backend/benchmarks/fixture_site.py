@@ -0,0 +1,162 @@
+# backend/benchmarks/fixture_site.py
+"""
+Local fixture web app for playback benchmarks
+filepath: backend/benchmarks/fixture_site.py
+
+Serves four kinds of page, each with BUTTONS buttons at fixed positions:
+
+    /static/<n>   buttons in the initial HTML
+    /delayed/<n>  buttons rendered after an XHR that takes XHR_DELAY_MS
+    /slow/<n>     buttons inserted after a timer of up to SLOW_MAX_MS
+    /heavy/<n>    static buttons plus HEAVY_ASSETS large images and a script
+
+Clicking a button only updates a counter, so every page stays put and
+routines are deterministic.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any
+from urllib.parse import urlparse, parse_qs
+import json
+import random
+import threading
+import time
+
+KINDS = ('static', 'delayed', 'slow', 'heavy')
+BUTTONS = 8
+XHR_DELAY_MS = 300
+SLOW_MAX_MS = 800
+HEAVY_ASSETS = 12
+HEAVY_ASSET_BYTES = 256 * 1024
+
+_BUTTON_STYLE = 'position:absolute;left:20px;width:200px;height:30px'
+
+_BUTTONS_JS = """
+function renderButtons(n) {
+  for (let i = 0; i < %(buttons)d; i++) {
+    const b = document.createElement('button');
+    b.id = 'btn-' + n + '-' + i;
+    b.textContent = 'Task ' + n + '.' + i;
+    b.style.cssText = '%(style)s;top:' + (60 + 40 * i) + 'px';
+    b.onclick = () => { document.getElementById('clicks').textContent++; };
+    document.body.appendChild(b);
+  }
+}
+""" % {'buttons': BUTTONS, 'style': _BUTTON_STYLE}
+
+
+def button_position(i: int) -> Dict[str, int]:
+    """Page coordinates of the centre of button i."""
+    return {'x': 120, 'y': 60 + 40 * i + 15}
+
+
+def _page(n: str, body: str, head: str = '') -> bytes:
+    return f"""<!doctype html>
+<html><head><title>Fixture {n}</title>{head}<script>{_BUTTONS_JS}</script></head>
+<body><span id="clicks">0</span>{body}</body></html>""".encode()
+
+
+def _render(kind: str, n: str) -> bytes:
+    if kind == 'static':
+        return _page(n, f"<script>renderButtons('{n}')</script>")
+    if kind == 'delayed':
+        return _page(n, f"""<script>
+fetch('/api/items?delay={XHR_DELAY_MS}').then(r => r.json()).then(() => renderButtons('{n}'));
+</script>""")
+    if kind == 'slow':
+        delay = random.Random(n).randint(SLOW_MAX_MS // 4, SLOW_MAX_MS)
+        return _page(n, f"<script>setTimeout(() => renderButtons('{n}'), {delay})</script>")
+    if kind == 'heavy':
+        images = ''.join(
+            f'<img src="/asset/{n}-{i}.png" width="1" height="1">' for i in range(HEAVY_ASSETS)
+        )
+        return _page(
+            n, f"<script>renderButtons('{n}')</script>{images}",
+            head=f'<script src="/asset/{n}-lib.js"></script>',
+        )
+    raise KeyError(kind)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, content_type: str, body: bytes, cache: bool = False) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'public, max-age=3600' if cache else 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] in KINDS:
+            self._send(200, 'text/html', _render(parts[0], parts[1]))
+        elif url.path == '/api/items':
+            delay = int(parse_qs(url.query).get('delay', ['0'])[0])
+            time.sleep(delay / 1000)
+            self._send(200, 'application/json', json.dumps({'items': list(range(BUTTONS))}).encode())
+        elif len(parts) == 2 and parts[0] == 'asset':
+            if parts[1].endswith('.js'):
+                body = b'//' + b'x' * HEAVY_ASSET_BYTES + b'\nwindow.fixtureLib = true;\n'
+                self._send(200, 'application/javascript', body, cache=True)
+            else:
+                self._send(200, 'image/png', b'\0' * HEAVY_ASSET_BYTES, cache=True)
+        else:
+            self._send(404, 'text/plain', b'not found')
+
+
+class FixtureSite:
+    """Fixture server on a free localhost port, run in a background thread."""
+
+    def __init__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FixtureSite":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def synthetic_routine(base_url: str, length: int, seed: int = 0, kinds=KINDS) -> List[Dict[str, Any]]:
+    """A recording-shaped routine of `length` steps over fixture pages.
+
+    Each page visit is a navigation followed by one to four clicks, shaped
+    like what the capture script records.
+    """
+    rng = random.Random(seed)
+    steps: List[Dict[str, Any]] = []
+    page = 0
+    while len(steps) < length:
+        kind = kinds[page % len(kinds)]
+        n = f"{seed}x{page}"
+        url = f"{base_url}/{kind}/{n}"
+        steps.append({'type': 'navigation', 'timestamp': '', 'url': url, 'status': 200})
+        for i in rng.sample(range(BUTTONS), rng.randint(1, 4)):
+            if len(steps) >= length:
+                break
+            steps.append({
+                'type': 'click',
+                'timestamp': '',
+                **button_position(i),
+                'element': {'id': f"btn-{n}-{i}", 'className': '', 'innerText': f"Task {n}.{i}", 'tag': 'button'},
+                'url': url,
+            })
+        page += 1
+    return steps
+
+
+def page_kind(url: str) -> str:
+    parts = urlparse(url or '').path.strip('/').split('/')
+    return parts[0] if parts and parts[0] in KINDS else 'other'
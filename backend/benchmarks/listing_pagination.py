@@ -0,0 +1,128 @@
+# backend/benchmarks/listing_pagination.py
+"""
+Per-page latency of schedule listings: keyset cursors vs OFFSET
+filepath: backend/benchmarks/listing_pagination.py
+
+Loads a generated dataset (a million schedules by default, half of them
+owned by one heavy user) into a scratch schema of the Postgres database in
+DATABASE_URL, with the indexes from migration 0005, and times fetching page
+N of that user's schedules both ways, plus the scheduler's due query. The
+scratch schema is dropped afterwards. Run from backend/ with:
+
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.listing_pagination --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+
+SCHEMA = 'bench_listing'
+HEAVY_USER = 1
+PAGE_SIZE = 50
+
+SETUP = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"SET search_path TO {SCHEMA}",
+    """CREATE TABLE schedules (
+        id SERIAL PRIMARY KEY,
+        routine_id INTEGER,
+        user_id INTEGER,
+        interval_seconds INTEGER,
+        is_active BOOLEAN,
+        last_run TIMESTAMP,
+        next_run TIMESTAMP,
+        created_at TIMESTAMP
+    )""",
+    # Half the rows belong to one user, the rest are spread over many
+    """INSERT INTO schedules (routine_id, user_id, interval_seconds, is_active, next_run, created_at)
+       SELECT g % 50000, CASE WHEN g % 2 = 0 THEN 1 ELSE 2 + g % 20000 END,
+              (ARRAY[14400, 28800, 86400])[1 + g % 3], g % 10 <> 0,
+              now() + (g % 86400) * interval '1 second', now()
+       FROM generate_series(1, :rows) AS g""",
+    "CREATE INDEX ix_schedules_user_id_id ON schedules (user_id, id)",
+    "CREATE INDEX ix_schedules_is_active_next_run ON schedules (is_active, next_run)",
+    "ANALYZE schedules",
+]
+
+COLUMNS = "id, routine_id, interval_seconds, is_active, last_run, next_run, created_at"
+OFFSET_QUERY = f"""SELECT {COLUMNS} FROM schedules WHERE user_id = :user
+    ORDER BY id DESC LIMIT :limit OFFSET :offset"""
+KEYSET_QUERY = f"""SELECT {COLUMNS} FROM schedules WHERE user_id = :user AND id < :last_id
+    ORDER BY id DESC LIMIT :limit"""
+DUE_QUERY = """SELECT id FROM schedules WHERE is_active AND next_run <= now() + interval '1 hour'
+    ORDER BY next_run LIMIT 500"""
+
+
+async def timed(conn, query: str, params: dict, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await conn.execute(text(query), params)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+async def main(rows: int, pages, repeat: int) -> list:
+    engine = create_async_engine(settings.DATABASE_URL)
+    results = []
+    try:
+        async with engine.begin() as conn:
+            for statement in SETUP:
+                await conn.execute(text(statement), {'rows': rows})
+        async with engine.connect() as conn:
+            await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+            for page in pages:
+                offset = (page - 1) * PAGE_SIZE
+                # The cursor a client would hold for this page: the last id of the one before
+                last_id = (await conn.execute(
+                    text(f"SELECT id FROM schedules WHERE user_id = :user ORDER BY id DESC "
+                         f"LIMIT 1 OFFSET :offset"),
+                    {'user': HEAVY_USER, 'offset': max(0, offset - 1)},
+                )).scalar()
+                if last_id is None:
+                    break
+                if page == 1:
+                    last_id += 1
+                base = {'user': HEAVY_USER, 'limit': PAGE_SIZE}
+                results.append({
+                    'page': page,
+                    'offset_ms': round(await timed(conn, OFFSET_QUERY, {**base, 'offset': offset}, repeat) * 1000, 2),
+                    'keyset_ms': round(await timed(conn, KEYSET_QUERY, {**base, 'last_id': last_id}, repeat) * 1000, 2),
+                })
+            results.append({'due_query_ms': round(await timed(conn, DUE_QUERY, {}, repeat) * 1000, 2)})
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 5000, 9000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+    results = asyncio.run(main(args.rows, args.pages, args.repeat))
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        for r in results:
+            if 'page' in r:
+                print(f"page {r['page']:>5}: offset {r['offset_ms']:>8} ms, keyset {r['keyset_ms']:>6} ms")
+            else:
+                print(f"due query: {r['due_query_ms']} ms")
@@ -0,0 +1,95 @@
+# backend/benchmarks/steps_encoding.py
+"""
+Size and decode time of Routine.steps: JSON vs msgpack+zstd
+filepath: backend/benchmarks/steps_encoding.py
+
+Run from backend/ with:
+
+    python -m benchmarks.steps_encoding --json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.db.types import encode_steps, iter_steps
+
+SITES = [f"https://airdrop{i}.example.com" for i in range(5)]
+LABELS = ["Claim", "Connect wallet", "Continue", "Start farming", "Collect reward", "Next"]
+
+
+def synthetic_steps(count: int, seed: int = 0) -> list:
+    """Steps shaped like real recordings: mostly clicks, some navigations."""
+    rng = random.Random(seed)
+    started = datetime(2026, 1, 1)
+    steps = []
+    for i in range(count):
+        site = rng.choice(SITES)
+        timestamp = (started + timedelta(seconds=i * 1.7)).isoformat()
+        if rng.random() < 0.15:
+            steps.append({
+                'type': 'navigation',
+                'timestamp': timestamp,
+                'url': f"{site}/task/{rng.randint(1, 50)}",
+                'status': 200,
+            })
+        else:
+            label = rng.choice(LABELS)
+            steps.append({
+                'type': 'click',
+                'timestamp': timestamp,
+                'x': rng.randint(0, 1280),
+                'y': rng.randint(0, 720),
+                'element': {
+                    'id': f"btn-{label.lower().replace(' ', '-')}",
+                    'className': 'btn',
+                    'innerText': label,
+                    'tag': 'button',
+                },
+                'url': f"{site}/task/{rng.randint(1, 50)}",
+            })
+    return steps
+
+
+def timed(func, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure(count: int) -> dict:
+    steps = synthetic_steps(count)
+    as_json = json.dumps(steps).encode('utf-8')
+    encoded = encode_steps(steps)
+    return {
+        'steps': count,
+        'json_bytes': len(as_json),
+        'encoded_bytes': len(encoded),
+        'size_ratio': round(len(as_json) / len(encoded), 1),
+        'json_decode_ms': round(timed(lambda: json.loads(as_json)) * 1000, 3),
+        'encoded_decode_ms': round(timed(lambda: list(iter_steps(encoded))) * 1000, 3),
+        'encoded_first_step_ms': round(timed(lambda: next(iter_steps(encoded))) * 1000, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1000, 10000])
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+    results = [measure(n) for n in args.sizes]
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        for r in results:
+            print(
+                f"{r['steps']:>6} steps: json {r['json_bytes']:>9} B / {r['json_decode_ms']} ms, "
+                f"encoded {r['encoded_bytes']:>8} B / {r['encoded_decode_ms']} ms "
+                f"(first step {r['encoded_first_step_ms']} ms), {r['size_ratio']}x smaller"
+            )
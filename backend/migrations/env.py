@@ -14,6 +14,8 @@ from app.db.base_class import Base
 from app.models.user import User  # noqa
 from app.models.routine import Routine  # noqa
 from app.models.schedule import Schedule  # noqa
+from app.models.run import Run, RunStep, RoutineRunStats, StepRunStats  # noqa
+from app.models.step_chunk import StepChunk  # noqa
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,28 @@
+"""routine compiled steps
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('routines', sa.Column('compiled_steps', sa.JSON(), nullable=True))
+    op.add_column('routines', sa.Column('compiled_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('routines', 'compiled_version')
+    op.drop_column('routines', 'compiled_steps')
@@ -0,0 +1,68 @@
+"""compressed routine steps
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.types import encode_steps, iter_steps
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+STEP_COLUMNS = ('steps', 'compiled_steps')
+
+
+def _convert(source_type, target_type, convert) -> None:
+    """Copy every step column into a `<name>_new` column, batch by batch."""
+    for name in STEP_COLUMNS:
+        op.add_column('routines', sa.Column(f'{name}_new', target_type, nullable=True))
+
+    routines = sa.table(
+        'routines',
+        sa.column('id', sa.Integer),
+        *(sa.column(name, source_type) for name in STEP_COLUMNS),
+        *(sa.column(f'{name}_new', target_type) for name in STEP_COLUMNS),
+    )
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(routines.c.id, *(routines.c[name] for name in STEP_COLUMNS))
+            .where(routines.c.id > last_id)
+            .order_by(routines.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            values = {
+                f'{name}_new': convert(getattr(row, name))
+                for name in STEP_COLUMNS
+                if getattr(row, name) is not None
+            }
+            if values:
+                bind.execute(routines.update().where(routines.c.id == row.id).values(**values))
+        last_id = rows[-1].id
+
+    for name in STEP_COLUMNS:
+        op.drop_column('routines', name)
+        op.alter_column('routines', f'{name}_new', new_column_name=name)
+
+
+def upgrade() -> None:
+    _convert(sa.JSON(), sa.LargeBinary(), encode_steps)
+
+
+def downgrade() -> None:
+    _convert(sa.LargeBinary(), sa.JSON(), lambda data: list(iter_steps(data)))
@@ -0,0 +1,28 @@
+"""routine lean mode
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('routines', sa.Column('lean_mode', sa.Boolean(), nullable=True, server_default=sa.false()))
+    op.add_column('routines', sa.Column('lean_profile', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('routines', 'lean_profile')
+    op.drop_column('routines', 'lean_mode')
@@ -0,0 +1,59 @@
+"""schedule owner and listing indexes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+# (name, table, columns)
+INDEXES = (
+    ('ix_schedules_user_id_id', 'schedules', ['user_id', 'id']),
+    ('ix_schedules_is_active_next_run', 'schedules', ['is_active', 'next_run']),
+    ('ix_routines_user_id_id', 'routines', ['user_id', 'id']),
+)
+
+
+def upgrade() -> None:
+    op.add_column('schedules', sa.Column('user_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_schedules_user_id_users', 'schedules', 'users', ['user_id'], ['id'])
+
+    # Backfill owners from routines in id ranges, so no single statement
+    # rewrites the whole table
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text('SELECT COALESCE(MAX(id), 0) FROM schedules')).scalar()
+    for start in range(0, max_id, BATCH_SIZE):
+        bind.execute(
+            sa.text(
+                'UPDATE schedules SET user_id = routines.user_id FROM routines '
+                'WHERE schedules.routine_id = routines.id '
+                'AND schedules.id > :start AND schedules.id <= :end'
+            ),
+            {'start': start, 'end': start + BATCH_SIZE},
+        )
+
+    # Built concurrently so large tables stay writable meanwhile
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    op.drop_constraint('fk_schedules_user_id_users', 'schedules', type_='foreignkey')
+    op.drop_column('schedules', 'user_id')
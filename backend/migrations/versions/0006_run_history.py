@@ -0,0 +1,94 @@
+"""run history and rollups
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _routine_fk() -> sa.ForeignKey:
+    return sa.ForeignKey('routines.id', ondelete='CASCADE')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'runs',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('run_id', sa.String(length=32), nullable=True),
+        sa.Column('attempt', sa.Integer(), nullable=True),
+        sa.Column('routine_id', sa.Integer(), _routine_fk(), nullable=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('schedule_id', sa.Integer(), nullable=True),
+        sa.Column('worker_id', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration', sa.Float(), nullable=True),
+        sa.Column('browser_startup', sa.Float(), nullable=True),
+        sa.Column('steps_done', sa.Integer(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+    )
+    op.create_index('ix_runs_run_id', 'runs', ['run_id'])
+    op.create_index('ix_runs_routine_id_id', 'runs', ['routine_id', 'id'])
+    op.create_index('ix_runs_finished_at', 'runs', ['finished_at'])
+
+    op.create_table(
+        'run_steps',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('run_id', sa.String(length=32), nullable=True),
+        sa.Column('attempt', sa.Integer(), nullable=True),
+        sa.Column('routine_id', sa.Integer(), _routine_fk(), nullable=True),
+        sa.Column('step_index', sa.Integer(), nullable=True),
+        sa.Column('step_type', sa.String(), nullable=True),
+        sa.Column('strategy', sa.String(), nullable=True),
+        sa.Column('duration', sa.Float(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_run_steps_run_id_attempt', 'run_steps', ['run_id', 'attempt'])
+    op.create_index('ix_run_steps_finished_at', 'run_steps', ['finished_at'])
+
+    op.create_table(
+        'routine_run_stats',
+        sa.Column('routine_id', sa.Integer(), _routine_fk(), primary_key=True),
+        sa.Column('bucket', sa.DateTime(), primary_key=True),
+        sa.Column('runs', sa.Integer(), nullable=True),
+        sa.Column('succeeded', sa.Integer(), nullable=True),
+        sa.Column('p50_seconds', sa.Float(), nullable=True),
+        sa.Column('p95_seconds', sa.Float(), nullable=True),
+    )
+    op.create_table(
+        'step_run_stats',
+        sa.Column('routine_id', sa.Integer(), _routine_fk(), primary_key=True),
+        sa.Column('step_index', sa.Integer(), primary_key=True),
+        sa.Column('bucket', sa.DateTime(), primary_key=True),
+        sa.Column('step_type', sa.String(), nullable=True),
+        sa.Column('runs', sa.Integer(), nullable=True),
+        sa.Column('failed', sa.Integer(), nullable=True),
+        sa.Column('p50_seconds', sa.Float(), nullable=True),
+        sa.Column('p95_seconds', sa.Float(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('step_run_stats')
+    op.drop_table('routine_run_stats')
+    op.drop_index('ix_run_steps_finished_at', table_name='run_steps')
+    op.drop_index('ix_run_steps_run_id_attempt', table_name='run_steps')
+    op.drop_table('run_steps')
+    op.drop_index('ix_runs_finished_at', table_name='runs')
+    op.drop_index('ix_runs_routine_id_id', table_name='runs')
+    op.drop_index('ix_runs_run_id', table_name='runs')
+    op.drop_table('runs')
@@ -0,0 +1,162 @@
+"""content-addressed step chunks
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.db.chunks import join_volatile, sequence_digest, split_chunks, split_volatile
+from app.db.types import encode_steps, iter_steps
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+routines = sa.table(
+    'routines',
+    sa.column('id', sa.Integer),
+    sa.column('steps', sa.LargeBinary),
+    sa.column('compiled_steps', sa.LargeBinary),
+    sa.column('step_refs', sa.JSON),
+    sa.column('step_timestamps', sa.LargeBinary),
+    sa.column('steps_digest', sa.String),
+    sa.column('compiled_refs', sa.JSON),
+)
+chunks = sa.table(
+    'step_chunks',
+    sa.column('digest', sa.String),
+    sa.column('steps', sa.LargeBinary),
+    sa.column('step_count', sa.Integer),
+    sa.column('size', sa.Integer),
+    sa.column('ref_count', sa.Integer),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+def _batches(bind, *columns):
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(routines.c.id, *columns)
+            .where(routines.c.id > last_id)
+            .order_by(routines.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table(
+        'step_chunks',
+        sa.Column('digest', sa.String(length=64), primary_key=True),
+        sa.Column('steps', sa.LargeBinary(), nullable=True),
+        sa.Column('step_count', sa.Integer(), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.add_column('routines', sa.Column('step_refs', sa.JSON(), nullable=True))
+    op.add_column('routines', sa.Column('step_timestamps', sa.LargeBinary(), nullable=True))
+    op.add_column('routines', sa.Column('steps_digest', sa.String(length=64), nullable=True))
+    op.add_column('routines', sa.Column('compiled_refs', sa.JSON(), nullable=True))
+    op.create_index('ix_routines_steps_digest', 'routines', ['steps_digest'])
+
+    bind = op.get_bind()
+    upsert = postgresql.insert(chunks)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=['digest'],
+        set_={'ref_count': chunks.c.ref_count + upsert.excluded.ref_count},
+    )
+    for rows in _batches(bind, routines.c.steps, routines.c.compiled_steps):
+        refs = Counter()
+        contents = {}
+
+        def store(data):
+            content, timestamps = split_volatile(iter_steps(data))
+            parts = split_chunks(content)
+            contents.update(parts)
+            digests = [digest for digest, _ in parts]
+            refs.update(digests)
+            return digests, timestamps
+
+        for row in rows:
+            values = {}
+            if row.steps is not None:
+                step_refs, timestamps = store(row.steps)
+                timestamps = timestamps if any(t is not None for t in timestamps) else None
+                values.update(
+                    step_refs=step_refs,
+                    step_timestamps=encode_steps(timestamps) if timestamps else None,
+                    steps_digest=sequence_digest(step_refs, timestamps),
+                )
+            if row.compiled_steps is not None:
+                values['compiled_refs'], _ = store(row.compiled_steps)
+            if values:
+                bind.execute(routines.update().where(routines.c.id == row.id).values(**values))
+
+        now = datetime.utcnow()
+        chunk_rows = []
+        for digest in sorted(refs):
+            data = encode_steps(contents[digest])
+            chunk_rows.append({
+                'digest': digest,
+                'steps': data,
+                'step_count': len(contents[digest]),
+                'size': len(data),
+                'ref_count': refs[digest],
+                'created_at': now,
+            })
+        if chunk_rows:
+            bind.execute(upsert, chunk_rows)
+
+    op.drop_column('routines', 'steps')
+    op.drop_column('routines', 'compiled_steps')
+
+
+def downgrade() -> None:
+    op.add_column('routines', sa.Column('steps', sa.LargeBinary(), nullable=True))
+    op.add_column('routines', sa.Column('compiled_steps', sa.LargeBinary(), nullable=True))
+
+    bind = op.get_bind()
+    for rows in _batches(bind, routines.c.step_refs, routines.c.step_timestamps, routines.c.compiled_refs):
+        wanted = {d for row in rows for d in (row.step_refs or []) + (row.compiled_refs or [])}
+        decoded = {
+            digest: list(iter_steps(data))
+            for digest, data in bind.execute(
+                sa.select(chunks.c.digest, chunks.c.steps).where(chunks.c.digest.in_(wanted))
+            )
+        } if wanted else {}
+        for row in rows:
+            values = {}
+            if row.step_refs is not None:
+                # Copies: join_volatile writes in place and chunks repeat across rows
+                steps = [dict(s) for d in row.step_refs for s in decoded[d]]
+                timestamps = list(iter_steps(row.step_timestamps)) if row.step_timestamps else None
+                values['steps'] = encode_steps(join_volatile(steps, timestamps))
+            if row.compiled_refs is not None:
+                values['compiled_steps'] = encode_steps([s for d in row.compiled_refs for s in decoded[d]])
+            if values:
+                bind.execute(routines.update().where(routines.c.id == row.id).values(**values))
+
+    op.drop_index('ix_routines_steps_digest', table_name='routines')
+    op.drop_column('routines', 'compiled_refs')
+    op.drop_column('routines', 'steps_digest')
+    op.drop_column('routines', 'step_timestamps')
+    op.drop_column('routines', 'step_refs')
+    op.drop_table('step_chunks')
@@ -0,0 +1,38 @@
+# tests/test_asset_cache.py
+"""
+Which responses the shared asset cache may store, and for how long
+filepath: backend/tests/test_asset_cache.py
+"""
+from app.services.automation.asset_cache import freshness
+
+NOW = 1_700_000_000.0
+
+
+def test_max_age_sets_expiry_and_s_maxage_is_ignored():
+    assert freshness({'cache-control': 'public, max-age=600'}, NOW) == NOW + 600
+    assert freshness({'cache-control': 's-maxage=86400, max-age=60'}, NOW) == NOW + 60
+    assert freshness({'cache-control': 'public, s-maxage=86400'}, NOW) is None
+    assert freshness({'cache-control': 's-maxage=86400', 'etag': '"v1"'}, NOW) == 0.0
+
+
+def test_responses_meant_for_one_user_are_not_stored():
+    assert freshness({'cache-control': 'private, max-age=600'}, NOW) is None
+    assert freshness({'cache-control': 'max-age=600', 'set-cookie': 'a=b'}, NOW) is None
+
+
+def test_responses_varying_on_more_than_encoding_are_not_stored():
+    assert freshness({'cache-control': 'max-age=600', 'vary': 'Accept-Encoding'}, NOW) == NOW + 600
+    assert freshness({'cache-control': 'max-age=600', 'vary': 'Origin'}, NOW) is None
+    assert freshness({'cache-control': 'max-age=600', 'vary': 'Accept, Accept-Encoding'}, NOW) is None
+
+
+def test_cors_grants_to_one_origin_are_not_replayed():
+    assert freshness({'cache-control': 'max-age=600', 'access-control-allow-origin': '*'}, NOW) == NOW + 600
+    assert freshness({
+        'cache-control': 'max-age=600', 'access-control-allow-origin': 'https://a.example',
+    }, NOW) is None
+
+
+def test_no_cache_needs_a_validator():
+    assert freshness({'cache-control': 'no-cache', 'etag': '"v1"'}, NOW) == 0.0
+    assert freshness({'cache-control': 'no-cache'}, NOW) is None
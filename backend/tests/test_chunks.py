@@ -0,0 +1,56 @@
+# tests/test_chunks.py
+"""
+Content-defined chunking of step sequences and their volatile fields
+filepath: backend/tests/test_chunks.py
+"""
+from app.db.chunks import (
+    CHUNK_MAX_STEPS, CHUNK_MIN_STEPS, join_volatile, sequence_digest, split_chunks, split_volatile,
+)
+
+
+def _steps(count: int) -> list:
+    return [
+        {'url': f"https://a.test/{i}", 'type': 'click', 'x': i,
+         'timestamp': f"2026-01-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z"}
+        for i in range(count)
+    ]
+
+
+def test_volatile_fields_split_off_and_back_on():
+    steps = _steps(50)
+    content, timestamps = split_volatile(steps)
+
+    assert all('timestamp' not in step for step in content)
+    assert join_volatile([dict(s) for s in content], timestamps) == steps
+
+
+def test_canonical_content_ignores_key_order():
+    a, _ = split_volatile([{'type': 'click', 'element': {'id': 'x', 'tag': 'a'}}])
+    b, _ = split_volatile([{'element': {'tag': 'a', 'id': 'x'}, 'type': 'click'}])
+    assert split_chunks(a) == split_chunks(b)
+
+
+def test_chunks_concatenate_back_to_the_sequence_within_size_bounds():
+    content, _ = split_volatile(_steps(2000))
+    chunks = split_chunks(content)
+
+    assert [step for _, chunk in chunks for step in chunk] == content
+    assert all(CHUNK_MIN_STEPS <= len(chunk) <= CHUNK_MAX_STEPS for _, chunk in chunks[:-1])
+
+
+def test_an_edit_only_changes_the_chunks_around_it():
+    content, _ = split_volatile(_steps(2000))
+    edited = list(content)
+    edited[1000] = {**edited[1000], 'x': -1}
+
+    before = [digest for digest, _ in split_chunks(content)]
+    after = [digest for digest, _ in split_chunks(edited)]
+
+    assert len(set(before) - set(after)) <= 2
+    assert before[0] == after[0] and before[-1] == after[-1]
+
+
+def test_sequence_digest_includes_timing():
+    refs = [digest for digest, _ in split_chunks(split_volatile(_steps(10))[0])]
+    assert sequence_digest(refs, ['t1']) != sequence_digest(refs, ['t2'])
+    assert sequence_digest(refs) == sequence_digest(refs, None)
@@ -0,0 +1,81 @@
+# tests/test_compiler.py
+"""
+Compiling recordings into plans and checking stored plans against them
+filepath: backend/tests/test_compiler.py
+"""
+from app.services.automation.compiler import (
+    COMPILER_VERSION, best_locator, compile_routine, plans_equivalent,
+)
+
+
+def _click(ts: str, element: dict, x: int = 10, y: int = 20) -> dict:
+    return {'type': 'click', 'timestamp': f"2026-01-01T12:00:{ts}Z", 'x': x, 'y': y,
+            'element': element, 'url': 'https://example.test/'}
+
+
+def _navigation(ts: str, url: str) -> dict:
+    return {'type': 'navigation', 'timestamp': f"2026-01-01T12:00:{ts}Z", 'url': url, 'status': 200}
+
+
+RECORDING = [
+    _navigation('00.000', 'https://example.test/login'),
+    _navigation('00.500', 'https://example.test/'),  # redirect
+    _click('03.000', {'id': 'claim', 'className': 'btn', 'innerText': 'Claim', 'tag': 'button'}),
+    _click('03.100', {'id': 'claim', 'className': 'btn', 'innerText': 'Claim', 'tag': 'button'}),  # double click
+    _click('05.000', {'id': '', 'className': '', 'innerText': '', 'tag': 'body'}),  # background
+    _click('07.000', {'id': '', 'className': 'btn primary', 'innerText': 'Next', 'tag': 'a'}),
+]
+
+
+def test_compile_drops_redirects_duplicate_and_background_clicks():
+    compiled = compile_routine(RECORDING)
+
+    assert compiled['version'] == COMPILER_VERSION
+    assert [(s['type'], s.get('url')) for s in compiled['steps']] == [
+        ('navigation', 'https://example.test/'),
+        ('click', 'https://example.test/'),
+        ('click', 'https://example.test/'),
+    ]
+    assert all('timestamp' not in s for s in compiled['steps'])
+    assert [s.get('wait_hint') for s in compiled['steps']] == [2.5, 4.0, None]
+
+
+def test_locators_come_from_the_field_that_holds_them():
+    assert best_locator({'element': {'id': 'go', 'className': 'btn'}}) == {'strategy': 'id', 'selector': '#go'}
+    assert best_locator({'element': {'id': '', 'className': 'btn', 'innerText': 'Go'}}) == \
+        {'strategy': 'text', 'selector': 'text=Go'}
+    # A class is never mistaken for an id
+    assert best_locator({'element': {'id': '', 'className': 'btn primary'}}) == \
+        {'strategy': 'class', 'selector': '.btn.primary'}
+    assert best_locator({'element': {'id': '', 'className': ''}}) == {'strategy': 'coords', 'selector': None}
+
+
+def test_a_fresh_plan_is_equivalent_to_its_recording():
+    assert plans_equivalent(RECORDING, compile_routine(RECORDING))
+
+
+def test_plans_from_other_compiler_versions_are_not_equivalent():
+    compiled = compile_routine(RECORDING)
+    assert not plans_equivalent(RECORDING, {**compiled, 'version': COMPILER_VERSION - 1})
+    assert not plans_equivalent(RECORDING, None)
+
+
+def test_plans_that_act_differently_are_not_equivalent():
+    compiled = compile_routine(RECORDING)
+    dropped = {**compiled, 'steps': compiled['steps'][:-1]}
+    reordered = {**compiled, 'steps': [compiled['steps'][0], compiled['steps'][2], compiled['steps'][1]]}
+    assert not plans_equivalent(RECORDING, dropped)
+    assert not plans_equivalent(RECORDING, reordered)
+
+
+def test_plans_with_steps_not_in_the_recording_are_not_equivalent():
+    compiled = compile_routine(RECORDING)
+    forged = [dict(s) for s in compiled['steps']]
+    forged[1]['source_hash'] = '0' * 16
+    assert not plans_equivalent(RECORDING, {**compiled, 'steps': forged})
+
+
+def test_an_edited_recording_no_longer_matches_its_old_plan():
+    compiled = compile_routine(RECORDING)
+    edited = RECORDING[:-1] + [_click('07.000', {'id': 'other', 'className': '', 'innerText': '', 'tag': 'a'})]
+    assert not plans_equivalent(edited, compiled)
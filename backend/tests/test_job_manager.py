@@ -0,0 +1,167 @@
+# tests/test_job_manager.py
+"""
+Scheduling, atomic popping and cancelling of schedule timers
+filepath: backend/tests/test_job_manager.py
+"""
+from datetime import datetime, timezone
+import json
+
+import pytest
+
+from app.models.schedule import Schedule
+from app.services.automation.jobs import QUEUE_KEY
+from app.services.scheduler.job_manager import (
+    ADMISSION_TTL_SECONDS, ADMITTED_KEY, DUE_KEY, JOBS_KEY, USER_KEY, JobManager, _epoch,
+)
+
+NOW = 1_700_000_000.0
+
+
+def _schedule(id: int, interval: int, next_run: float, routine_id: int = 7, user_id: int = 3) -> Schedule:
+    return Schedule(
+        id=id,
+        routine_id=routine_id,
+        user_id=user_id,
+        interval_seconds=interval,
+        is_active=True,
+        next_run=datetime.utcfromtimestamp(next_run),
+    )
+
+
+def test_naive_times_are_utc():
+    stored = datetime(2026, 1, 1, 12, 0, 0)
+    assert _epoch(stored) == datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc).timestamp()
+    assert datetime.utcfromtimestamp(_epoch(stored)) == stored
+
+
+@pytest.mark.asyncio
+async def test_pop_due_takes_due_jobs_and_requeues_the_next_run(redis):
+    jobs = JobManager(redis)
+    await jobs.schedule_many([_schedule(1, 60, NOW - 10), _schedule(2, 60, NOW + 30)])
+
+    popped = await jobs.pop_due(now=NOW)
+
+    assert [(j['schedule_id'], j['routine_id'], j['user_id']) for j in popped] == [(1, 7, 3)]
+    assert popped[0]['scheduled_at'] == NOW - 10
+    assert popped[0]['lag'] == 10
+    assert popped[0]['next_run'] == NOW + 50
+    assert await redis.zscore(DUE_KEY, 1) == NOW + 50
+    assert await redis.zscore(DUE_KEY, 2) == NOW + 30
+    assert await jobs.pop_due(now=NOW) == []
+
+
+@pytest.mark.asyncio
+async def test_pop_due_skips_missed_slots_instead_of_bursting(redis):
+    jobs = JobManager(redis)
+    await jobs.schedule_routine(_schedule(1, 60, NOW - 250))
+
+    assert len(await jobs.pop_due(now=NOW)) == 1
+    # Slots at -190, -130, -70 and -10 were missed; the next one is +50
+    assert await redis.zscore(DUE_KEY, 1) == NOW + 50
+    assert await jobs.pop_due(now=NOW) == []
+
+
+@pytest.mark.asyncio
+async def test_pop_due_limit_takes_the_most_overdue_first(redis):
+    jobs = JobManager(redis)
+    await jobs.schedule_many([
+        _schedule(1, 3600, NOW - 600),  # a sixth of its interval late
+        _schedule(2, 60, NOW - 30),     # half its interval late
+        _schedule(3, 600, NOW - 60),    # a tenth of its interval late
+    ])
+
+    popped = await jobs.pop_due(now=NOW, limit=2)
+
+    assert [j['schedule_id'] for j in popped] == [2, 1]
+    # The one left out stays due at its original time
+    assert await redis.zscore(DUE_KEY, 3) == NOW - 60
+    assert [j['schedule_id'] for j in await jobs.pop_due(now=NOW)] == [3]
+
+
+@pytest.mark.asyncio
+async def test_pop_due_drops_timers_of_cancelled_jobs(redis):
+    jobs = JobManager(redis)
+    await redis.zadd(DUE_KEY, {'9': NOW - 1})
+
+    assert await jobs.pop_due(now=NOW) == []
+    assert await redis.zscore(DUE_KEY, 9) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_pops_fire_each_run_once(redis):
+    jobs = JobManager(redis)
+    other = JobManager(redis)
+    await jobs.schedule_many([_schedule(i, 60, NOW - 1) for i in range(1, 51)])
+
+    first = await jobs.pop_due(now=NOW, batch_size=30)
+    second = await other.pop_due(now=NOW, batch_size=30)
+
+    ids = [j['schedule_id'] for j in first + second]
+    assert sorted(ids) == list(range(1, 51))
+
+
+@pytest.mark.asyncio
+async def test_dispatchers_share_the_fleets_slots(redis):
+    jobs = JobManager(redis)
+    other = JobManager(redis)
+    await jobs.schedule_many([_schedule(i, 60, NOW - 1) for i in range(1, 11)])
+    await redis.lpush(QUEUE_KEY, 'queued')
+
+    # Both read 5 idle slots before either has queued anything
+    first = await jobs.pop_due(now=NOW, slots=5)
+    second = await other.pop_due(now=NOW, slots=5)
+
+    assert len(first) + len(second) == 4
+    assert await redis.zcard(ADMITTED_KEY) == 4
+    await jobs.release_admissions(first + second)
+    assert await redis.zcard(ADMITTED_KEY) == 0
+
+
+@pytest.mark.asyncio
+async def test_admissions_of_dead_dispatchers_expire(redis):
+    jobs = JobManager(redis)
+    await jobs.schedule_many([_schedule(i, 60, NOW - 1) for i in range(1, 4)])
+
+    assert len(await jobs.pop_due(now=NOW, slots=2)) == 2  # never released
+    assert await jobs.pop_due(now=NOW, slots=2) == []
+    assert len(await jobs.pop_due(now=NOW + ADMISSION_TTL_SECONDS + 1, slots=2)) == 1
+
+
+@pytest.mark.asyncio
+async def test_rescheduling_moves_the_existing_timer(redis):
+    jobs = JobManager(redis)
+    await jobs.schedule_routine(_schedule(1, 60, NOW + 10))
+
+    schedule = _schedule(1, 120, NOW + 500)
+    await jobs.schedule_routine(schedule)
+
+    assert await redis.zcard(DUE_KEY) == 1
+    assert await redis.zscore(DUE_KEY, 1) == NOW + 500
+    assert json.loads(await redis.hget(JOBS_KEY, 1))['interval_seconds'] == 120
+    listed = await jobs.list_active_jobs(3)
+    assert [(j['schedule_id'], j['next_run']) for j in listed] == [(1, schedule.next_run)]
+
+
+@pytest.mark.asyncio
+async def test_cancel_schedule_removes_every_trace(redis):
+    jobs = JobManager(redis)
+    await jobs.schedule_many([_schedule(1, 60, NOW - 1), _schedule(2, 60, NOW - 1)])
+
+    assert await jobs.cancel_schedule(1) is True
+    assert await jobs.cancel_schedule(1) is False
+
+    assert await redis.zscore(DUE_KEY, 1) is None
+    assert await redis.hget(JOBS_KEY, 1) is None
+    assert await redis.smembers(USER_KEY.format(3)) == {'2'}
+    assert [j['schedule_id'] for j in await jobs.pop_due(now=NOW)] == [2]
+
+
+@pytest.mark.asyncio
+async def test_cancel_many_removes_only_the_given_jobs(redis):
+    jobs = JobManager(redis)
+    await jobs.schedule_many([_schedule(i, 60, NOW + i) for i in range(1, 4)])
+
+    await jobs.cancel_many([1, 3])
+
+    assert [j['schedule_id'] for j in await jobs.list_active_jobs(3)] == [2]
+    assert await redis.zrange(DUE_KEY, 0, -1) == ['2']
@@ -0,0 +1,39 @@
+# tests/test_pagination.py
+"""
+Keyset cursors of listings
+filepath: backend/tests/test_pagination.py
+"""
+import base64
+import json
+
+import pytest
+
+from app.db.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def _raw(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def test_cursors_round_trip():
+    for last_id in (1, 49, 1_000_000, 2 ** 31 - 1):
+        assert decode_cursor(encode_cursor(last_id)) == last_id
+
+
+def test_no_cursor_is_the_first_page():
+    assert decode_cursor(None) is None
+    assert decode_cursor('') is None
+
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor',
+    'é',
+    _raw([1]),
+    _raw(None),
+    _raw(5),
+    _raw({'offset': 5}),
+    _raw({'id': 'five'}),
+])
+def test_tampered_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
@@ -0,0 +1,51 @@
+# tests/test_placement.py
+"""
+Placing schedule runs on fixed phases and counting fleet capacity
+filepath: backend/tests/test_placement.py
+"""
+import json
+import time
+
+import pytest
+
+from app.services.scheduler.placement import (
+    WORKER_REPORTS_KEY, WORKER_TTL_SECONDS, WORKERS_KEY, fleet_capacity, place_run, report_capacity,
+)
+
+NOW = 1_700_000_000.0
+
+
+def test_runs_land_on_the_schedules_phase_at_or_after_not_before():
+    first = place_run(42, 3600, NOW)
+    assert NOW <= first < NOW + 3600
+    # The same phase however late the schedule is (re)registered
+    assert place_run(42, 3600, NOW + 1234) in (first, first + 3600)
+    assert place_run(42, 3600, first) == first
+    assert (place_run(42, 3600, first + 1) - first) == 3600
+
+
+def test_a_burst_of_new_schedules_is_spread_over_the_interval():
+    interval = 3600
+    offsets = sorted(place_run(i, interval, NOW) - NOW for i in range(1, 361))
+    per_ten_minutes = [sum(1 for o in offsets if start <= o < start + 600) for start in range(0, interval, 600)]
+    # 60 per bucket if perfectly even
+    assert max(per_ten_minutes) <= 75
+
+
+def test_zero_interval_runs_immediately():
+    assert place_run(1, 0, NOW) == NOW
+
+
+@pytest.mark.asyncio
+async def test_fleet_capacity_counts_live_workers_and_prunes_dead_ones(redis):
+    await report_capacity(redis, 'w1', 4, 1)
+    await report_capacity(redis, 'w2', 2, 0)
+    await redis.zadd(WORKERS_KEY, {'dead': time.time() - WORKER_TTL_SECONDS - 1})
+    await redis.hset(WORKER_REPORTS_KEY, 'dead', json.dumps({'slots': 8, 'busy': 0}))
+    await redis.lpush('queue', 'a', 'b')
+
+    capacity = await fleet_capacity(redis, 'queue')
+
+    assert capacity == {'workers': 2, 'slots': 6, 'busy': 1, 'queued': 2, 'free': 3}
+    assert await redis.zrange(WORKERS_KEY, 0, -1) == ['w1', 'w2']
+    assert await redis.hget(WORKER_REPORTS_KEY, 'dead') is None
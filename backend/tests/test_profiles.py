@@ -0,0 +1,50 @@
+# tests/test_profiles.py
+"""
+Telling open browser profiles from ones a crashed Chromium left locked
+filepath: backend/tests/test_profiles.py
+"""
+import os
+import socket
+import subprocess
+import sys
+
+from app.services.automation.profiles import LOCK_FILE, ProfileManager
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def _profile(root, name: str, lock_owner=None) -> str:
+    path = root / name
+    (path / 'Default' / 'Cache').mkdir(parents=True)
+    (path / 'Default' / 'Cache' / 'data_0').write_bytes(b'x' * 8192)
+    if lock_owner is not None:
+        os.symlink(lock_owner, path / LOCK_FILE)
+    return str(path)
+
+
+def test_only_locks_of_live_processes_count(tmp_path):
+    manager = ProfileManager(str(tmp_path))
+    host = socket.gethostname()
+
+    assert not manager.is_in_use(_profile(tmp_path, '1'))
+    assert manager.is_in_use(_profile(tmp_path, '2', f"{host}-{os.getpid()}"))
+    assert not manager.is_in_use(_profile(tmp_path, '3', f"{host}-{_dead_pid()}"))
+    # Another host's process cannot be checked from here
+    assert manager.is_in_use(_profile(tmp_path, '4', f"elsewhere-{os.getpid()}"))
+
+
+def test_crashed_profiles_are_pruned_and_open_ones_left_alone(tmp_path):
+    manager = ProfileManager(str(tmp_path))
+    host = socket.gethostname()
+    _profile(tmp_path, '1', f"{host}-{os.getpid()}")
+    _profile(tmp_path, '2', f"{host}-{_dead_pid()}")
+
+    freed = manager.prune_caches()
+
+    assert set(freed) == {'2'}
+    assert (tmp_path / '1' / 'Default' / 'Cache').is_dir()
+    assert not (tmp_path / '2' / 'Default' / 'Cache').exists()
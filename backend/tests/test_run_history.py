@@ -0,0 +1,62 @@
+# tests/test_run_history.py
+"""
+Write-behind run history
+filepath: backend/tests/test_run_history.py
+"""
+from datetime import datetime
+
+import pytest
+
+from app.services.automation.run_history import RunHistory, _TOUCH_SCHEDULE
+
+
+class _Session:
+    """Records the statements a flush executes."""
+
+    def __init__(self, executed: list):
+        self.executed = executed
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+
+    async def commit(self):
+        pass
+
+
+def _run(attempt: int, status: str, started_at: datetime, schedule_id=4) -> dict:
+    return {
+        'run_id': 'r1', 'attempt': attempt, 'routine_id': 7, 'user_id': 3, 'schedule_id': schedule_id,
+        'worker_id': 'w1', 'status': status, 'started_at': started_at, 'finished_at': started_at,
+        'duration': 1.0, 'browser_startup': 0.5, 'steps_done': 0, 'error': None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_final_attempts_of_scheduled_runs_set_last_run():
+    executed = []
+    history = RunHistory(session_factory=lambda: _Session(executed))
+    history.record(_run(0, 'retrying', datetime(2026, 1, 1, 12, 0)), [])
+    history.record(_run(1, 'finished', datetime(2026, 1, 1, 12, 1)), [])
+    history.record(_run(0, 'finished', datetime(2026, 1, 1, 11, 0), schedule_id=None), [])
+
+    await history.flush()
+
+    touched = [params for statement, params in executed if statement is _TOUCH_SCHEDULE]
+    assert touched == [[{'b_id': 4, 'b_last_run': datetime(2026, 1, 1, 12, 1)}]]
+
+
+@pytest.mark.asyncio
+async def test_unscheduled_runs_do_not_touch_schedules():
+    executed = []
+    history = RunHistory(session_factory=lambda: _Session(executed))
+    history.record(_run(0, 'finished', datetime(2026, 1, 1, 12, 0), schedule_id=None), [])
+
+    await history.flush()
+
+    assert not any(statement is _TOUCH_SCHEDULE for statement, _ in executed)
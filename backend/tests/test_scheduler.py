@@ -0,0 +1,69 @@
+# tests/test_scheduler.py
+"""
+Dispatching due schedules to the playback queue
+filepath: backend/tests/test_scheduler.py
+"""
+from datetime import datetime
+import asyncio
+import json
+import time
+
+import pytest
+
+import app.scheduler
+from app.models.schedule import Schedule
+from app.services.automation.jobs import QUEUE_KEY
+from app.services.scheduler.job_manager import JobManager
+from app.services.scheduler.next_runs import NextRunWriter
+
+
+@pytest.mark.asyncio
+async def test_due_schedules_are_queued_with_their_schedule_id(redis, monkeypatch):
+    monkeypatch.setattr(app.scheduler, 'get_redis', lambda: redis)
+    jobs = JobManager(redis)
+    await jobs.schedule_routine(Schedule(
+        id=4, routine_id=7, user_id=3, interval_seconds=60, is_active=True,
+        next_run=datetime.utcfromtimestamp(time.time() - 5),
+    ))
+
+    stop = asyncio.Event()
+    dispatcher = asyncio.create_task(jobs.run_dispatcher(app.scheduler.dispatch, stop, poll_interval=0.05))
+    for _ in range(40):
+        if await redis.llen(QUEUE_KEY):
+            break
+        await asyncio.sleep(0.05)
+    stop.set()
+    await dispatcher
+
+    queued = [json.loads(raw) for raw in await redis.lrange(QUEUE_KEY, 0, -1)]
+    assert [(j['routine_id'], j['user_id'], j['schedule_id']) for j in queued] == [(7, 3, 4)]
+
+
+class _Session:
+    def __init__(self, writes: list):
+        self.writes = writes
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params):
+        self.writes.append(params)
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_next_runs_are_written_latest_first_in_one_batch():
+    writes = []
+    writer = NextRunWriter(session_factory=lambda: _Session(writes))
+    writer.record(4, 1_700_000_060.0)
+    writer.record(4, 1_700_000_000.0)  # an older pop arriving late
+    writer.record(5, None)             # one-shot, nothing to mirror
+
+    assert await writer.flush() == 1
+    assert writes == [[{'b_id': 4, 'b_next_run': datetime.utcfromtimestamp(1_700_000_060.0)}]]
+    assert await writer.flush() == 0
@@ -0,0 +1,155 @@
+# tests/test_step_store.py
+"""
+Storing routine steps as shared, reference-counted chunks and reading them back
+filepath: backend/tests/test_step_store.py
+"""
+from typing import Any, Dict
+
+import pytest
+from sqlalchemy import select
+
+from app.db.chunks import split_chunks, split_volatile
+from app.db.types import EncodedSteps, encode_steps
+from app.models.routine import Routine
+from app.models.step_chunk import StepChunk
+from app.models.user import User
+from app.services.automation.step_store import StepStore
+
+
+def _steps(count: int, site: str = 'a') -> list:
+    return [{'type': 'click', 'url': f"https://{site}.test/{i}", 'x': i, 'y': i} for i in range(count)]
+
+
+class FakeChunks:
+    """Just enough of a session to serve step_chunks rows."""
+
+    def __init__(self, chunks):
+        self.rows: Dict[str, Dict[str, Any]] = {
+            digest: {'steps': EncodedSteps(encode_steps(steps)), 'ref_count': 1} for digest, steps in chunks
+        }
+        self.reads = 0
+
+    async def execute(self, statement, params=None):
+        self.reads += 1
+        wanted = statement.whereclause.right.value
+        return [(digest, self.rows[digest]['steps']) for digest in wanted if digest in self.rows]
+
+
+@pytest.mark.asyncio
+async def test_plans_stream_chunk_by_chunk_and_end_up_cached():
+    content, _ = split_volatile(_steps(500))
+    chunks = split_chunks(content)
+    assert len(chunks) > 2
+    db = FakeChunks(chunks)
+    store = StepStore()
+
+    plan = await store.stream(db, [digest for digest, _ in chunks])
+    assert len(plan) == 500
+    # Nothing is decoded until playback gets there
+    assert store.stats()['steps'] == 0
+    first = next(iter(plan))
+    assert first == content[0]
+    assert store.stats()['steps'] == 0
+
+    assert plan.to_list() == content
+    assert store.stats()['steps'] == 500
+    assert await store.get(db, [digest for digest, _ in chunks]) == content
+    assert db.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_streamed_steps_are_copies():
+    content, _ = split_volatile(_steps(20))
+    chunks = split_chunks(content)
+    store = StepStore()
+    refs = [digest for digest, _ in chunks]
+
+    (await store.get(FakeChunks(chunks), refs))[0]['x'] = 'changed'
+
+    assert (await store.get(FakeChunks(chunks), refs))[0]['x'] == 0
+
+
+@pytest.mark.asyncio
+async def test_missing_chunks_are_an_error():
+    with pytest.raises(LookupError):
+        await StepStore().stream(FakeChunks([]), ['0' * 64])
+
+
+async def _ref_counts(db) -> Dict[str, int]:
+    return dict((await db.execute(select(StepChunk.digest, StepChunk.ref_count))).all())
+
+
+def _routine(id: int) -> Routine:
+    return Routine(id=id, user_id=1, name=f"routine {id}")
+
+
+async def _with_user(db) -> None:
+    db.add(User(id=1, email='a@example.com', hashed_password=''))
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_routines_with_equal_steps_share_chunks(db):
+    store = StepStore()
+    content, _ = split_volatile(_steps(300))
+
+    first = await store.put(db, content)
+    second = await store.put(db, content)
+    await db.commit()
+
+    assert first == second
+    assert await _ref_counts(db) == {digest: 2 for digest in first}
+
+
+@pytest.mark.asyncio
+async def test_replacing_steps_keeps_shared_chunks_and_drops_unused_ones(db):
+    store = StepStore()
+    content, _ = split_volatile(_steps(300))
+    old = await store.put(db, content)
+    other = await store.put(db, content)  # another routine with the same steps
+    edited = content[:-1] + [{'type': 'navigation', 'url': 'https://b.test/'}]
+
+    new = await store.put(db, edited, old)
+    await db.commit()
+
+    counts = await _ref_counts(db)
+    kept = set(old) & set(new)
+    assert kept and set(new) - set(old)
+    assert all(counts[d] == 2 for d in kept)
+    assert all(counts[d] == 1 for d in set(new) - kept)
+    assert all(counts[d] == 1 for d in set(other) - kept)  # still used by the other routine
+    assert await store.get(db, new) == edited
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_deleted_when_their_last_reference_goes(db):
+    store = StepStore()
+    content, _ = split_volatile(_steps(300))
+    first = await store.put(db, content)
+    second = await store.put(db, content)
+
+    await store.put(db, [], first)
+    assert set(await _ref_counts(db)) == set(second)
+    await store.put(db, [], second)
+    await db.commit()
+
+    assert await _ref_counts(db) == {}
+
+
+@pytest.mark.asyncio
+async def test_set_steps_stores_recording_and_plan_under_the_routine(db):
+    await _with_user(db)
+    store = StepStore()
+    routine = _routine(1)
+    db.add(routine)
+    await db.commit()
+    recording = [{**step, 'timestamp': f"2026-01-01T12:00:{i:02d}Z"} for i, step in enumerate(_steps(40))]
+
+    await store.set_steps(db, routine, recording)
+    await db.commit()
+    assert await store.steps(db, routine) == recording
+    assert len(await store.plan(db, routine)) == 40
+
+    await store.set_steps(db, routine, [])
+    await db.commit()
+    assert await _ref_counts(db) == {}
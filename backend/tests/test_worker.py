@@ -0,0 +1,40 @@
+# tests/test_worker.py
+"""
+Requeueing jobs left in the processing lists of restarted or dead workers
+filepath: backend/tests/test_worker.py
+"""
+import time
+
+import pytest
+
+from app.services.automation.jobs import PROCESSING_KEY, PROCESSING_OWNERS_KEY, QUEUE_KEY
+from app.services.scheduler.placement import WORKERS_KEY, WORKER_TTL_SECONDS
+from app.worker import PlaybackWorker
+
+
+@pytest.mark.asyncio
+async def test_recover_requeues_own_jobs_oldest_first(redis):
+    worker = PlaybackWorker(redis, 'w1')
+    await redis.lpush(PROCESSING_KEY.format('w1'), 'a', 'b')  # 'b' was taken last
+
+    assert await worker.recover() == 2
+    assert await redis.rpop(QUEUE_KEY) == 'a'
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_dead_workers_are_reclaimed_and_live_ones_left_alone(redis):
+    now = time.time()
+    await redis.zadd(WORKERS_KEY, {'dead': now - WORKER_TTL_SECONDS - 5, 'alive': now})
+    await redis.sadd(PROCESSING_OWNERS_KEY, 'dead', 'alive', 'never-beat', 'w1')
+    await redis.lpush(PROCESSING_KEY.format('dead'), 'd1', 'd2')
+    await redis.lpush(PROCESSING_KEY.format('never-beat'), 'n1')
+    await redis.lpush(PROCESSING_KEY.format('alive'), 'a1')
+    await redis.lpush(PROCESSING_KEY.format('w1'), 'mine')
+
+    worker = PlaybackWorker(redis, 'w1')
+    assert await worker.reclaim_orphans() == 3
+
+    assert sorted(await redis.lrange(QUEUE_KEY, 0, -1)) == ['d1', 'd2', 'n1']
+    assert await redis.lrange(PROCESSING_KEY.format('alive'), 0, -1) == ['a1']
+    assert await redis.lrange(PROCESSING_KEY.format('w1'), 0, -1) == ['mine']
+    assert await redis.smembers(PROCESSING_OWNERS_KEY) == {'alive', 'w1'}